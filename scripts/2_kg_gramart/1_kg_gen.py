@@ -34,28 +34,24 @@ The inheritance list (n=4) lists the four modes of genetic inheritance [AR,AD, X
 # Standard imports
 import argparse
 
-# Top-level imports
-import pandas as pd
-import networkx as nx
-from rdflib import Graph, Literal, Namespace, RDF, RDFS, OWL, XSD
-
 # Local imports
-from utils import (
-    results_dir,
-    data_dir,
+from kg import (
+    DISEASES,
+    build_all,
+    run_disease,
+    time_tables,
+)
+from compressed import CODECS
+from database import DATABASE_FILE
+from export import (
+    LERCHE_EDGE_ATTRIBUTES,
+    OUTPUTS,
+    select_exports,
+)
+from shards import (
+    BALANCE,
+    SHARD_DIR,
 )
-
-# -----------------------------------------------------------------------------
-# TOP-LEVEL CONSTANTS
-# -----------------------------------------------------------------------------
-
-EXP_NAME = "2_kg_gramart"
-REFLEXIVE = False
-DISEASES = [
-    "cmt",
-    "dystonia",
-    "parkinson",
-]
 
 # -----------------------------------------------------------------------------
 # PARSE ARGUMENTS
@@ -72,637 +68,204 @@ parser = argparse.ArgumentParser(
 parser.add_argument(
     'disease',
     choices=DISEASES,
+    nargs='?',
 )
 
-args = parser.parse_args()
+# Add the batch mode over all diseases
+parser.add_argument(
+    '--all',
+    action='store_true',
+    help='build the knowledge graphs of all diseases in parallel, loading their shared tables once',
+)
 
-# -----------------------------------------------------------------------------
-# DERIVED VARIABLES
-# -----------------------------------------------------------------------------
+# Add the size of the process pool of the batch mode
+parser.add_argument(
+    '--processes',
+    type=int,
+    default=None,
+    help='the number of worker processes for --all, by default one per disease',
+)
+
+# Add the size of the process pool of the exports
+parser.add_argument(
+    '--export-processes',
+    type=int,
+    default=1,
+    help='the number of worker processes writing the exports of each disease concurrently, by default 1 to write them in turn',
+)
+
+# Disable the on-disk cache of parsed tables
+parser.add_argument(
+    '--no-cache',
+    action='store_true',
+    help='parse every table from its CSV file instead of the cache of parsed tables in work/cache',
+)
+
+# Rebuild exports that are up to date
+parser.add_argument(
+    '--force',
+    action='store_true',
+    help='rebuild every export even if the manifest of its results folder shows that its inputs and code are unchanged',
+)
+
+# Add the selection of the exports
+parser.add_argument(
+    '--outputs',
+    type=lambda outputs: outputs.split(','),
+    default=list(OUTPUTS),
+    help=f'a comma-separated list of the outputs to write, out of {",".join(OUTPUTS)} (all by default)',
+)
 
-# Point to the data and results directories for this disease
-local_data_dir = data_dir("kg", args.disease)
-local_results_dir = results_dir(EXP_NAME, args.disease)
+# Skip drawing the graph
+parser.add_argument(
+    '--headless',
+    action='store_true',
+    help='do not draw the graph of a single disease, which is never drawn with --all',
+)
 
-# Create local functions for loading and saving
+# Add the format of the ontology export
+parser.add_argument(
+    '--rdf-format',
+    choices=['xml', 'nt', 'ttl'],
+    default='xml',
+    help='write the ontology as RDF/XML built in memory (rdf.owl) or stream it to disk as N-Triples (rdf.nt) or Turtle (rdf.ttl)',
+)
 
+# Add the conversion of a streamed ontology
+parser.add_argument(
+    '--rdf-xml',
+    action='store_true',
+    help='also convert a streamed --rdf-format nt or ttl ontology to RDF/XML (rdf.owl)',
+)
 
-def input_dir(*args): return local_data_dir.joinpath(*args)
+# Add the per-stage profiles
+parser.add_argument(
+    '--profile',
+    action='store_true',
+    help='dump the cProfile statistics and traced Python memory of each build stage to the profile folder of each results folder',
+)
 
+# Add the compression of the verbose exports
+parser.add_argument(
+    '--compress',
+    choices=list(CODECS),
+    default=None,
+    help='stream the GraphML and RDF exports through a gzip (.gz) or zstd (.zst) compressor, where zstd needs the zstandard package',
+)
 
-def output_dir(*args): return local_results_dir.joinpath(*args)
+# Add the on-disk database export
+parser.add_argument(
+    '--database',
+    action='store_true',
+    help=f'build each graph straight into an indexed SQLite database ({DATABASE_FILE}) in its results folder instead of memory and stream the other exports out of it',
+)
 
+# Add the collapsed category memberships
+parser.add_argument(
+    '--compact',
+    action='store_true',
+    help='record the is_a edges from the individuals to their category supernodes as node memberships instead of edges while building, which leaves the exports unchanged',
+)
+
+# Add the Lerche exports without the category memberships
+parser.add_argument(
+    '--omit-is-a',
+    action='store_true',
+    help='omit the is_a statements from the individuals to their category supernodes in the Lerche exports',
+)
 
-# Data files
-CMT_DATA = input_dir("Location_Disease_Gene.csv")
-PHENOTYPE_DATA = input_dir("Phenotype_by_disease.csv")
-HPO_DATA = input_dir('HPO_to_tag.csv')
-PROTEIN_DATA = input_dir('protein_list.csv')
+# Add the balanced shards of the Lerche statements
+parser.add_argument(
+    '--shards',
+    type=int,
+    default=None,
+    help=f'also split edge_attributes_lerche.txt into this many shards with a manifest of their sizes and hashes in the {SHARD_DIR} folder of each results folder',
+)
+parser.add_argument(
+    '--shard-balance',
+    choices=BALANCE,
+    default='count',
+    help='balance the number of statements or the bytes of the shards (default: count)',
+)
 
-# Output/result files
-GRAPH_ATTRIBUTES = output_dir('graph_attributes.txt')
-EDGE_ATTRIBUTES = output_dir('edge_attributes.txt')
-RDF_OWL = output_dir('rdf.owl')
-LERCHE_EDGE_ATTRIBUTES = output_dir('edge_attributes_lerche.txt')
-GRAPHML_FILE = output_dir('gephy.graphml')
+# Add the table loading benchmark
+parser.add_argument(
+    '--time-tables',
+    action='store_true',
+    help='only report the cold (CSV) and warm (cached) load times of the tables of the selected diseases',
+)
 
 # -----------------------------------------------------------------------------
 # EXPERIMENT
 # -----------------------------------------------------------------------------
 
-# G is the Graph object for CMT
-G = nx.DiGraph()
-# G = nx.Graph()
-phenotype_list = []
-gene_list = []
-gene_protein_map = []
-variants = []
-disease_MIMs = []
-disease_MIM = ''
-phenotype_HPO_list = []
-inheritance_list = []
-disease_list = []
-gene_location = ''
-gene_locations = []
-MIM = ''
-disease = ''
-gene = ''
-proteins = set()
-df = pd.read_csv(CMT_DATA, header=0)
-
-#################################################################################################################
-# The file CMT_Location_Disease_Gene.csv is a CSV file derived from OMIM                                        #
-# First row is header row                                                                                        #
-# It has 81 datarows for 81 variants of CMT                                                                     #
-# All spaces replaced with underscore (_)                                                                       #
-# In column [5] when 2 modes of inheritance are noted, the two modes are separated by a pipe character (|)      #
-#                        [0]            [1]                [2]           [3]      [4]         [5]               #
-# Column headers are [Gene_Location]	[Disease_variant]	[Disease_MIM]	[Gene]	[Gene_MIM] [inheritance]         #
-################################################################################################################
-
-# Converts df to a list of 81 variants
-CMT_variants = df.values.tolist()
-
-# Create supernodes
-G.add_node('disease', category='disease', class_type='class')
-G.add_node('gene', category='gene', class_type='class')
-G.add_node('inheritance', category='inheritance', class_type='class')
-G.add_node('protein', category='protein', class_type='class')
-G.add_node('gene_location', category='gene_location', class_type='class')
-G.add_node('inheritance', category='inheritance', class_type='class')
-G.add_node('phenotype', category='phenotype', class_type='class')
-G.add_node('protein_class', category='protein_class', class_type='class')
-G.add_node('biologic_process', category='biologic_process', class_type='class')
-G.add_node('molecular_function', category='molecular_function', class_type='class')
-G.add_node('disease_involvement', category='disease_involvement', class_type='class')
-G.add_node('protein_location', category='protein_location', class_type='class')
-G.add_node('protein_domain', category='protein_domain', class_type='class')
-G.add_node('protein_motif', category='protein_motif', class_type='class')
-G.add_node('chromosome', category='chromosome', class_type='class')
-# Add nodes and edges from file CMT_Location_Disease_Gene.csv
-# Add gene data from "CMT_Location_Disease_Gene.csv"
-
-gene_locations = []
-for d in CMT_variants:
-    gene_location = d[0]
-    disease = d[1]
-    disease_MIM = d[2]
-    gene = d[3]
-    gene_MIM = d[4]
-    inheritance = d[5]
-    if disease not in disease_list:
-        disease_list.append(disease)
-    G.add_node(disease, category='disease', MIM=disease_MIM, class_type='individual')   # the name of the disease variant
-    disease_MIMs.append(disease_MIM)     # append disease_MIM to a list of disease_MIMs
-    # if REFLEXIVE:
-    G.add_edge(disease, 'disease', relation='is_a')     # 'disease' is a supernode--all diseases are linked to this supernode
-    if gene_location not in gene_locations:
-        gene_locations.append(gene_location)    # gene_locations is a list of gene)location (n=61
-    G.add_node(gene_location, category='gene_location', class_type='individual')
-    # if REFLEXIVE:
-    G.add_edge(gene_location, 'gene_location', relation='is_a')
-    G.add_edge(gene, gene_location, relation='has_gene_location')
-    G.add_node(gene, category='gene', MIM=gene_MIM, gene_location=gene_location, class_type='individual')   # add each gene as a node
-    G.add_edge(disease, gene, relation='is_caused_by')  # add an edge between disease and causative gene
-    # if REFLEXIVE:
-    G.add_edge(gene, 'gene', relation='is_a')
-    if gene not in gene_list:
-        gene_list.append(gene)  # Useful list of all genes in knowledge graph
-    inherit = []
-    inherit = inheritance.split('|')    # Some diseases have multiple inheritances.  We use pipe charactder to separate multiple inheritances
-    for inherit_type in inherit:
-        G.add_node(inherit_type, category='inheritance', class_type='individual')   # Each form of inheritance is a node
-        # if REFLEXIVE:
-        G.add_edge(inherit_type, 'inheritance', relation='is_a')
-        G.add_edge(disease, inherit_type, relation='inherited_by')  # add an edge between the disease and how it is inherited
-        if inherit_type not in inheritance_list:
-            inheritance_list.append(inherit_type)
-
-#######################################################################################################################
-# ADD PHENOTYPE DATA                                                                                                  #
-#  The file HP)_to_tag.csv relates the HPO accession number to the text name of a phenotype feature                   #
-#######################################################################################################################
-
-hpo_to_phenotype = pd.read_csv(HPO_DATA)
-hpo_tags = hpo_to_phenotype.values.tolist()   # The is a list of HP numbers and text tags for phenotypes (n=20958)
-# hpo_tags maps an HPO number to a text tag describing a phenotype
-phenotype_tags = []
-phenotypes = []
-phenotype_file = pd.read_csv(PHENOTYPE_DATA)
-phenotype_by_disease = phenotype_file.values.tolist()
-
-###################################################################
-#      [0]            [1]           [2]
-# [disease_MIM]    [disease]      [hpo_ID]
-#########################################################################################################################
-for p in phenotype_by_disease:            # phenotype by disease has a length of 255,541
-    disease_MIM = p[0]
-    disease = p[1]
-    hpo_ID = p[2]
-#      print(disease, disease_MIM)
-    if disease_MIM in disease_MIMs:     # Disease MIMs is a list of 81 variants of CMT
-        for h in hpo_tags:
-            hpo = h[0]
-            phenotype = h[1]
-            if hpo == hpo_ID:
-                if phenotype not in phenotype_list:
-                    phenotype_list.append(phenotype)
-                    G.add_node(phenotype, category='phenotype', hpo_id=hpo_ID, class_type='individual')
-                    # if REFLEXIVE:
-                    G.add_edge(phenotype, 'phenotype', relation='is_a')
-                    G.add_edge(disease, phenotype, relation='has_a_phenotype')
-
-
-####################################################################################################################################################################################
-# ADD PROTEIN DATA                                                                                                                                                                  #
-#  The file proteinatlas.csv has tabular data on different protein characteristics                                                                                                 #
-# data is on 20,090 proteins that links gene to protein name                                                                                                                       #
-# [0]  |    [1]        |       [2]      |      [3]    |       [4]       |     [5]           |            [6]      |         [7]       |   [8]  | [9]   | [10]  | 11 |     |12    | #
-# Gene |Protein Name   |	Uniprot_num Protein Class |	Biologic process |Molecular function |Disease involvement  | Protein_location  |    MW  | domain|motif  |location | length| #
-####################################################################################################################################################################################
-
-df_cmt_proteins = pd.read_csv(PROTEIN_DATA)
-cmt_proteins = df_cmt_proteins.values.tolist()
-for p in cmt_proteins:
-    if args.disease == "parkinson":
-        gene = p[0]
-        protein = p[1]
-        uniprot = p[2]
-        chromosome = p[3]
-        protein_class = p[4]
-        biologic_process = p[5]
-        molecular_function = p[6]
-        disease_involvement = p[7]
-        protein_location = p[8]
-        MW = p[9]
-        domain = p[11]
-        motif = p[12]
-        location = p[8]
-        length = p[10]
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    if args.all:
+        diseases = DISEASES
+    elif args.disease is not None:
+        diseases = [args.disease]
+    else:
+        parser.error("either a disease or --all is required")
+
+    if args.time_tables:
+        for disease in diseases:
+            times = time_tables(disease)
+            print(f"{disease}: cold {times['cold']:.4f} s, warm {times['warm']:.4f} s")
+        parser.exit()
+
+    unknown = [output for output in args.outputs if output not in OUTPUTS]
+    if unknown or not args.outputs:
+        parser.error(f"--outputs must be a comma-separated list of {', '.join(OUTPUTS)}, not {','.join(args.outputs)}")
+    exports = select_exports(args.outputs, args.rdf_format, args.rdf_xml, args.compress)
+    if args.database:
+        exports.insert(0, DATABASE_FILE)
+    if args.shards is not None and (args.shards < 1 or LERCHE_EDGE_ATTRIBUTES not in exports):
+        parser.error("--shards must be positive and needs the lerche outputs")
+
+    if args.all:
+        summaries = build_all(
+            diseases,
+            args.processes,
+            cache=not args.no_cache,
+            force=args.force,
+            exports=exports,
+            profile=args.profile,
+            export_processes=args.export_processes,
+            compact=args.compact,
+            lerche_memberships=not args.omit_is_a,
+            shards=args.shards,
+            shard_balance=args.shard_balance,
+        )
     else:
-        gene = p[0]
-        protein = p[1]
-        uniprot = p[2]
-        chromosome = p[3]
-        chromosome__location = p[4]
-        protein_class = p[5]
-        biologic_process = p[6]
-        molecular_function = p[7]
-        disease_involvement = p[8]
-        MW = p[9]
-        domain = p[10]
-        motif = p[11]
-        protein_location = p[12]
-        length = p[13]
-    G.add_node(chromosome, category='chromosome', class_type='individual')
-    # if REFLEXIVE:
-    G.add_edge(chromosome, 'chromosome', relation='is_a')
-    G.add_edge(gene, chromosome, relation='is_on_chromosome')
-    G.add_node(protein, category='protein', uniprot=uniprot, class_type='individual')
-    # if REFLEXIVE:
-    G.add_edge(protein, 'protein', relation='is_a')
-    G.add_edge(gene, protein, relation='codes_for')
-    protein_classes = protein_class.split('|')
-    if 'none' not in protein_class:
-        for pc in protein_classes:
-            G.add_node(pc, category='protein_class', class_type='individual')
-            G.add_edge(pc, 'protein_class', relation='is_a')
-            G.add_edge(protein, pc, relation='has_protein_class')
-    if 'none' not in biologic_process:
-        biological_processes = biologic_process.split('|')
-        for bp in biological_processes:
-            G.add_node(bp, category='biologic_process', class_type='individual')
-            G.add_edge(protein, bp, relation='has_biologic_process')
-            G.add_edge(bp, 'biologic_process', relation='is_a')
-    if 'none' not in molecular_function:
-        molecular_functions = molecular_function.split('|')
-        for mf in molecular_functions:
-            G.add_node(mf, category='molecular_function', class_type='individual')
-            G.add_edge(protein, mf, relation="has_molecular_function")
-            G.add_edge(mf, 'molecular_function', relation='is_a')
-    if 'none' not in disease_involvement:
-        diseases_involved = disease_involvement.split('|')
-        for di in diseases_involved:
-            G.add_node(di, category='disease_involvement', class_type='individual')
-            G.add_edge(protein, di, relation='has_disease_involvement')
-            G.add_edge(di, 'disease_involvement', relation='is_a')
-    G.add_edge(gene, protein, relation='codes_for')
-    protein_domain = domain.split('|')
-    if 'none' not in protein_domain:
-        for p_d in protein_domain:
-            G.add_node(p_d, category='protein_domain', class_type='individual')
-            G.add_edge(p_d, 'protein_domain', relation='is_a')
-            G.add_edge(protein, p_d, relation='has_a_domain')
-
-    protein_motif = motif.split('|')
-    if 'none' not in protein_motif:
-        for pm in protein_motif:
-            G.add_node(pm, category='protein_motif', class_type='individual')
-            G.add_edge(pm, 'protein_motif', relation='is_a')
-            G.add_edge(protein, pm, relation='has_a_motif')
-
-    protein_locations = protein_location.split('|')
-    if 'none' not in protein_location:
-        for pl in protein_locations:
-            G.add_node(pl, category='protein_location', class_type='individual')
-            G.add_edge(pl, 'protein_location', relation='is_a')
-            G.add_edge(protein, pl, relation='is_located_at')
-
-    nx.set_node_attributes(G, {protein: {"molecular_weight": MW}})
-    nx.set_node_attributes(G, {protein: {"protein_length": length}})
-# You can access the attribute using the `nodes` dictionary
-# print(G.nodes[protein]["molecular_weight"])
-# print(G.nodes[protein]["protein_length"])
-
-
-# Draw a low-resolution graph
-nx.draw_networkx(G, with_labels=False)
-
-# Write the graph to file in graphml format for GEPHI
-nx.write_graphml(G, GRAPHML_FILE)
-# nx.write_graphml(G, 'cmt.graphml')
-# Find nodes without any edges
-isolated_nodes = list(nx.isolates(G))
-
-
-# Assuming you already have a graph G
-
-# Open a file in write mode
-with open(GRAPH_ATTRIBUTES, 'w') as file:
-    # Iterate through all nodes in the graph
-    for node in G.nodes():
-        # Retrieve the attributes of the node
-        attributes = G.nodes[node]
-
-        # Write the node and its attributes to the file
-        file.write(f"Node: {node}\n")
-        for attr, value in attributes.items():
-            file.write(f"{attr}: {value}\n")
-        file.write('\n')  # Add a blank line between nodes
-
-
-# Assuming you already have a graph G
-
-# Open a file in write mode
-with open(EDGE_ATTRIBUTES, 'w') as file:
-    # Iterate through all edges in the graph
-    for edge in G.edges():
-        # Check if the edge has attributes
-        attributes = G.get_edge_data(*edge)
-        if attributes:
-            # Write the edge and its attributes to the file
-            file.write(f"Edge: {edge}\n")
-            for attr, value in attributes.items():
-                file.write(f"{attr}: {value}\n")
-            file.write('\n')  # Add a blank line between edges
-
-# Print the isolated nodes
-print('isolated_nodes: ', isolated_nodes)
-edge_attributes = []
-# Traverse edges and retrieve attributes
-for u, v, attributes in G.edges.data():
-    if attributes not in edge_attributes:
-        edge_attributes.append(attributes)
-
-
-# Print the list of edge attributes
-print('edge attributes:', edge_attributes)
-
-# number of nodes
-number_of_nodes = nx.number_of_nodes(G)
-print('Number of nodes: ', number_of_nodes)
-
-number_of_edges = nx.number_of_edges(G)
-print("number_of_edges: ", number_of_edges)
-
-
-# Create a new RDF graph
-g = Graph()
-# Define the namespaces and prefixes
-ex = Namespace("http://example.org/#")
-
-# Define the namespaces
-ex = Namespace("http://example.org/")
-rdf = Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
-rdfs = Namespace("http://www.w3.org/2000/01/rdf-schema#")
-g.bind("ex", ex)
-# Define the classes and subclasses
-molecular_function = ex['molecular_function']
-biologic_process = ex['biologic_process']
-protein_class = ex['protein_class']
-protein_motif = ex['protein_motif']
-protein_location = ex['protein_location']
-gene_location = ex['gene_location']
-protein_domain = ex['protein_domain']
-chromosome = ex['chromosome']
-inheritance = ex['inheritance']
-protein = ex["protein"]
-gene = ex["gene"]
-disease = ex["disease"]
-phenotype = ex["phenotype"]
-class_list = [molecular_function, protein_location, biologic_process, protein_class, protein_motif,
-              gene_location, protein_domain, chromosome, inheritance, protein, gene, disease, phenotype]
-
-# Add classes
-for c in class_list:
-    if c != '':
-        g.add((c, RDF.type, OWL.Class))
-
-for n in G.nodes.data():
-    # print(n)
-    node_type = ''
-    node_type = n[1].get('class_type', 0)
-    if node_type == 'individual':
-        # print(n[0])
-        class_name = n[1].get('category', 0)
-        if class_name != 0:
-            individual_name = n[0]
-            individual_name_uri = ex[individual_name]
-            class_name_uri = ex[class_name]
-            g.add((individual_name_uri, RDF.type, class_name_uri))
-
-
-# ADD OBJECT RELATIONSHIPS
-relations = set()
-start_nodes_set = set()
-end_nodes_set = set()
-i = 1
-start_list = []
-for e in G.edges.data():
-    start_node = e[0]
-    attributes = G.nodes[start_node]
-    # print("Start Node:", start_node)
-    # print("Attributes:", attributes)
-    class_type_num = G.nodes[start_node].get('class_type', 0)
-    if class_type_num == 'individual':
-        print(start_node, '>', class_type_num)
-        start_uri = ex[e[0]]
-        start_node = e[0]
-        start_nodes_set.add(start_node)
-        end_node = e[1]
-        if (end_node != 'none' or ''):
-            if (start_node != 'none' or ''):
-                end_uri = ex[e[1]]
-                end_nodes_set.add(end_node)
-                object_property_dict = e[2]
-                object_property = object_property_dict.get('relation', 0)
-                end_value = G.nodes[end_node].get('category', 0)
-                # end_node_category = end_node.get('category', 0)
-                # print(end_node_category)
-                relations.add(object_property)
-                # relations.discard('is_a')
-                relations.discard(0)
-                object_property_list = list(relations)
-                if object_property in object_property_list:      # print(object_property)
-                    range_value = G.nodes[end_node].get("category", 0)
-                    domain_value = G.nodes[start_node].get("category", 0)
-                #    print('<<',i,'>>',start_uri,'>>', end_uri, '>>',object_property,'>>', start_node, '>>',domain_value, '>>', range_value)
-                    i += 1
-                    object_property_uri = ex[object_property]
-                    range_uri = ex[range_value]
-                    domain_uri = ex[domain_value]
-                    g.add((object_property_uri, RDF.type, RDF.Property))
-                    g.add((object_property_uri, RDFS.domain, domain_uri))
-                    g.add((object_property_uri, RDFS.range, range_uri))
-                    g.add((start_uri, object_property_uri, end_uri))
-                    start_list.append(start_uri)
-
-
-################################################################
-# Data Properties for the Proteins are added here
-################################################################
-
-# create list of proteins and their molecular weights and lengths
-MW_list = []
-length_list = []
-uniprot_list = []
-for p in G.nodes:
-    if p != 'protein':
-        cat = G.nodes[p].get('category', 0)
-        if str(cat) == 'protein':
-            uniprot = ''
-            uniprot = G.nodes[p].get('uniprot', 0)
-            uniprot_pair = []
-            uniprot_pair.append(p)
-            uniprot_pair.append(uniprot)
-            uniprot_list.append(uniprot_pair)
-            MW = 0
-            MW = G.nodes[p].get('molecular_weight', 0)
-            MW_pair = []
-            MW_pair.append(p)
-            MW_pair.append(MW)
-            MW_list.append(MW_pair)
-            length = 0
-            length = G.nodes[p].get('protein_length', 0)
-            print(length)
-            length_pair = []
-            length_pair.append(p)
-            length_pair.append(length)
-            length_list.append(length_pair)
-
-# Loop through the list and add each protein node and its dataproperty to the graph
-protein_weight_uri = ex['protein_weight']
-# Add the classes and their labels
-g.add((protein_weight_uri, RDFS.label, Literal("protein_weight")))
-g.add((protein_weight_uri, RDF.type, OWL.DatatypeProperty))
-g.add((protein_weight_uri, RDFS.domain, ex.protein))
-g.add((protein_weight_uri, RDFS.range, XSD.string))
-for p in MW_list:
-    protein_uri = ex[p[0]]
-    mol_weight = p[1]
-#    print(protein_uri, mol_weight)
-    g.add((protein_uri, protein_weight_uri, Literal(
-        mol_weight, datatype=XSD.string)))
-
-
-g.add((protein_weight_uri, RDFS.label, Literal("protein_weight")))
-g.add((protein_weight_uri, RDF.type, OWL.DatatypeProperty))
-g.add((protein_weight_uri, RDFS.domain, ex.protein))
-g.add((protein_weight_uri, RDFS.range, XSD.string))
-
-
-# Add a new data property for the protein class
-protein_length_uri = ex['protein_length']
-g.add((protein_length_uri, RDFS.label, Literal("protein_length")))
-g.add((protein_length_uri, RDF.type, OWL.DatatypeProperty))
-g.add((protein_length_uri, RDFS.domain, ex.protein))
-g.add((protein_length_uri, RDFS.range, XSD.string))
-for p in length_list:
-    # print(p, ex[p[0]], p[1])
-    protein_uri = ex[p[0]]
-    length_aa = p[1]
-    # print(protein_uri, length_aa)
-    g.add((protein_uri, protein_length_uri, Literal(
-        length_aa, datatype=XSD.string)))
-
-# Add a new data property for the protein uniprot num
-
-uniprot_uri = ex['unipro_num']
-g.add((uniprot_uri, RDFS.label, Literal("uniprot_num")))
-g.add((uniprot_uri, RDF.type, OWL.DatatypeProperty))
-g.add((uniprot_uri, RDFS.domain, ex.protein))
-g.add((uniprot_uri, RDFS.range, XSD.string))
-for p in uniprot_list:
-    # print(p[0],'>>', p[1])
-    protein_uri = ex[p[0]]
-    uniprot = p[1]
-    # print(protein_uri, length_aa)
-    g.add((protein_uri, uniprot_uri, Literal(
-        uniprot, datatype=XSD.string)))
-
-
-################################
-# Data properities for Genes
-###############################
-
-gene_MIM_list = []
-for w in G.nodes:
-    cat = G.nodes[w].get('category', 0)
-    if str(cat) == 'gene':
-        gene_MIM = ''
-        gene_MIM = G.nodes[w].get('MIM', 0)
-        gene_pair = []
-        gene_pair.append(w)
-        gene_pair.append(gene_MIM)
-        gene_MIM_list.append(gene_pair)
-
-gene_MIM_uri = ex['gene_MIM']
-g.add((gene_MIM_uri, RDFS.label, Literal("gene_MIM")))
-g.add((gene_MIM_uri, RDF.type, OWL.DatatypeProperty))
-g.add((gene_MIM_uri, RDFS.domain, ex.gene))
-g.add((gene_MIM_uri, RDFS.range, XSD.string))
-for w in gene_MIM_list:
-    gene_uri = ex[w[0]]
-    MIM = w[1]
-    g.add((gene_uri, gene_MIM_uri, Literal(MIM, datatype=XSD.string)))
-
-
-##############################
-
-# Data Properties for phenotypes
-phenotype_hpo_list = []
-phenotype_hpo_uri = ex['phenotype_hpo']
-g.add((phenotype_hpo_uri, RDFS.label, Literal("phenotype_hpo")))
-g.add((phenotype_hpo_uri, RDF.type, OWL.DatatypeProperty))
-g.add((phenotype_hpo_uri, RDFS.domain, ex.phenotype))
-g.add((phenotype_hpo_uri, RDFS.range, XSD.string))
-for x in G.nodes:
-    cat = G.nodes[x].get('category', 0)
-    if cat == 'phenotype':
-        #  print(cat)
-        hpo = G.nodes[x].get('hpo_id', 0)
-        if hpo != 0:
-            phenotype_uri = ex[x]
-            g.add((phenotype_uri, phenotype_hpo_uri, Literal(
-                hpo, datatype=XSD.string)))
-
-# Data Properties for disease
-for d in G.nodes:
-    cat = G.nodes[d].get('category', 0)
-    if cat != 0:
-        if cat == 'disease':
-            MIM = G.nodes[d].get('MIM', 0)
-            variant = d
-            if MIM != 0:
-                disease_MIM_uri = ex['disease_MIM']
-                g.add((disease_MIM_uri, RDFS.label, Literal("disease_MIM")))
-                g.add((disease_MIM_uri, RDF.type, OWL.DatatypeProperty))
-                g.add((disease_MIM_uri, RDFS.domain, ex.phenotype))
-                g.add((disease_MIM_uri, RDFS.range, XSD.string))
-                disease_uri = ex[variant]
-                disease_MIM = MIM
-                g.add((disease_uri, disease_MIM_uri, Literal(
-                    disease_MIM, datatype=XSD.string)))
-
-# Find nodes without any edges
-isolated_nodes = list(nx.isolates(G))
-print('isolated nodes', isolated_nodes)
-# for node, attributes in G.nodes.data():
-#   print(f"Node {node}: {attributes}")
-
-# Create a set to store unique attribute keys
-attribute_keys = set()
-
-# Iterate over all nodes and collect attribute keys
-for node, attributes in G.nodes.data():
-    attribute_keys.update(attributes.keys())
-
-# Convert the set to a list
-attribute_list = list(attribute_keys)
-
-# print(attribute_list)
-
-# Print the isolated nodes
-# print('isolated nodes:',isolated_nodes)
-edge_attributes = []
-# Traverse edges and retrieve attributes
-for u, v, attributes in G.edges.data():
-    if attributes not in edge_attributes:
-        edge_attributes.append(attributes)
-# for n, attibutes in G.nodes.data():
-    # print(n, attributes)
-# Print the list of edge attributes
-# print('edge attributes:', edge_attributes)
-
-# number of nodes
-number_of_nodes = nx.number_of_nodes(G)
-print('Number of nodes: ', number_of_nodes)
-
-number_of_edges = nx.number_of_edges(G)
-print("number_of_edges: ", number_of_edges)
-
-# Serialize the RDF graph to an OWL file
-file_out = RDF_OWL
-g.serialize(file_out, format="xml")
-# Print confirmation message
-print("CMT Ontology written to", file_out)
-
-# Assuming you already have a graph G
-
-# Open a file in write mode
-with open(GRAPH_ATTRIBUTES, 'w') as file:
-    # Iterate through all nodes in the graph
-    for node in G.nodes():
-        # Retrieve the attributes of the node
-        attributes = G.nodes[node]
-
-        # Write the node and its attributes to the file
-        file.write(f"Node: {node}\n")
-        for attr, value in attributes.items():
-            file.write(f"{attr}: {value}\n")
-        file.write('\n')  # Add a blank line between nodes
-
-# CONVIENCE TRANSCRIPTION FOR LERCHE IN JULIA
-
-# Open a file in write mode
-with open(LERCHE_EDGE_ATTRIBUTES, 'w') as file:
-    # Iterate through all edges in the graph
-    for edge in G.edges():
-        # Check if the edge has attributes
-        attributes = G.get_edge_data(*edge)
-        if attributes:
-            # Write in a convenient
-            file.write(f"\"{edge[0]}\" \"{attributes['relation']}\" \"{edge[1]}\"\n")
-            # file.write(f"{edge[0]} {attributes['relation']} {edge[1]}\n")
-
-print(LERCHE_EDGE_ATTRIBUTES)
+        summaries = [run_disease(
+            args.disease,
+            draw=not args.headless,
+            cache=not args.no_cache,
+            force=args.force,
+            exports=exports,
+            profile=args.profile,
+            export_processes=args.export_processes,
+            compact=args.compact,
+            lerche_memberships=not args.omit_is_a,
+            shards=args.shards,
+            shard_balance=args.shard_balance,
+        )]
+
+    for summary in summaries:
+        print('disease: ', summary["disease"])
+        print('rebuilt: ', summary["built"] or 'none, all exports are up to date')
+        print('isolated_nodes: ', summary["isolated_nodes"])
+        print('edge attributes:', summary["edge_attributes"])
+        print('Number of nodes: ', summary["nodes"])
+        print("number_of_edges: ", summary["edges"])
+        for name, file in summary["files"].items():
+            if name in summary["built"]:
+                print(f"{name} written to", file)
+            else:
+                print(f"{name} up to date at", file)
+        if summary["report"] is not None:
+            print("Build report written to", summary["report"])
+        if summary["shards"] is not None:
+            print(f"{args.shards} shards written to", summary["shards"])
@@ -0,0 +1,445 @@
+"""
+    benchmark.py
+
+# Description
+A scaling benchmark of the `2_kg_gramart` knowledge graph generator on synthetic data.
+
+The synthetic data folders hold the four input tables of `1_kg_gen.py` in the layout of the CMT data, with a configurable number of diseases and phenotypes, and are generated once into `work/cache/benchmark/`.
+Each run times every stage of a build, from loading the tables through the RDF and Lerche exports, and the reports of all sizes are written to `work/results/2_kg_gramart/benchmark/<commit>-<time>.json` so that runs can be compared between commits.
+
+Run this file from the top of the repository, e.g., `python scripts/2_kg_gramart/benchmark.py --sizes 1000 10000 100000`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+# Local imports
+import graphml
+from compressed import (
+    available_codecs,
+    compressed_name,
+)
+from export import (
+    EXPORTS,
+    GRAPHML_FILE,
+    RDF_OWL,
+    WRITERS,
+    export_kg,
+    write_export,
+)
+from kg import (
+    CMT_DATA,
+    EXP_NAME,
+    HPO_DATA,
+    INPUT_FILES,
+    PHENOTYPE_DATA,
+    PROTEIN_DATA,
+    build_kg,
+    read_tables,
+)
+from profiling import (
+    StageProfiler,
+    stage,
+)
+from utils import (
+    cache_dir,
+    results_dir,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The modes of inheritance of the synthetic diseases
+INHERITANCE = ['AD', 'AR', 'AD|AR', 'XLD', 'XLR']
+
+# The chromosomes of the synthetic genes
+CHROMOSOMES = [str(c) for c in range(1, 23)] + ['X', 'Y']
+
+# The number of distinct values and the maximum number of values per protein of each pipe-delimited protein column
+PROTEIN_VOCABULARY = {
+    'protein_class': (40, 4),
+    'biologic_process': (200, 3),
+    'molecular_function': (150, 3),
+    'disease_involved': (60, 3),
+    'DOMAINS': (300, 2),
+    'MOTIFS': (30, 2),
+    'cell_localization': (25, 2),
+}
+
+# The fraction of the protein cells that are 'none'
+NONE_RATE = 0.1
+
+# The number of annotated phenotypes per synthetic disease
+PHENOTYPES_PER_DISEASE = 10
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def pipe_values(rng: np.random.Generator, n: int, name: str, size: int, max_values: int) -> list:
+    """Draws the cells of a pipe-delimited protein column.
+
+    Parameters
+    ----------
+    rng : np.random.Generator
+        The random number generator.
+    n : int
+        The number of cells.
+    name : str
+        The name of the column, which prefixes its values.
+    size : int
+        The number of distinct values of the column.
+    max_values : int
+        The maximum number of values per cell.
+
+    Returns
+    -------
+    list
+        The cells, each holding one to `max_values` values joined by pipes, or 'none'.
+    """
+
+    values = [f"{name}_{v}" for v in range(size)]
+    counts = rng.integers(1, max_values + 1, size=n)
+    codes = rng.integers(size, size=counts.sum())
+    cells = ['|'.join(values[c] for c in cell) for cell in np.split(codes, np.cumsum(counts)[:-1])]
+    for i in np.flatnonzero(rng.random(n) < NONE_RATE).tolist():
+        cells[i] = 'none'
+
+    return cells
+
+
+def generate_data(
+    folder: Path,
+    n_diseases: int,
+    n_phenotypes: int = None,
+    phenotypes_per_disease: int = PHENOTYPES_PER_DISEASE,
+    seed: int = 1234,
+) -> None:
+    """Writes a synthetic data folder with the input tables of a knowledge graph in the layout of the CMT data.
+
+    Parameters
+    ----------
+    folder : Path
+        The data folder to write the `INPUT_FILES` to.
+    n_diseases : int
+        The number of diseases, with one gene for every two diseases and one protein per gene.
+    n_phenotypes : int, optional
+        The number of HPO phenotypes, by default `n_diseases`.
+    phenotypes_per_disease : int, optional
+        The number of phenotype annotations of each disease, by default `PHENOTYPES_PER_DISEASE`.
+    seed : int, optional
+        The seed of the random data, by default 1234.
+    """
+
+    rng = np.random.default_rng(seed)
+    n_genes = max(1, n_diseases // 2)
+    n_phenotypes = n_diseases if n_phenotypes is None else n_phenotypes
+    folder.mkdir(parents=True, exist_ok=True)
+
+    genes = rng.integers(n_genes, size=n_diseases)
+    chromosomes = rng.choice(CHROMOSOMES, size=n_genes)
+    pd.DataFrame({
+        'Gene_Location': [f"{chromosomes[g]}p{g % 40}.{g % 9}" for g in genes.tolist()],
+        'Disease_variant': [f"Disease_{i}" for i in range(n_diseases)],
+        'Disease_MIM': np.arange(n_diseases) + 100000,
+        'Gene/Locus': [f"GENE{g}" for g in genes.tolist()],
+        'Gene_MIM': genes + 600000,
+        'Inheritance': rng.choice(INHERITANCE, size=n_diseases),
+    }).to_csv(folder.joinpath(CMT_DATA), index=False)
+
+    proteins = {
+        'gene': [f"GENE{g}" for g in range(n_genes)],
+        'protein': [f"Protein_{g}" for g in range(n_genes)],
+        'uniprot': [f"P{g:06d}" for g in range(n_genes)],
+        'chromosome': chromosomes,
+        'chromosome_location': [f"{s}_{s + 5000}" for s in rng.integers(10**8, size=n_genes).tolist()],
+    }
+    for name, (size, max_values) in PROTEIN_VOCABULARY.items():
+        proteins[name] = pipe_values(rng, n_genes, name, size, max_values)
+    proteins['MW'] = rng.integers(10, 500, size=n_genes)
+    proteins['length'] = rng.integers(100, 5000, size=n_genes)
+    columns = list(proteins)
+    columns.insert(columns.index('DOMAINS'), columns.pop(columns.index('MW')))
+    pd.DataFrame(proteins)[columns].to_csv(folder.joinpath(PROTEIN_DATA), index=False)
+
+    pd.DataFrame({
+        'Class ID': [f"HP:{h:07d}" for h in range(n_phenotypes)],
+        'Preferred_Label': [f"Phenotype_{h}" for h in range(n_phenotypes)],
+    }).to_csv(folder.joinpath(HPO_DATA), index=False)
+
+    diseases = np.repeat(np.arange(n_diseases), phenotypes_per_disease)
+    pd.DataFrame({
+        'disease_MIM': diseases + 100000,
+        'disease': [f"Disease_{i}" for i in diseases.tolist()],
+        'hpo_ID': [f"HP:{h:07d}" for h in rng.integers(n_phenotypes, size=len(diseases)).tolist()],
+        'freq': 'x',
+    }).to_csv(folder.joinpath(PHENOTYPE_DATA), index=False)
+
+
+def synthetic_data(
+    n_diseases: int,
+    n_phenotypes: int = None,
+    phenotypes_per_disease: int = PHENOTYPES_PER_DISEASE,
+    seed: int = 1234,
+) -> Path:
+    """Points to a synthetic data folder, generating it if it does not exist yet.
+
+    Parameters
+    ----------
+    n_diseases : int
+        The number of diseases.
+    n_phenotypes : int, optional
+        The number of HPO phenotypes, by default `n_diseases`.
+    phenotypes_per_disease : int, optional
+        The number of phenotype annotations of each disease, by default `PHENOTYPES_PER_DISEASE`.
+    seed : int, optional
+        The seed of the random data, by default 1234.
+
+    Returns
+    -------
+    Path
+        The data folder in `work/cache/benchmark/`.
+    """
+
+    n_phenotypes = n_diseases if n_phenotypes is None else n_phenotypes
+    folder = cache_dir("benchmark", f"{n_diseases}-{n_phenotypes}-{phenotypes_per_disease}-{seed}")
+    if not all(folder.joinpath(name).exists() for name in INPUT_FILES):
+        generate_data(folder, n_diseases, n_phenotypes, phenotypes_per_disease, seed)
+
+    return folder
+
+
+def codec_report(G: nx.DiGraph, out_dir: Path, names: list = [GRAPHML_FILE, RDF_OWL]) -> list:
+    """Measures the disk usage and write throughput of exports with each available codec.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    out_dir : Path
+        The folder to write the exports to.
+    names : list, optional
+        The file names of the uncompressed exports, by default the GraphML and RDF/XML exports.
+
+    Returns
+    -------
+    list
+        The export, codec, size in bytes, compression ratio, write time in seconds, and throughput in uncompressed bytes per second of each export and codec.
+    """
+
+    rows = []
+    for name in names:
+        # The uncompressed export comes first to measure the ratios against
+        for codec in [None, *available_codecs()]:
+            file = out_dir.joinpath(compressed_name(name, codec))
+            start = time.perf_counter()
+            write_export(G, file.name, out_dir)
+            elapsed = time.perf_counter() - start
+            size = file.stat().st_size
+            if codec is None:
+                plain = size
+            rows.append({
+                "export": name,
+                "codec": codec or "none",
+                "bytes": size,
+                "ratio": plain / size,
+                "time": elapsed,
+                "throughput": plain / elapsed,
+            })
+
+    return rows
+
+
+def graphml_report(G: nx.DiGraph, out_dir: Path) -> list:
+    """Compares the write time of the streaming GraphML writer and `networkx.write_graphml`.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    out_dir : Path
+        The folder to write the GraphML files to.
+
+    Returns
+    -------
+    list
+        The writer, size in bytes, write time in seconds, throughput in bytes per second, and agreement with the `networkx` file of each writer.
+    """
+
+    rows = []
+    for writer, write in (("networkx", nx.write_graphml), ("streaming", graphml.write_graphml)):
+        file = out_dir.joinpath(f"{writer}.graphml")
+        start = time.perf_counter()
+        with open(file, 'wb') as f:
+            write(G, f)
+        elapsed = time.perf_counter() - start
+        rows.append({
+            "writer": writer,
+            "bytes": file.stat().st_size,
+            "time": elapsed,
+            "throughput": file.stat().st_size / elapsed,
+            "identical": file.read_bytes() == out_dir.joinpath("networkx.graphml").read_bytes(),
+        })
+
+    return rows
+
+
+def run_benchmark(folder: Path, exports: list = EXPORTS, codecs: bool = False, graphml_writers: bool = False) -> dict:
+    """Times every stage of building and exporting the knowledge graph of a data folder.
+
+    The tables are parsed from their CSV files rather than the cache of parsed tables, and the exports are written to the `results` subfolder of the data folder.
+
+    Parameters
+    ----------
+    folder : Path
+        The data folder.
+    exports : list, optional
+        The file names of the exports to time, by default `EXPORTS`.
+    codecs : bool, optional
+        If true, also reports the disk usage and write throughput of the GraphML and RDF/XML exports with each codec (see `codec_report`), by default False.
+    graphml_writers : bool, optional
+        If true, also compares the streaming GraphML writer with `networkx.write_graphml` (see `graphml_report`), by default False.
+
+    Returns
+    -------
+    dict
+        The report of the stages from `StageProfiler.report`, along with the `codecs` and `graphml` reports if requested.
+    """
+
+    profiler = StageProfiler()
+    with stage(profiler, 'load'):
+        tables = read_tables(folder, cache=False)
+    G = build_kg("synthetic", tables, profiler)
+    out_dir = folder.joinpath("results")
+    out_dir.mkdir(exist_ok=True)
+    export_kg(G, out_dir, exports, profiler)
+
+    report = profiler.report()
+    if codecs:
+        report["codecs"] = codec_report(G, out_dir)
+    if graphml_writers:
+        report["graphml"] = graphml_report(G, out_dir)
+
+    return report
+
+
+def git_revision() -> str:
+    """Describes the commit of the working tree, marking uncommitted changes.
+
+    Returns
+    -------
+    str
+        The abbreviated commit hash with a `-dirty` suffix if the tree has changes, or 'unknown' outside of a git repository.
+    """
+
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='benchmark.py',
+        description='Times every stage of the knowledge graph generator on synthetic data of several sizes.',
+    )
+    parser.add_argument(
+        '--sizes',
+        nargs='+',
+        type=int,
+        default=[1000, 10000],
+        help='the numbers of synthetic diseases, from 10^3 to 10^6',
+    )
+    parser.add_argument(
+        '--phenotypes',
+        type=int,
+        default=None,
+        help='the number of synthetic HPO phenotypes, by default the number of diseases',
+    )
+    parser.add_argument(
+        '--phenotypes-per-disease',
+        type=int,
+        default=PHENOTYPES_PER_DISEASE,
+        help='the number of phenotype annotations of each disease',
+    )
+    parser.add_argument(
+        '--exports',
+        nargs='+',
+        choices=list(WRITERS),
+        default=EXPORTS,
+        help='the exports to time',
+    )
+    parser.add_argument(
+        '--codecs',
+        action='store_true',
+        help='also report the disk usage and write throughput of the GraphML and RDF/XML exports with each available codec',
+    )
+    parser.add_argument(
+        '--graphml',
+        action='store_true',
+        help='also compare the write time of the streaming GraphML writer with networkx.write_graphml',
+    )
+    parser.add_argument('--seed', type=int, default=1234, help='the seed of the synthetic data')
+    args = parser.parse_args()
+
+    revision = git_revision()
+    runs = []
+    for size in args.sizes:
+        folder = synthetic_data(size, args.phenotypes, args.phenotypes_per_disease, args.seed)
+        report = run_benchmark(folder, args.exports, args.codecs, args.graphml)
+        runs.append({
+            "diseases": size,
+            "phenotypes": size if args.phenotypes is None else args.phenotypes,
+            "phenotypes_per_disease": args.phenotypes_per_disease,
+            **report,
+        })
+        print(f"{size} diseases: {report['total_time']:.2f} s")
+        for record in report["stages"]:
+            print(f"    {record['stage']:<28} {record['time']:>9.3f} s {record['process_max_rss'] / 1e6 if record['process_max_rss'] else 0:>9.1f} MB")
+        for row in report.get("codecs", ()):
+            print(
+                f"    {row['export']:<14} {row['codec']:<5} {row['bytes'] / 1e6:>9.2f} MB "
+                f"x{row['ratio']:<6.1f} {row['throughput'] / 1e6:>8.1f} MB/s"
+            )
+        for row in report.get("graphml", ()):
+            print(
+                f"    {row['writer']:<14} {row['time']:>9.3f} s {row['throughput'] / 1e6:>8.1f} MB/s "
+                f"identical: {row['identical']}"
+            )
+
+    file = results_dir(EXP_NAME, "benchmark").joinpath(f"{revision}-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    with open(file, 'w') as f:
+        json.dump({
+            "revision": revision,
+            "date": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "runs": runs,
+        }, f, indent=4)
+    print("Benchmark results written to", file)
@@ -21,6 +21,7 @@ from rdflib import (
 from rdflib.namespace import Namespace
 
 # Local utilities
+from store import TripleStore
 from utils import results_dir
 
 # import os
@@ -128,3 +129,15 @@ query = """
 
 # Execute the query on the graph G
 results = G.query(query)
+
+# Execute the same query on the indexed triple store of G
+store = TripleStore.from_triples(G)
+store_results = store.query(
+    [('?protein', RDF.type, ex.protein), ('?protein', ex.molecular_weight, '?mw')],
+    {'?mw': lambda mw: mw > 10},
+)
+
+# Check the indexed triple store against the SPARQL results of rdflib
+assert sorted(store_results) == sorted(tuple(row) for row in results)
+for protein, mw in store_results:
+    print(f"{protein} has a molecular weight of {mw}")
@@ -0,0 +1,545 @@
+"""
+    compact.py
+
+# Description
+An array-backed compact store for the `2_kg_gramart` knowledge graphs.
+
+A `CompactGraph` interns the nodes to integer ids, holds the edges as CSR adjacency arrays, and stores the `relation`, `category`, and `class_type` strings as categorical codes, instead of the per-node and per-edge dictionaries of a `networkx.DiGraph`.
+Graphs convert to and from `networkx` without changing the order of their nodes, edges, or node attributes, so the existing exporters keep working on `CompactGraph.to_networkx()`.
+
+Run this file to benchmark the memory and build time of the store against `networkx` on a synthetic knowledge graph.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+import sys
+import time
+import tracemalloc
+from typing import (
+    Iterable,
+    Iterator,
+)
+
+import networkx as nx
+import numpy as np
+
+# Local imports
+from graph import (
+    KnowledgeGraph,
+    category_index,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The node attributes stored as categorical codes rather than per-node values
+CATEGORICAL = (
+    'category',
+    'class_type',
+)
+
+# The code of a missing categorical value
+MISSING = -1
+
+# -----------------------------------------------------------------------------
+# CLASSES
+# -----------------------------------------------------------------------------
+
+
+class Categorical:
+    """An interned table of the distinct values of a categorical attribute."""
+
+    def __init__(self, values: Iterable = ()):
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value) -> int:
+        """Gets the code of a value, adding it to the table if it is new."""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, code: int):
+        return self.values[code]
+
+
+class CompactGraph:
+    """An immutable, array-backed directed knowledge graph.
+
+    Attributes
+    ----------
+    nodes : list
+        The node labels, indexed by node id.
+    node_index : dict
+        The node id of each node label.
+    node_codes : dict
+        The `int32` code arrays of the `CATEGORICAL` node attributes, indexed by node id, with `MISSING` for nodes without the attribute.
+    node_values : dict
+        The `Categorical` tables of the `CATEGORICAL` node attributes.
+    node_attributes : dict
+        The sparse mappings of node id to value of each remaining node attribute.
+    schema_codes : np.ndarray
+        The code of the ordered attribute names of each node in `schemas`.
+    schemas : Categorical
+        The distinct tuples of attribute names of the nodes, which preserve the attribute order of each node.
+    indptr : np.ndarray
+        The CSR row pointers, so that the edges of node `i` are `indptr[i]:indptr[i + 1]`.
+    indices : np.ndarray
+        The `int32` target node ids of the edges.
+    relation_codes : np.ndarray
+        The `int32` code of the `relation` of each edge in `relations`, or `MISSING` for edges without attributes.
+    relations : Categorical
+        The distinct edge relations.
+    categories : dict
+        The `int32` node id arrays of each category in the order of the category index of the source graph (see `graph.category_index`).
+    memberships : np.ndarray
+        The position among the edges of each node of its collapsed `is_a` edge, or `MISSING` (see `KnowledgeGraph`).
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.node_index = {}
+        self.node_codes = {name: np.zeros(0, dtype=np.int32) for name in CATEGORICAL}
+        self.node_values = {name: Categorical() for name in CATEGORICAL}
+        self.node_attributes = {}
+        self.schema_codes = np.zeros(0, dtype=np.int32)
+        self.schemas = Categorical()
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.relation_codes = np.zeros(0, dtype=np.int32)
+        self.relations = Categorical()
+        self.categories = {}
+        self.memberships = np.zeros(0, dtype=np.int32)
+
+    # -------------------------------------------------------------------------
+    # CONSTRUCTION
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def from_networkx(cls, G: nx.DiGraph) -> "CompactGraph":
+        """Converts a `networkx` directed knowledge graph to a compact graph.
+
+        Parameters
+        ----------
+        G : nx.DiGraph
+            The graph to convert, whose edges may have no attributes other than `relation`.
+
+        Returns
+        -------
+        CompactGraph
+            The compact graph with the same nodes, edges, and attributes in the same order.
+        """
+
+        graph = cls()
+        graph._set_nodes(G.nodes.data())
+
+        n_edges = G.number_of_edges()
+        indptr = np.zeros(len(graph.nodes) + 1, dtype=np.int64)
+        indices = np.empty(n_edges, dtype=np.int32)
+        relation_codes = np.empty(n_edges, dtype=np.int32)
+        k = 0
+        for i, u in enumerate(graph.nodes):
+            for v, attributes in G._adj[u].items():
+                indices[k] = graph.node_index[v]
+                relation_codes[k] = graph._relation_code(attributes)
+                k += 1
+            indptr[i + 1] = k
+
+        graph.indptr = indptr
+        graph.indices = indices
+        graph.relation_codes = relation_codes
+        graph.categories = {
+            category: np.fromiter((graph.node_index[node] for node in nodes), dtype=np.int32, count=len(nodes))
+            for category, nodes in category_index(G).items()
+        }
+        graph.memberships = np.full(len(graph.nodes), MISSING, dtype=np.int32)
+        for node, position in getattr(G, 'memberships', {}).items():
+            graph.memberships[graph.node_index[node]] = position
+
+        return graph
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple], nodes: Iterable = ()) -> "CompactGraph":
+        """Builds a compact graph directly from node and edge lists with vectorized interning.
+
+        Nodes are ordered as they first appear in `nodes` and then in `edges`.
+        As in `networkx`, a repeated edge keeps the position of its first occurrence and the relation of its last.
+
+        Parameters
+        ----------
+        edges : Iterable[tuple]
+            The `(source, relation, target)` triples of the edges.
+        nodes : Iterable, optional
+            The `(node, attribute dict)` pairs of the nodes with attributes.
+
+        Returns
+        -------
+        CompactGraph
+            The compact graph of the nodes and edges.
+        """
+
+        graph = cls()
+        graph._set_nodes(nodes)
+
+        sources, relations, targets = [], [], []
+        for source, relation, target in edges:
+            sources.append(source)
+            relations.append(relation)
+            targets.append(target)
+
+        # Intern the nodes first seen in the edges
+        extra = []
+        for u, v in zip(sources, targets):
+            for node in (u, v):
+                if node not in graph.node_index:
+                    graph.node_index[node] = len(graph.nodes)
+                    graph.nodes.append(node)
+                    extra.append(node)
+        graph._extend_node_arrays(len(extra))
+
+        n = len(graph.nodes)
+        u = np.fromiter((graph.node_index[s] for s in sources), dtype=np.int64, count=len(sources))
+        v = np.fromiter((graph.node_index[t] for t in targets), dtype=np.int64, count=len(targets))
+        r = np.fromiter((graph.relations.code(x) for x in relations), dtype=np.int32, count=len(relations))
+
+        # Keep the first position and last relation of each repeated edge
+        keys = u * n + v
+        _, first = np.unique(keys, return_index=True)
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last
+        first_order = np.argsort(first, kind='stable')
+        order = first[first_order]
+        r = r[last[first_order]]
+        u, v = u[order], v[order]
+
+        # Group the edges by source node, keeping their insertion order
+        by_source = np.argsort(u, kind='stable')
+        graph.indices = v[by_source].astype(np.int32)
+        graph.relation_codes = r[by_source]
+        graph.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(u, minlength=n), out=graph.indptr[1:])
+        graph.categories = {
+            category: np.flatnonzero(graph.node_codes['category'] == code).astype(np.int32)
+            for code, category in enumerate(graph.node_values['category'].values)
+        }
+        graph.memberships = np.full(n, MISSING, dtype=np.int32)
+
+        return graph
+
+    def _set_nodes(self, nodes: Iterable[tuple]) -> None:
+        """Interns the nodes and their attributes."""
+        codes = {name: [] for name in CATEGORICAL}
+        schema_codes = []
+        for node, attributes in nodes:
+            i = self.node_index.setdefault(node, len(self.nodes))
+            if i < len(self.nodes):
+                raise ValueError(f"Node {node!r} is repeated")
+            self.nodes.append(node)
+            schema_codes.append(self.schemas.code(tuple(attributes)))
+            for name in CATEGORICAL:
+                value = attributes.get(name)
+                codes[name].append(MISSING if value is None else self.node_values[name].code(value))
+            for name, value in attributes.items():
+                if name not in CATEGORICAL:
+                    self.node_attributes.setdefault(name, {})[i] = value
+
+        for name in CATEGORICAL:
+            self.node_codes[name] = np.array(codes[name], dtype=np.int32)
+        self.schema_codes = np.array(schema_codes, dtype=np.int32)
+
+    def _extend_node_arrays(self, count: int) -> None:
+        """Extends the node arrays with nodes that have no attributes."""
+        for name in CATEGORICAL:
+            self.node_codes[name] = np.concatenate([
+                self.node_codes[name],
+                np.full(count, MISSING, dtype=np.int32),
+            ])
+        self.schema_codes = np.concatenate([
+            self.schema_codes,
+            np.full(count, self.schemas.code(()), dtype=np.int32),
+        ])
+
+    def _relation_code(self, attributes: dict) -> int:
+        """Gets the relation code of the attributes of an edge."""
+        if not attributes:
+            return MISSING
+        if set(attributes) != {'relation'}:
+            raise ValueError(f"Only the 'relation' edge attribute is supported, not {sorted(attributes)}")
+        return self.relations.code(attributes['relation'])
+
+    # -------------------------------------------------------------------------
+    # ACCESS
+    # -------------------------------------------------------------------------
+
+    def number_of_nodes(self) -> int:
+        """Gets the number of nodes."""
+        return len(self.nodes)
+
+    def number_of_edges(self) -> int:
+        """Gets the number of edges."""
+        return len(self.indices)
+
+    def node_data(self, i: int) -> dict:
+        """Gets the attribute dictionary of the node with id `i`."""
+        data = {}
+        for name in self.schemas[self.schema_codes[i]]:
+            if name in CATEGORICAL:
+                data[name] = self.node_values[name][self.node_codes[name][i]]
+            else:
+                data[name] = self.node_attributes[name][i]
+        return data
+
+    def successors(self, node) -> Iterator[tuple]:
+        """Iterates over the targets and relations of the edges of a node.
+
+        Parameters
+        ----------
+        node : Hashable
+            The label of the source node.
+
+        Yields
+        ------
+        tuple
+            The target label and relation of each edge, with a relation of `None` for edges without attributes.
+        """
+
+        i = self.node_index[node]
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        for j, code in zip(self.indices[start:stop].tolist(), self.relation_codes[start:stop].tolist()):
+            yield self.nodes[j], (None if code == MISSING else self.relations[code])
+
+    def edges(self) -> Iterator[tuple]:
+        """Iterates over the edges in `networkx` order.
+
+        Yields
+        ------
+        tuple
+            The source label, target label, and relation of each edge, with a relation of `None` for edges without attributes.
+        """
+
+        sources = np.repeat(np.arange(len(self.nodes)), np.diff(self.indptr))
+        for i, j, code in zip(sources.tolist(), self.indices.tolist(), self.relation_codes.tolist()):
+            yield self.nodes[i], self.nodes[j], (None if code == MISSING else self.relations[code])
+
+    def nodes_of(self, category: str) -> list:
+        """Lists the nodes of a category in the order of the category index.
+
+        Parameters
+        ----------
+        category : str
+            The category of the nodes.
+
+        Returns
+        -------
+        list
+            The labels of the nodes whose `category` attribute is `category`.
+        """
+
+        return [self.nodes[i] for i in self.categories.get(category, np.zeros(0, dtype=np.int32)).tolist()]
+
+    def nbytes(self) -> int:
+        """Estimates the memory used by the arrays of the graph, excluding the shared label and attribute value objects.
+
+        Returns
+        -------
+        int
+            The number of bytes of the arrays and the containers of the node labels and sparse attributes.
+        """
+
+        arrays = [
+            self.indptr,
+            self.indices,
+            self.relation_codes,
+            self.schema_codes,
+            self.memberships,
+            *self.node_codes.values(),
+            *self.categories.values(),
+        ]
+        total = sum(a.nbytes for a in arrays)
+        total += sys.getsizeof(self.nodes) + sys.getsizeof(self.node_index)
+        total += sum(sys.getsizeof(values) for values in self.node_attributes.values())
+
+        return total
+
+    # -------------------------------------------------------------------------
+    # CONVERSION
+    # -------------------------------------------------------------------------
+
+    def to_networkx(self, create_using: type = nx.DiGraph) -> nx.DiGraph:
+        """Converts the compact graph back to a `networkx` graph, for example for `nx.write_graphml`.
+
+        Every node label is the same object in the nodes and edges of the graph, so that even labels that are not equal to themselves, such as a missing `float('nan')` tag, are shared after a round trip through `pickle`.
+
+        Parameters
+        ----------
+        create_using : type, optional
+            The `networkx` graph type to create, by default `nx.DiGraph`, or a `KnowledgeGraph` whose category index and collapsed memberships are restored.
+
+        Returns
+        -------
+        nx.DiGraph
+            The graph with the same nodes, edges, and attributes in the same order.
+        """
+
+        G = create_using()
+        G.add_nodes_from((node, self.node_data(i)) for i, node in enumerate(self.nodes))
+        G.add_edges_from(
+            (u, v, {} if relation is None else {'relation': relation})
+            for u, v, relation in self.edges()
+        )
+        if isinstance(G, KnowledgeGraph):
+            G.categories = {
+                category: dict.fromkeys(self.nodes[i] for i in ids.tolist())
+                for category, ids in self.categories.items()
+            }
+            collapsed = np.flatnonzero(self.memberships != MISSING)
+            G.memberships = dict(zip(
+                (self.nodes[i] for i in collapsed.tolist()),
+                self.memberships[collapsed].tolist(),
+            ))
+
+        return G
+
+# -----------------------------------------------------------------------------
+# BENCHMARK
+# -----------------------------------------------------------------------------
+
+
+def synthetic_kg(n_diseases: int, seed: int = 1234) -> tuple:
+    """Generates the nodes and edges of a synthetic knowledge graph shaped like the disease knowledge graphs.
+
+    Each disease has a gene, an inheritance mode, and ten phenotypes drawn from a pool of phenotypes, and every individual is linked to its category supernode with an `is_a` edge.
+
+    Parameters
+    ----------
+    n_diseases : int
+        The number of diseases.
+    seed : int, optional
+        The seed of the random phenotype assignment, by default 1234.
+
+    Returns
+    -------
+    tuple
+        The `(node, attribute dict)` pairs of the nodes and the `(source, relation, target)` triples of the edges.
+    """
+
+    rng = np.random.default_rng(seed)
+    n_genes = max(1, n_diseases // 2)
+    n_phenotypes = max(10, n_diseases)
+    nodes = [(c, {'category': c, 'class_type': 'class'}) for c in ('disease', 'gene', 'inheritance', 'phenotype')]
+    nodes += [(f"disease_{i}", {'category': 'disease', 'MIM': 100000 + i, 'class_type': 'individual'}) for i in range(n_diseases)]
+    nodes += [(f"gene_{i}", {'category': 'gene', 'MIM': 600000 + i, 'class_type': 'individual'}) for i in range(n_genes)]
+    nodes += [(m, {'category': 'inheritance', 'class_type': 'individual'}) for m in ('AD', 'AR', 'XLD', 'XLR')]
+    nodes += [(f"HP_{i}", {'category': 'phenotype', 'hpo_id': f"HP:{i:07d}", 'class_type': 'individual'}) for i in range(n_phenotypes)]
+
+    edges = [(node, 'is_a', attributes['category']) for node, attributes in nodes if attributes['class_type'] == 'individual']
+    genes = rng.integers(n_genes, size=n_diseases).tolist()
+    modes = rng.integers(4, size=n_diseases).tolist()
+    phenotypes = rng.integers(n_phenotypes, size=(n_diseases, 10)).tolist()
+    for i in range(n_diseases):
+        edges.append((f"disease_{i}", 'is_caused_by', f"gene_{genes[i]}"))
+        edges.append((f"disease_{i}", 'inherited_by', ('AD', 'AR', 'XLD', 'XLR')[modes[i]]))
+        edges.extend((f"disease_{i}", 'has_a_phenotype', f"HP_{j}") for j in phenotypes[i])
+
+    return nodes, edges
+
+
+def measure(build) -> tuple:
+    """Measures the wall time and traced memory of building a graph.
+
+    Parameters
+    ----------
+    build : Callable[[], Any]
+        The function building the graph.
+
+    Returns
+    -------
+    tuple
+        The built graph, the build time in seconds, and the memory in bytes still allocated by the build.
+    """
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    graph = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return graph, elapsed, current
+
+
+def benchmark(n_diseases: int) -> dict:
+    """Benchmarks the build time and memory of a `networkx.DiGraph` and a `CompactGraph` on the same synthetic knowledge graph.
+
+    Parameters
+    ----------
+    n_diseases : int
+        The number of diseases of the synthetic knowledge graph.
+
+    Returns
+    -------
+    dict
+        The number of nodes and edges and the build time and memory of each store.
+    """
+
+    nodes, edges = synthetic_kg(n_diseases)
+
+    def build_networkx():
+        G = nx.DiGraph()
+        G.add_nodes_from(nodes)
+        G.add_edges_from((u, v, {'relation': r}) for u, r, v in edges)
+        return G
+
+    G, nx_time, nx_memory = measure(build_networkx)
+    graph, compact_time, compact_memory = measure(lambda: CompactGraph.from_edges(edges, nodes))
+
+    return {
+        "nodes": G.number_of_nodes(),
+        "edges": G.number_of_edges(),
+        "networkx_time": nx_time,
+        "networkx_memory": nx_memory,
+        "compact_time": compact_time,
+        "compact_memory": compact_memory,
+    }
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='compact.py',
+        description='Benchmarks the compact knowledge graph store against networkx on synthetic knowledge graphs.',
+    )
+    parser.add_argument(
+        'sizes',
+        nargs='*',
+        type=int,
+        default=[1000, 10000, 100000],
+        help='the numbers of diseases of the synthetic knowledge graphs',
+    )
+    args = parser.parse_args()
+
+    print(f"{'diseases':>10} {'nodes':>10} {'edges':>10} {'nx s':>8} {'nx MB':>8} {'compact s':>10} {'compact MB':>11}")
+    for size in args.sizes:
+        result = benchmark(size)
+        print(
+            f"{size:>10} {result['nodes']:>10} {result['edges']:>10} "
+            f"{result['networkx_time']:>8.3f} {result['networkx_memory'] / 1e6:>8.1f} "
+            f"{result['compact_time']:>10.3f} {result['compact_memory'] / 1e6:>11.1f}"
+        )
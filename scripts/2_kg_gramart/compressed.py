@@ -0,0 +1,237 @@
+"""
+    compressed.py
+
+# Description
+Streaming compressed files for the verbose XML and RDF exports of the `2_kg_gramart` knowledge graphs.
+
+The codec of an output file follows its extension, `.gz` for gzip and `.zst` for zstd, and data is compressed as it is written, so that the uncompressed document is never held in memory.
+Inputs are opened by their magic bytes instead, so that the readers open plain and compressed files alike.
+The zstd codec requires the optional `zstandard` package.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import gzip
+import io
+from pathlib import Path
+from typing import IO
+
+import networkx as nx
+from rdflib import Graph
+
+# zstd is optional
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The file extension of each codec
+CODECS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+# The magic bytes at the start of the files of each codec
+MAGIC = {
+    'gzip': b"\x1f\x8b",
+    'zstd': b"\x28\xb5\x2f\xfd",
+}
+
+# The compression levels, trading some size for a much faster write than the gzip default of 9
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# The size of the write buffer of uncompressed files
+WRITE_BUFFER = 1 << 20
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def available_codecs() -> list:
+    """Lists the codecs that can be used in this environment.
+
+    Returns
+    -------
+    list
+        The names of the codecs in `CODECS` whose libraries are installed.
+    """
+
+    return [codec for codec in CODECS if codec != 'zstd' or zstandard is not None]
+
+
+def require_zstd() -> None:
+    """Raises an `ImportError` if the optional `zstandard` package is missing."""
+    if zstandard is None:
+        raise ImportError("The zstd codec requires the zstandard package, e.g., `pip install zstandard`")
+
+
+def compressed_name(name: str, codec: str = None) -> str:
+    """Gets the file name of an export compressed with a codec.
+
+    Parameters
+    ----------
+    name : str
+        The file name of the uncompressed export.
+    codec : str, optional
+        The codec, one of `CODECS`, or None for no compression.
+
+    Returns
+    -------
+    str
+        The file name with the extension of the codec appended.
+    """
+
+    return name if codec is None else f"{name}{CODECS[codec]}"
+
+
+def split_codec(name: str) -> tuple:
+    """Splits the codec extension from a file name.
+
+    Parameters
+    ----------
+    name : str
+        The file name, which may end in the extension of one of `CODECS`.
+
+    Returns
+    -------
+    tuple
+        The file name without the codec extension and the codec, or None if the file is not compressed.
+    """
+
+    for codec, suffix in CODECS.items():
+        if name.endswith(suffix):
+            return name[:-len(suffix)], codec
+
+    return name, None
+
+
+def detect_codec(file: Path) -> str:
+    """Detects the codec of a file from its magic bytes.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the file.
+
+    Returns
+    -------
+    str
+        The codec of the file, or None if it is not compressed.
+    """
+
+    with open(file, 'rb') as f:
+        head = f.read(max(len(magic) for magic in MAGIC.values()))
+
+    return next((codec for codec, magic in MAGIC.items() if head.startswith(magic)), None)
+
+
+def open_output(file: Path, mode: str = 'wb') -> IO:
+    """Opens a file for writing, compressing its contents as they are written with the codec of its extension.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the output file, compressed if it ends in the extension of one of `CODECS`.
+    mode : str, optional
+        Either 'wb' for a binary stream or 'w' for a UTF-8 text stream, by default 'wb'.
+
+    Returns
+    -------
+    IO
+        The writable stream, which must be closed to finish the file.
+    """
+
+    _, codec = split_codec(Path(file).name)
+    if codec == 'gzip':
+        stream = gzip.open(file, 'wb', compresslevel=GZIP_LEVEL)
+    elif codec == 'zstd':
+        require_zstd()
+        stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(file, 'wb'), closefd=True)
+    else:
+        stream = open(file, 'wb', buffering=WRITE_BUFFER)
+
+    return io.TextIOWrapper(stream, encoding='utf-8') if mode == 'w' else stream
+
+
+def open_input(file: Path, mode: str = 'rb') -> IO:
+    """Opens a plain or compressed file for reading, detecting its codec from its contents.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the input file.
+    mode : str, optional
+        Either 'rb' for a binary stream or 'r' for a UTF-8 text stream, by default 'rb'.
+
+    Returns
+    -------
+    IO
+        The readable stream of the uncompressed contents.
+    """
+
+    codec = detect_codec(file)
+    if codec == 'gzip':
+        stream = gzip.open(file, 'rb')
+    elif codec == 'zstd':
+        require_zstd()
+        stream = zstandard.ZstdDecompressor().stream_reader(open(file, 'rb'), closefd=True)
+    else:
+        stream = open(file, 'rb')
+
+    return io.TextIOWrapper(stream, encoding='utf-8') if mode == 'r' else stream
+
+
+def read_graphml(file: Path) -> nx.DiGraph:
+    """Reads a plain or compressed GraphML export.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the GraphML file.
+
+    Returns
+    -------
+    nx.DiGraph
+        The graph of the file.
+    """
+
+    with open_input(file) as f:
+        return nx.read_graphml(f)
+
+
+def read_rdf(file: Path, format: str = None) -> Graph:
+    """Reads a plain or compressed RDF export.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the RDF file.
+    format : str, optional
+        The `rdflib` format of the file, by default guessed from its extension without the codec, e.g., 'xml' for `rdf.owl.gz`.
+
+    Returns
+    -------
+    Graph
+        The RDF graph of the file.
+    """
+
+    if format is None:
+        name, _ = split_codec(Path(file).name)
+        format = {'.nt': 'nt', '.ttl': 'turtle'}.get(Path(name).suffix, 'xml')
+
+    g = Graph()
+    with open_input(file) as f:
+        g.parse(f, format=format)
+
+    return g
@@ -0,0 +1,516 @@
+"""
+    database.py
+
+# Description
+An on-disk SQLite backend for the `2_kg_gramart` knowledge graphs, for graphs larger than memory.
+
+A `GraphWriter` takes the place of a `KnowledgeGraph` in `kg.build_kg`, and writes each node, edge, data property, and category index entry to an indexed SQLite database as it is added.
+Repeated nodes and edges are merged the same way as in `networkx`.
+Only a bounded cache of node ids is kept in memory, so the graph is never held in memory while it is built.
+`write_database` writes a graph that is already in memory the same way, and a `GraphDatabase` opens a database read-only behind the parts of the `networkx` interface that the exporters use.
+The node and edge views iterate with database cursors in the order of the original graph, so that the exports stream out of the database, and nodes and their neighborhoods are looked up through the indexes.
+`1_kg_gen.py --database` builds each rebuilt graph straight into `knowledge_graph.sqlite` in its results folder and streams the other exports out of it.
+
+Node labels and attribute values keep their SQLite types, where a missing `float('nan')` label or value is stored as NULL and a `None` value as an empty BLOB, and each edge holds at most a `relation` attribute.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import math
+import sqlite3
+from collections.abc import Mapping
+from functools import lru_cache
+from itertools import groupby
+from pathlib import Path
+from typing import Iterator
+
+import networkx as nx
+
+# Local imports
+from graph import (
+    category_index,
+    iter_edges,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The name of the database in each results folder
+DATABASE_FILE = 'knowledge_graph.sqlite'
+
+# The tables of the database, where the nodes and edges keep the order of the graph in their ids and positions
+SCHEMA = """
+CREATE TABLE nodes (
+    id INTEGER PRIMARY KEY,
+    name
+);
+CREATE TABLE node_attributes (
+    node INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value,
+    PRIMARY KEY (node, position)
+) WITHOUT ROWID;
+CREATE TABLE edges (
+    id INTEGER PRIMARY KEY,
+    source INTEGER NOT NULL,
+    target INTEGER NOT NULL,
+    relation TEXT
+);
+CREATE TABLE categories (
+    category TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    node INTEGER NOT NULL,
+    PRIMARY KEY (category, position)
+) WITHOUT ROWID;
+"""
+
+# The indexes of the lookups while the graph is written, which merge repeated nodes, attributes, edges, and category entries
+WRITE_INDEXES = """
+CREATE UNIQUE INDEX nodes_name ON nodes (name);
+CREATE UNIQUE INDEX node_attributes_key ON node_attributes (node, key);
+CREATE UNIQUE INDEX edges_pair ON edges (source, target);
+CREATE UNIQUE INDEX categories_node ON categories (node);
+"""
+
+# The indexes of the neighborhoods, created after the bulk insert
+INDEXES = """
+CREATE INDEX edges_source ON edges (source, id);
+CREATE INDEX edges_target ON edges (target, id);
+"""
+
+# The number of node ids and attribute dicts kept in memory for repeated lookups
+NODE_CACHE = 1 << 16
+
+# The stand-in for the NULL labels and values, one object so that it can be looked up in dicts
+NAN = float('nan')
+
+# The stored `None` values, which are told apart from the NULL of the missing values
+NONE = b''
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def encode(value):
+    """Converts a node label or attribute value to a SQLite value, with NULL for `float('nan')` and `NONE` for None."""
+    if value is None:
+        return NONE
+    if isinstance(value, bytes):
+        raise ValueError(f"Byte strings cannot be stored in the database: {value!r}")
+    if isinstance(value, float) and math.isnan(value):
+        return None
+
+    # Unwrap numpy scalars
+    return value.item() if hasattr(value, 'item') else value
+
+
+def decode(value):
+    """Converts a SQLite value back to a node label or attribute value, with `NAN` for NULL and None for `NONE`."""
+    if value is None:
+        return NAN
+
+    return None if value == NONE else value
+
+
+def write_database(G: nx.DiGraph, file: Path) -> None:
+    """Writes the nodes, edges, data properties, and category index of a knowledge graph in memory to a new SQLite database.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph, whose edges hold at most a `relation` attribute.
+    file : Path
+        The location of the database, which must not exist yet.
+    """
+
+    with GraphWriter(file, index=False) as writer:
+        writer.add_nodes_from(G.nodes.data())
+        writer.add_edges_from(iter_edges(G))
+        # The category index of the graph keeps the order that its nodes were indexed in
+        writer.connection.executemany(
+            "INSERT INTO categories VALUES (?, ?, ?)",
+            (
+                (category, position, writer.node_id(node))
+                for category, nodes in category_index(G).items()
+                for position, node in enumerate(nodes)
+            ),
+        )
+        writer.finish()
+
+
+# -----------------------------------------------------------------------------
+# CLASSES
+# -----------------------------------------------------------------------------
+
+
+class GraphWriter:
+    """A knowledge graph that is written to a new SQLite database as its nodes and edges are added, like a `KnowledgeGraph`.
+
+    Repeated nodes keep their ids and update their attributes in place, repeated edges keep their ids and update their relations, and a node moves to the end of the category index when its `category` attribute changes.
+    The database is only complete once `finish` creates the indexes of the neighborhoods and commits it.
+
+    Attributes
+    ----------
+    file : Path
+        The location of the database.
+    connection : sqlite3.Connection
+        The connection to the database.
+    index : bool
+        If true, the `category` attributes of the added nodes are indexed.
+    """
+
+    def __init__(self, file: Path, index: bool = True):
+        self.file = Path(file)
+        self.index = index
+        self.connection = sqlite3.connect(self.file)
+        # The database is written once from scratch, so the rollback journal is not needed
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.executescript(SCHEMA)
+        self.connection.executescript(WRITE_INDEXES)
+        # The ids of the recently added nodes, which is cleared when it is full so that memory stays bounded
+        self._ids = {}
+
+    def __enter__(self) -> "GraphWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the connection to the database, discarding it if it was not finished."""
+        self.connection.close()
+
+    def finish(self) -> None:
+        """Creates the indexes of the neighborhoods and commits the database."""
+        self.connection.executescript(INDEXES)
+        self.connection.commit()
+
+    def number_of_nodes(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def number_of_edges(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+    def node_id(self, node, create: bool = False) -> int:
+        """Looks up the id of a node by its label.
+
+        Parameters
+        ----------
+        node : Any
+            The label of the node.
+        create : bool, optional
+            If true, adds the node without attributes if it is new, by default False.
+
+        Returns
+        -------
+        int
+            The id of the node, or None if there is no such node and it is not created.
+        """
+
+        name = encode(node)
+        node_id = self._ids.get(name)
+        if node_id is None:
+            row = self.connection.execute("SELECT id FROM nodes WHERE name IS ?", (name,)).fetchone()
+            if row is not None:
+                node_id = row[0]
+            elif create:
+                node_id = self.connection.execute("INSERT INTO nodes (name) VALUES (?)", (name,)).lastrowid
+            else:
+                return None
+            if len(self._ids) >= NODE_CACHE:
+                self._ids.clear()
+            self._ids[name] = node_id
+
+        return node_id
+
+    def add_node(self, node_for_adding, **attr) -> None:
+        """Adds a node or updates its attributes, like `networkx.DiGraph.add_node`."""
+        node_id = self.node_id(node_for_adding, create=True)
+        if not attr:
+            return
+
+        db = self.connection
+        position = db.execute("SELECT COUNT(*) FROM node_attributes WHERE node = ?", (node_id,)).fetchone()[0]
+        for key, value in attr.items():
+            # An existing attribute keeps its position, and a new one follows the others
+            if not db.execute("UPDATE node_attributes SET value = ? WHERE node = ? AND key = ?", (encode(value), node_id, key)).rowcount:
+                db.execute("INSERT INTO node_attributes VALUES (?, ?, ?, ?)", (node_id, position, key, encode(value)))
+                position += 1
+
+        category = attr.get('category', 0)
+        if self.index and category != 0:
+            row = db.execute("SELECT category FROM categories WHERE node = ?", (node_id,)).fetchone()
+            if row is None or row[0] != category:
+                db.execute("DELETE FROM categories WHERE node = ?", (node_id,))
+                db.execute(
+                    "INSERT INTO categories SELECT ?, COALESCE(MAX(position) + 1, 0), ? FROM categories WHERE category = ?",
+                    (category, node_id, category),
+                )
+
+    def add_nodes_from(self, nodes_for_adding, **attr) -> None:
+        """Adds nodes or `(node, attribute dict)` pairs, like `networkx.DiGraph.add_nodes_from`."""
+        for n in nodes_for_adding:
+            # Follow `networkx` in telling `(node, attribute dict)` pairs from plain nodes
+            try:
+                hash(n)
+                self.add_node(n, **attr)
+            except TypeError:
+                n, data = n
+                self.add_node(n, **{**attr, **data})
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr) -> None:
+        """Adds an edge or updates its relation, like `networkx.DiGraph.add_edge`."""
+        if set(attr) - {'relation'}:
+            raise ValueError(f"The edge {(u_of_edge, v_of_edge)} has attributes other than a relation: {attr}")
+        source = self.node_id(u_of_edge, create=True)
+        target = self.node_id(v_of_edge, create=True)
+        self.connection.execute(
+            "INSERT INTO edges (source, target, relation) VALUES (?, ?, ?) "
+            "ON CONFLICT (source, target) DO UPDATE SET relation = COALESCE(excluded.relation, relation)",
+            (source, target, attr.get('relation')),
+        )
+
+    def add_edges_from(self, ebunch_to_add, **attr) -> None:
+        """Adds `(u, v)` or `(u, v, attribute dict)` edges, like `networkx.DiGraph.add_edges_from`."""
+        for e in ebunch_to_add:
+            if len(e) == 3:
+                u, v, dd = e
+            elif len(e) == 2:
+                u, v = e
+                dd = {}
+            else:
+                raise nx.NetworkXError(f"Edge tuple {e} must be a 2-tuple or 3-tuple.")
+            self.add_edge(u, v, **{**attr, **dd})
+
+
+class NodeView:
+    """The nodes of a `GraphDatabase`, looked up and iterated like `networkx.DiGraph.nodes`."""
+
+    def __init__(self, database: "GraphDatabase"):
+        self._database = database
+        self._attributes = lru_cache(maxsize=NODE_CACHE)(self._lookup)
+
+    def _lookup(self, node) -> dict:
+        """Reads the attributes of a node through the index of the node labels."""
+        rows = self._database.connection.execute(
+            "SELECT a.key, a.value FROM nodes n JOIN node_attributes a ON a.node = n.id "
+            "WHERE n.name IS ? ORDER BY a.position",
+            (encode(node),),
+        ).fetchall()
+        if not rows and node not in self:
+            raise KeyError(node)
+
+        return {key: decode(value) for key, value in rows}
+
+    def __getitem__(self, node) -> dict:
+        # A copy, so that the cached attributes cannot be modified
+        return dict(self._attributes(node))
+
+    def __contains__(self, node) -> bool:
+        return self._database.node_id(node) is not None
+
+    def __iter__(self) -> Iterator:
+        for (name,) in self._database.connection.execute("SELECT name FROM nodes ORDER BY id"):
+            yield decode(name)
+
+    def __len__(self) -> int:
+        return self._database.number_of_nodes()
+
+    def data(self) -> Iterator[tuple]:
+        """Iterates over the nodes and their attribute dicts in the order of the graph.
+
+        Yields
+        ------
+        tuple
+            Each node and the dict of its attributes.
+        """
+
+        rows = self._database.connection.execute(
+            "SELECT n.id, n.name, a.key, a.value FROM nodes n LEFT JOIN node_attributes a ON a.node = n.id "
+            "ORDER BY n.id, a.position"
+        )
+        for _, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            yield decode(group[0][1]), {key: decode(value) for _, _, key, value in group if key is not None}
+
+
+class EdgeView:
+    """The edges of a `GraphDatabase`, iterated like `networkx.DiGraph.edges`."""
+
+    # The edges with the labels of their nodes, in the order of the graph
+    QUERY = (
+        "SELECT s.name, t.name, e.relation FROM edges e "
+        "JOIN nodes s ON s.id = e.source JOIN nodes t ON t.id = e.target"
+    )
+
+    def __init__(self, database: "GraphDatabase"):
+        self._database = database
+
+    def __iter__(self) -> Iterator[tuple]:
+        for u, v, _ in self.data():
+            yield u, v
+
+    def __len__(self) -> int:
+        return self._database.number_of_edges()
+
+    def data(self) -> Iterator[tuple]:
+        """Iterates over the edges and their attribute dicts in the order of the graph.
+
+        Yields
+        ------
+        tuple
+            The source, target, and attribute dict of each edge.
+        """
+
+        yield from self._database.edge_rows(f"{self.QUERY} ORDER BY e.source, e.id")
+
+
+class CategoryIndex(Mapping):
+    """The category index of a `GraphDatabase`, which lists the nodes of each category like `KnowledgeGraph.categories`."""
+
+    def __init__(self, database: "GraphDatabase"):
+        self._database = database
+
+    def __getitem__(self, category: str) -> list:
+        nodes = [
+            decode(name)
+            for (name,) in self._database.connection.execute(
+                "SELECT n.name FROM categories c JOIN nodes n ON n.id = c.node "
+                "WHERE c.category = ? ORDER BY c.position",
+                (category,),
+            )
+        ]
+        if not nodes:
+            raise KeyError(category)
+
+        return nodes
+
+    def __iter__(self) -> Iterator[str]:
+        for (category,) in self._database.connection.execute("SELECT DISTINCT category FROM categories"):
+            yield category
+
+    def __len__(self) -> int:
+        return self._database.connection.execute("SELECT COUNT(DISTINCT category) FROM categories").fetchone()[0]
+
+
+class GraphDatabase:
+    """A read-only knowledge graph in a SQLite database written by `write_database`.
+
+    Attributes
+    ----------
+    file : Path
+        The location of the database.
+    connection : sqlite3.Connection
+        The read-only connection to the database.
+    nodes : NodeView
+        The nodes and their attributes.
+    edges : EdgeView
+        The edges and their relations.
+    categories : CategoryIndex
+        The nodes of each category in the order of the category index of the graph.
+    """
+
+    def __init__(self, file: Path):
+        self.file = Path(file)
+        self.connection = sqlite3.connect(f"{self.file.resolve().as_uri()}?mode=ro", uri=True)
+        self.nodes = NodeView(self)
+        self.edges = EdgeView(self)
+        self.categories = CategoryIndex(self)
+
+    def __enter__(self) -> "GraphDatabase":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the connection to the database."""
+        self.connection.close()
+
+    def __iter__(self) -> Iterator:
+        return iter(self.nodes)
+
+    def __len__(self) -> int:
+        return self.number_of_nodes()
+
+    def to_networkx(self) -> nx.DiGraph:
+        """Loads the whole graph into a `networkx.DiGraph`, such as for drawing a small graph."""
+        G = nx.DiGraph()
+        G.add_nodes_from(self.nodes.data())
+        G.add_edges_from(self.edges.data())
+
+        return G
+
+    def number_of_nodes(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def number_of_edges(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+
+    def node_id(self, node) -> int:
+        """Looks up the id of a node by its label, or None if there is no such node."""
+        row = self.connection.execute("SELECT id FROM nodes WHERE name IS ?", (encode(node),)).fetchone()
+
+        return None if row is None else row[0]
+
+    def edge_rows(self, query: str, parameters: tuple = ()) -> Iterator[tuple]:
+        """Streams the edges selected by a query of `EdgeView.QUERY` as `(source, target, attribute dict)` tuples."""
+        for u, v, relation in self.connection.execute(query, parameters):
+            yield decode(u), decode(v), {} if relation is None else {'relation': relation}
+
+    def out_edges(self, node) -> Iterator[tuple]:
+        """Iterates over the edges from a node through the index of the edge sources.
+
+        Parameters
+        ----------
+        node : Any
+            The label of the node.
+
+        Yields
+        ------
+        tuple
+            The source, target, and attribute dict of each edge in the order of the graph.
+        """
+
+        node_id = self.node_id(node)
+        if node_id is None:
+            raise KeyError(node)
+        yield from self.edge_rows(f"{EdgeView.QUERY} WHERE e.source = ? ORDER BY e.id", (node_id,))
+
+    def in_edges(self, node) -> Iterator[tuple]:
+        """Iterates over the edges to a node through the index of the edge targets.
+
+        Parameters
+        ----------
+        node : Any
+            The label of the node.
+
+        Yields
+        ------
+        tuple
+            The source, target, and attribute dict of each edge in the order that the edges were added.
+        """
+
+        node_id = self.node_id(node)
+        if node_id is None:
+            raise KeyError(node)
+        yield from self.edge_rows(f"{EdgeView.QUERY} WHERE e.target = ? ORDER BY e.id", (node_id,))
+
+    def successors(self, node) -> Iterator:
+        """Iterates over the targets of the edges from a node, like `networkx.DiGraph.successors`."""
+        for _, v, _ in self.out_edges(node):
+            yield v
+
+    def predecessors(self, node) -> Iterator:
+        """Iterates over the sources of the edges to a node, like `networkx.DiGraph.predecessors`."""
+        for u, _, _ in self.in_edges(node):
+            yield u
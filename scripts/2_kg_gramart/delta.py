@@ -0,0 +1,363 @@
+"""
+    delta.py
+
+# Description
+The difference between the statements of two builds of a `2_kg_gramart` knowledge graph, so that downstream training can consume only the changes.
+
+The statements of each build are read from its binary triple file `edge_attributes_lerche.bin` or its `edge_attributes_lerche.txt`, and brought to a canonical form with a sorted symbol table and the triples sorted by their symbol ids.
+The symbol tables of both builds are then merged, and the added and removed statements and nodes are found by a single sort-merge pass over the sorted triples.
+Canonical triple files written with `--canonical` skip the sorting, so that the difference between two of them takes linear time.
+
+The delta file holds one change per line, in the quoted form of `edge_attributes_lerche.txt` with a leading `+` or `-` for an added or removed statement or node:
+
+```
++ "Disease_1" "has_a_phenotype" "Seizure"
+- "Ataxia"
+```
+
+Run this file with two results folders or statement files, e.g., `python scripts/2_kg_gramart/delta.py <old results> <new results>`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+from pathlib import Path
+from typing import (
+    Iterable,
+    Iterator,
+)
+
+import numpy as np
+
+# Local imports
+from export import (
+    LERCHE_EDGE_ATTRIBUTES,
+    LERCHE_TRIPLES,
+)
+from triples import (
+    QUOTED,
+    intern_triples,
+    quote,
+    read_lerche,
+    read_triples,
+    unquote,
+    write_triples,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The name of the delta file written next to the new statements by default
+DELTA_FILE = 'delta.txt'
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def statements_file(path: Path) -> Path:
+    """Finds the statements of a build.
+
+    Parameters
+    ----------
+    path : Path
+        A statement file, or a results folder holding `edge_attributes_lerche.bin` or `edge_attributes_lerche.txt`.
+
+    Returns
+    -------
+    Path
+        The statement file, preferring the binary triple file of a results folder.
+    """
+
+    path = Path(path)
+    if not path.is_dir():
+        return path
+    for name in (LERCHE_TRIPLES, LERCHE_EDGE_ATTRIBUTES):
+        if path.joinpath(name).exists():
+            return path.joinpath(name)
+
+    raise FileNotFoundError(f"{path} holds neither {LERCHE_TRIPLES} nor {LERCHE_EDGE_ATTRIBUTES}")
+
+
+def load_statements(path: Path) -> tuple:
+    """Loads the statements of a build in canonical form.
+
+    Parameters
+    ----------
+    path : Path
+        A binary triple file, an `edge_attributes_lerche.txt` file, or a results folder holding either.
+
+    Returns
+    -------
+    tuple
+        The sorted symbols and the sorted unique `m x 3` `int32` array of the triples, see `canonical`.
+    """
+
+    file = statements_file(path)
+    if file.suffix == '.txt':
+        symbols, triples = intern_triples(read_lerche(file))
+    else:
+        symbols, triples = read_triples(file, mmap=False)
+
+    return canonical(symbols, triples)
+
+
+def is_sorted(rows: np.ndarray) -> bool:
+    """Checks if the rows of an integer array are in strictly increasing lexicographic order.
+
+    Parameters
+    ----------
+    rows : np.ndarray
+        The `m x k` integer array.
+
+    Returns
+    -------
+    bool
+        True if every row is lexicographically greater than the row before it.
+    """
+
+    if len(rows) < 2:
+        return True
+    previous, current = rows[:-1], rows[1:]
+    # The first column where each pair of consecutive rows differs decides their order
+    differs = previous != current
+    first = differs.argmax(axis=1)
+    index = np.arange(len(first))
+
+    return bool(differs.any(axis=1).all() and (current[index, first] > previous[index, first]).all())
+
+
+def canonical(symbols: list, triples: np.ndarray) -> tuple:
+    """Brings a symbol table and its triples to canonical form.
+
+    In canonical form, the symbols are sorted and unique, and the triples are unique and sorted by the ids of their subjects, predicates, and objects, which is also the order of their strings.
+    Triples that are already canonical are returned as they are after a linear check.
+
+    Parameters
+    ----------
+    symbols : list
+        The symbols.
+    triples : np.ndarray
+        The `m x 3` array of the symbol ids of each triple.
+
+    Returns
+    -------
+    tuple
+        The canonical symbols and `m x 3` `int32` array of triples.
+    """
+
+    triples = np.asarray(triples, dtype=np.int32).reshape(-1, 3)
+    if all(a < b for a, b in zip(symbols, symbols[1:])) and is_sorted(triples):
+        return symbols, triples
+
+    order = sorted(range(len(symbols)), key=symbols.__getitem__)
+    rank = np.empty(len(symbols), dtype=np.int32)
+    rank[order] = np.arange(len(symbols), dtype=np.int32)
+    triples = np.unique(rank[triples], axis=0) if len(triples) else triples
+
+    return [symbols[i] for i in order], triples
+
+
+def sort_merge(old: Iterable, new: Iterable) -> Iterator[tuple]:
+    """Compares two sorted sequences of unique items in one pass.
+
+    Parameters
+    ----------
+    old : Iterable
+        The items of the old sequence in increasing order.
+    new : Iterable
+        The items of the new sequence in increasing order.
+
+    Yields
+    ------
+    tuple
+        `('-', item)` for each item only in `old` and `('+', item)` for each item only in `new`, in increasing order.
+    """
+
+    old, new = iter(old), iter(new)
+    a, b = next(old, None), next(new, None)
+    while a is not None and b is not None:
+        if a < b:
+            yield '-', a
+            a = next(old, None)
+        elif b < a:
+            yield '+', b
+            b = next(new, None)
+        else:
+            a, b = next(old, None), next(new, None)
+    while a is not None:
+        yield '-', a
+        a = next(old, None)
+    while b is not None:
+        yield '+', b
+        b = next(new, None)
+
+
+def merge_symbols(old: list, new: list) -> tuple:
+    """Merges two sorted symbol tables.
+
+    Parameters
+    ----------
+    old : list
+        The sorted unique symbols of the old build.
+    new : list
+        The sorted unique symbols of the new build.
+
+    Returns
+    -------
+    tuple
+        The sorted union of the symbols and the `int32` arrays of the ids in the union of the symbols of each build.
+    """
+
+    union = []
+    old_ids = np.empty(len(old), dtype=np.int32)
+    new_ids = np.empty(len(new), dtype=np.int32)
+    i = j = 0
+    while i < len(old) or j < len(new):
+        if j == len(new) or (i < len(old) and old[i] < new[j]):
+            old_ids[i] = len(union)
+            union.append(old[i])
+            i += 1
+        elif i == len(old) or new[j] < old[i]:
+            new_ids[j] = len(union)
+            union.append(new[j])
+            j += 1
+        else:
+            old_ids[i] = new_ids[j] = len(union)
+            union.append(old[i])
+            i += 1
+            j += 1
+
+    return union, old_ids, new_ids
+
+
+def compute_delta(old: tuple, new: tuple) -> dict:
+    """Computes the added and removed statements and nodes between two builds.
+
+    Parameters
+    ----------
+    old : tuple
+        The canonical symbols and triples of the old build, see `load_statements`.
+    new : tuple
+        The canonical symbols and triples of the new build.
+
+    Returns
+    -------
+    dict
+        The sorted `added` and `removed` statements, as `(subject, predicate, object)` strings, and the sorted `added_nodes` and `removed_nodes`, the subjects and objects of only one of the builds.
+    """
+
+    symbols, old_ids, new_ids = merge_symbols(old[0], new[0])
+    # The merged ids keep the order of each symbol table, so the remapped triples stay sorted
+    old_triples, new_triples = old_ids[old[1]], new_ids[new[1]]
+
+    delta = {"added": [], "removed": [], "added_nodes": [], "removed_nodes": []}
+    for op, (s, p, o) in sort_merge(map(tuple, old_triples.tolist()), map(tuple, new_triples.tolist())):
+        delta["added" if op == '+' else "removed"].append((symbols[s], symbols[p], symbols[o]))
+
+    def nodes(triples):
+        return np.unique(triples[:, [0, 2]]).tolist()
+
+    for op, node in sort_merge(nodes(old_triples), nodes(new_triples)):
+        delta["added_nodes" if op == '+' else "removed_nodes"].append(symbols[node])
+
+    return delta
+
+
+def write_delta(delta: dict, file: Path) -> None:
+    """Writes the changes of a delta to a delta file, nodes first.
+
+    Parameters
+    ----------
+    delta : dict
+        The delta from `compute_delta`.
+    file : Path
+        The location of the delta file.
+    """
+
+    with open(file, 'w') as f:
+        for op, key in (('-', "removed_nodes"), ('+', "added_nodes")):
+            for node in delta[key]:
+                f.write(f"{op} {quote(node)}\n")
+        for op, key in (('-', "removed"), ('+', "added")):
+            for statement in delta[key]:
+                f.write(f"{op} {' '.join(quote(term) for term in statement)}\n")
+
+
+def read_delta(file: Path) -> dict:
+    """Reads a delta file.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the delta file.
+
+    Returns
+    -------
+    dict
+        The delta in the form of `compute_delta`.
+    """
+
+    delta = {"added": [], "removed": [], "added_nodes": [], "removed_nodes": []}
+    with open(file) as f:
+        for line in f:
+            terms = tuple(unquote(term) for term in QUOTED.findall(line))
+            key = "added" if line.startswith('+') else "removed"
+            if len(terms) == 1:
+                delta[f"{key}_nodes"].append(terms[0])
+            elif len(terms) == 3:
+                delta[key].append(terms)
+            else:
+                raise ValueError(f"Malformed change in {file}: {line!r}")
+
+    return delta
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='delta.py',
+        description='Writes the added and removed statements and nodes between the statements of two knowledge graph builds.',
+    )
+    parser.add_argument('old', type=Path, help='the old results folder, binary triple file, or edge_attributes_lerche.txt')
+    parser.add_argument('new', type=Path, nargs='?', help='the new results folder, binary triple file, or edge_attributes_lerche.txt')
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        default=None,
+        help=f'the delta file, by default {DELTA_FILE} next to the new statements',
+    )
+    parser.add_argument(
+        '--canonical',
+        type=Path,
+        default=None,
+        help='instead write the statements of old in canonical form to this binary triple file, which later deltas read without sorting',
+    )
+    args = parser.parse_args()
+
+    if args.canonical is not None:
+        symbols, triples = load_statements(args.old)
+        write_triples(args.canonical, symbols, triples)
+        print(f"{len(triples)} canonical statements written to {args.canonical}")
+        parser.exit()
+    if args.new is None:
+        parser.error("the new statements are required unless writing --canonical statements")
+
+    delta = compute_delta(load_statements(args.old), load_statements(args.new))
+    output = args.output
+    if output is None:
+        output = (args.new if args.new.is_dir() else args.new.parent).joinpath(DELTA_FILE)
+    write_delta(delta, output)
+    print(
+        f"{len(delta['added'])} added and {len(delta['removed'])} removed statements, "
+        f"{len(delta['added_nodes'])} added and {len(delta['removed_nodes'])} removed nodes written to {output}"
+    )
@@ -0,0 +1,733 @@
+"""
+    export.py
+
+# Description
+The knowledge graph exporters used by `1_kg_gen.py` in the `2_kg_gramart` experiment.
+
+# Authors
+- Dr. Daniel Hier <dbhier@dbhier.com>
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import os
+import pickle
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import (
+    Callable,
+    Iterator,
+)
+
+import networkx as nx
+from rdflib import Graph, Literal, Namespace, URIRef, RDF, RDFS, OWL, XSD
+
+# Local imports
+import graphml
+from compact import CompactGraph
+from compressed import (
+    compressed_name,
+    open_input,
+    open_output,
+    split_codec,
+)
+from database import (
+    DATABASE_FILE,
+    GraphDatabase,
+    write_database,
+)
+from graph import (
+    KnowledgeGraph,
+    category_index,
+    iter_edges,
+)
+from profiling import (
+    StageProfiler,
+    stage,
+)
+from triples import (
+    intern_triples,
+    quote,
+    write_triples,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The names of the exported files in the results folder of each disease
+GRAPHML_FILE = 'gephy.graphml'
+RDF_OWL = 'rdf.owl'
+GRAPH_ATTRIBUTES = 'graph_attributes.txt'
+EDGE_ATTRIBUTES = 'edge_attributes.txt'
+LERCHE_EDGE_ATTRIBUTES = 'edge_attributes_lerche.txt'
+LERCHE_TRIPLES = 'edge_attributes_lerche.bin'
+
+# The exports of the Lerche statements, which may omit the `is_a` statements of the category memberships
+LERCHE_EXPORTS = [LERCHE_EDGE_ATTRIBUTES, LERCHE_TRIPLES]
+
+# The streamed alternatives to the RDF/XML ontology and their `rdflib` parser formats
+RDF_NT = 'rdf.nt'
+RDF_TTL = 'rdf.ttl'
+RDF_FORMATS = {
+    '.nt': 'nt',
+    '.ttl': 'turtle',
+}
+
+# All of the exports in the order that they are written
+EXPORTS = [
+    GRAPHML_FILE,
+    GRAPH_ATTRIBUTES,
+    EDGE_ATTRIBUTES,
+    RDF_OWL,
+    LERCHE_EDGE_ATTRIBUTES,
+    LERCHE_TRIPLES,
+]
+
+# The exports of each output group that can be selected on the command line
+OUTPUTS = {
+    'graphml': [GRAPHML_FILE],
+    'attributes': [GRAPH_ATTRIBUTES, EDGE_ATTRIBUTES],
+    'owl': [RDF_OWL],
+    'lerche': [LERCHE_EDGE_ATTRIBUTES, LERCHE_TRIPLES],
+}
+
+# The verbose XML and RDF exports that can be compressed
+COMPRESSIBLE = [
+    GRAPHML_FILE,
+    RDF_NT,
+    RDF_TTL,
+    RDF_OWL,
+]
+
+# The namespace of the ontology
+EX = Namespace("http://example.org/")
+
+# The prefixes of the namespaces used in the ontology
+PREFIXES = {
+    "ex": EX,
+    "rdf": Namespace(str(RDF)),
+    "rdfs": Namespace(str(RDFS)),
+    "owl": Namespace(str(OWL)),
+    "xsd": Namespace(str(XSD)),
+}
+
+# The local names that can be abbreviated with a prefix in Turtle without escaping
+PN_LOCAL = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_\-]*")
+
+# The ontology classes, one for each category of node
+CLASS_LIST = [
+    'molecular_function',
+    'protein_location',
+    'biologic_process',
+    'protein_class',
+    'protein_motif',
+    'gene_location',
+    'protein_domain',
+    'chromosome',
+    'inheritance',
+    'protein',
+    'gene',
+    'disease',
+    'phenotype',
+]
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def write_graphml(G: nx.DiGraph, file: Path) -> None:
+    """Writes the graph to file in GraphML format for Gephi, streaming it with the writer of `graphml.py`.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    file : Path
+        The location of the output file.
+    """
+
+    with open_output(file) as f:
+        graphml.write_graphml(G, f)
+
+
+def write_graph_attributes(G: nx.DiGraph, file: Path) -> None:
+    """Writes each node of the graph and its attributes to a text file.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    file : Path
+        The location of the output file.
+    """
+
+    with open(file, 'w') as f:
+        # Iterate through all nodes in the graph
+        for node, attributes in G.nodes.data():
+            # Write the node and its attributes to the file
+            f.write(f"Node: {node}\n")
+            for attr, value in attributes.items():
+                f.write(f"{attr}: {value}\n")
+            f.write('\n')  # Add a blank line between nodes
+
+
+def write_edge_attributes(G: nx.DiGraph, file: Path) -> None:
+    """Writes each edge of the graph that has attributes and its attributes to a text file.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    file : Path
+        The location of the output file.
+    """
+
+    with open(file, 'w') as f:
+        # Iterate through all edges in the graph
+        for u, v, attributes in iter_edges(G):
+            if attributes:
+                # Write the edge and its attributes to the file
+                f.write(f"Edge: {(u, v)}\n")
+                for attr, value in attributes.items():
+                    f.write(f"{attr}: {value}\n")
+                f.write('\n')  # Add a blank line between edges
+
+
+def write_lerche(G: nx.DiGraph, file: Path, memberships: bool = True) -> None:
+    """Writes each edge of the graph as a quoted subject-predicate-object statement for parsing with Lerche in Julia.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    file : Path
+        The location of the output file.
+    memberships : bool, optional
+        If false, omits the `is_a` statements from the individuals to the supernodes of their categories, by default True.
+    """
+
+    with open(file, 'w') as f:
+        for u, v, attributes in iter_edges(G, memberships):
+            if attributes:
+                f.write(f"{quote(u)} {quote(attributes['relation'])} {quote(v)}\n")
+
+
+def write_lerche_triples(G: nx.DiGraph, file: Path, memberships: bool = True) -> None:
+    """Writes the statements of `write_lerche` to a binary triple file with an interned symbol table (see `triples.py`).
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    file : Path
+        The location of the output file.
+    memberships : bool, optional
+        If false, omits the `is_a` statements from the individuals to the supernodes of their categories, by default True.
+    """
+
+    symbols, codes = intern_triples(
+        (u, attributes['relation'], v)
+        for u, v, attributes in iter_edges(G, memberships)
+        if attributes
+    )
+    write_triples(file, symbols, codes)
+
+
+def data_property(name: str, label: str, domain: str) -> Iterator[tuple]:
+    """Generates the triples declaring a string-valued OWL data property in the ontology.
+
+    Parameters
+    ----------
+    name : str
+        The name of the property in the `EX` namespace.
+    label : str
+        The label of the property.
+    domain : str
+        The class of the subjects of the property.
+
+    Yields
+    ------
+    tuple
+        The declaration triples of the property.
+    """
+
+    property_uri = EX[name]
+    yield (property_uri, RDFS.label, Literal(label))
+    yield (property_uri, RDF.type, OWL.DatatypeProperty)
+    yield (property_uri, RDFS.domain, EX[domain])
+    yield (property_uri, RDFS.range, XSD.string)
+
+
+def iter_triples(G: nx.DiGraph) -> Iterator[tuple]:
+    """Generates the triples of the OWL ontology of the knowledge graph without holding them in memory.
+
+    Every triple is generated once: the declarations of the object properties are deduplicated with a set bounded by the number of relations and categories, and the remaining triples are unique to a node or edge.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to convert.
+
+    Yields
+    ------
+    tuple
+        The subject, predicate, and object of each triple as `rdflib` terms.
+    """
+
+    # Add classes
+    for c in CLASS_LIST:
+        yield (EX[c], RDF.type, OWL.Class)
+
+    # Add the class membership of each individual
+    for node, attributes in G.nodes.data():
+        if attributes.get('class_type', 0) == 'individual':
+            class_name = attributes.get('category', 0)
+            if class_name != 0:
+                yield (EX[node], RDF.type, EX[class_name])
+
+    # ADD OBJECT RELATIONSHIPS
+    declared = set()
+    for start_node, end_node, attributes in iter_edges(G):
+        if G.nodes[start_node].get('class_type', 0) != 'individual':
+            continue
+        if end_node == 'none' or start_node == 'none':
+            continue
+        object_property = attributes.get('relation', 0)
+        if object_property == 0:
+            continue
+        range_value = G.nodes[end_node].get("category", 0)
+        domain_value = G.nodes[start_node].get("category", 0)
+        object_property_uri = EX[object_property]
+        for triple in (
+            (object_property_uri, RDF.type, RDF.Property),
+            (object_property_uri, RDFS.domain, EX[domain_value]),
+            (object_property_uri, RDFS.range, EX[range_value]),
+        ):
+            if triple not in declared:
+                declared.add(triple)
+                yield triple
+        yield (EX[start_node], object_property_uri, EX[end_node])
+
+    # Each data property stage only touches the nodes of its own category
+    categories = category_index(G)
+
+    ################################################################
+    # Data Properties for the Proteins are added here
+    ################################################################
+
+    proteins = categories.get('protein', ())
+
+    yield from data_property('protein_weight', 'protein_weight', 'protein')
+    for p in proteins:
+        if p != 'protein':
+            mol_weight = G.nodes[p].get('molecular_weight', 0)
+            yield (EX[p], EX['protein_weight'], Literal(mol_weight, datatype=XSD.string))
+
+    yield from data_property('protein_length', 'protein_length', 'protein')
+    for p in proteins:
+        if p != 'protein':
+            length_aa = G.nodes[p].get('protein_length', 0)
+            yield (EX[p], EX['protein_length'], Literal(length_aa, datatype=XSD.string))
+
+    yield from data_property('unipro_num', 'uniprot_num', 'protein')
+    for p in proteins:
+        if p != 'protein':
+            uniprot = G.nodes[p].get('uniprot', 0)
+            yield (EX[p], EX['unipro_num'], Literal(uniprot, datatype=XSD.string))
+
+    ################################
+    # Data properities for Genes
+    ###############################
+
+    yield from data_property('gene_MIM', 'gene_MIM', 'gene')
+    for w in categories.get('gene', ()):
+        MIM = G.nodes[w].get('MIM', 0)
+        yield (EX[w], EX['gene_MIM'], Literal(MIM, datatype=XSD.string))
+
+    ##############################
+
+    # Data Properties for phenotypes
+    yield from data_property('phenotype_hpo', 'phenotype_hpo', 'phenotype')
+    for x in categories.get('phenotype', ()):
+        hpo = G.nodes[x].get('hpo_id', 0)
+        if hpo != 0:
+            yield (EX[x], EX['phenotype_hpo'], Literal(hpo, datatype=XSD.string))
+
+    # Data Properties for disease, declared once if any disease has a MIM number
+    declared = False
+    for d in categories.get('disease', ()):
+        MIM = G.nodes[d].get('MIM', 0)
+        if MIM != 0:
+            if not declared:
+                declared = True
+                yield from data_property('disease_MIM', 'disease_MIM', 'phenotype')
+            yield (EX[d], EX['disease_MIM'], Literal(MIM, datatype=XSD.string))
+
+
+def build_rdf(G: nx.DiGraph) -> Graph:
+    """Converts the knowledge graph to an in-memory RDF graph of an OWL ontology.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to convert.
+
+    Returns
+    -------
+    Graph
+        The RDF graph of the classes, individuals, object properties, and data properties of the knowledge graph.
+    """
+
+    g = Graph()
+    for prefix, namespace in PREFIXES.items():
+        g.bind(prefix, namespace)
+
+    for triple in iter_triples(G):
+        g.add(triple)
+
+    return g
+
+
+def write_rdf(G: nx.DiGraph, file: Path) -> None:
+    """Serializes the ontology of the knowledge graph to an OWL file in RDF/XML format.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    file : Path
+        The location of the output file.
+    """
+
+    with open_output(file) as f:
+        build_rdf(G).serialize(f, format="xml")
+
+
+def turtle_term(term, prefixes: dict = PREFIXES) -> str:
+    """Formats an `rdflib` term for Turtle, abbreviating IRIs in the namespaces of `prefixes` where the local name allows it.
+
+    Parameters
+    ----------
+    term : rdflib.term.Node
+        The term to format.
+    prefixes : dict, optional
+        The namespaces to abbreviate by their prefixes, by default `PREFIXES`.
+
+    Returns
+    -------
+    str
+        The Turtle form of the term.
+    """
+
+    if isinstance(term, Literal) and term.datatype is not None:
+        return f"{Literal(str(term)).n3()}^^{turtle_term(term.datatype, prefixes)}"
+
+    if isinstance(term, URIRef):
+        for prefix, namespace in prefixes.items():
+            if term.startswith(namespace):
+                local = term[len(namespace):]
+                if PN_LOCAL.fullmatch(local):
+                    return f"{prefix}:{local}"
+
+    return term.n3()
+
+
+def write_ntriples(G: nx.DiGraph, file: Path) -> None:
+    """Streams the ontology of the knowledge graph to an N-Triples file as its triples are generated.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    file : Path
+        The location of the output file.
+    """
+
+    with open_output(file, 'w') as f:
+        for s, p, o in iter_triples(G):
+            f.write(f"{s.n3()} {p.n3()} {o.n3()} .\n")
+
+
+def write_turtle(G: nx.DiGraph, file: Path) -> None:
+    """Streams the ontology of the knowledge graph to a Turtle file as its triples are generated.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    file : Path
+        The location of the output file.
+    """
+
+    with open_output(file, 'w') as f:
+        for prefix, namespace in PREFIXES.items():
+            f.write(f"@prefix {prefix}: <{namespace}> .\n")
+        f.write('\n')
+        for triple in iter_triples(G):
+            f.write(" ".join(turtle_term(term) for term in triple) + " .\n")
+
+
+def convert_rdf(file: Path, out_file: Path, format: str = "xml") -> None:
+    """Converts a streamed N-Triples or Turtle export to another RDF format, such as RDF/XML.
+
+    Unlike the streamed exports, the conversion holds the whole ontology in memory.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the N-Triples (`.nt`) or Turtle (`.ttl`) file, which may be compressed.
+    out_file : Path
+        The location of the converted file, compressed with the codec of its extension, if any.
+    format : str, optional
+        The `rdflib` serialization format of the converted file, by default "xml".
+    """
+
+    g = Graph()
+    for prefix, namespace in PREFIXES.items():
+        g.bind(prefix, namespace)
+    name, _ = split_codec(Path(file).name)
+    with open_input(file) as f:
+        g.parse(f, format=RDF_FORMATS[Path(name).suffix])
+    with open_output(out_file) as f:
+        g.serialize(f, format=format)
+
+
+def select_exports(
+    outputs: list = None,
+    rdf_format: str = 'xml',
+    rdf_xml: bool = False,
+    compress: str = None,
+) -> list:
+    """Selects the exports of a set of output groups.
+
+    Parameters
+    ----------
+    outputs : list, optional
+        The names of the output groups of `OUTPUTS`, by default all of them.
+    rdf_format : str, optional
+        The format of the ontology of the `owl` group, either 'xml' for `rdf.owl` built in memory, or 'nt' or 'ttl' for `rdf.nt` or `rdf.ttl` streamed to disk, by default 'xml'.
+    rdf_xml : bool, optional
+        If true, also converts a streamed ontology to `rdf.owl`, by default False.
+    compress : str, optional
+        The codec of the `COMPRESSIBLE` exports, one of `compressed.CODECS`, by default None for no compression.
+
+    Returns
+    -------
+    list
+        The file names of the selected exports in the order of `EXPORTS`.
+    """
+
+    if outputs is None:
+        outputs = list(OUTPUTS)
+    selected = {name for output in outputs for name in OUTPUTS[output]}
+    exports = [name for name in EXPORTS if name in selected]
+
+    # Swap the in-memory RDF/XML ontology for a streamed one if requested
+    if RDF_OWL in exports and rdf_format != 'xml':
+        exports[exports.index(RDF_OWL)] = RDF_NT if rdf_format == 'nt' else RDF_TTL
+        if rdf_xml:
+            exports.append(RDF_OWL)
+
+    return [compressed_name(name, compress) if name in COMPRESSIBLE else name for name in exports]
+
+
+# The writers of every export in the order that they are written, with the streamed RDF before its conversion
+WRITERS = {
+    DATABASE_FILE: write_database,
+    GRAPHML_FILE: write_graphml,
+    GRAPH_ATTRIBUTES: write_graph_attributes,
+    EDGE_ATTRIBUTES: write_edge_attributes,
+    RDF_NT: write_ntriples,
+    RDF_TTL: write_turtle,
+    RDF_OWL: write_rdf,
+    LERCHE_EDGE_ATTRIBUTES: write_lerche,
+    LERCHE_TRIPLES: write_lerche_triples,
+}
+
+
+def atomic_write(write: Callable[[Path], None], file: Path) -> None:
+    """Writes a file through a temporary file in the same folder, which only replaces the file once it is complete.
+
+    Parameters
+    ----------
+    write : Callable[[Path], None]
+        The function writing the contents to a given location.
+    file : Path
+        The location of the output file.
+    """
+
+    # The temporary file keeps the extension of the output file
+    temp = file.with_name(f".tmp-{os.getpid()}-{file.name}")
+    try:
+        write(temp)
+        temp.replace(file)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+def write_export(
+    G: nx.DiGraph,
+    name: str,
+    out_dir: Path,
+    source: str = None,
+    lerche_memberships: bool = True,
+) -> None:
+    """Atomically writes one export of the knowledge graph.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export.
+    name : str
+        The file name of the export, one of `WRITERS` with the extension of a codec if it is compressed.
+    out_dir : Path
+        The results folder to write the export to.
+    source : str, optional
+        The file name of an already written streamed ontology that `rdf.owl` is converted from, by default None.
+    lerche_memberships : bool, optional
+        If false, the Lerche exports omit the `is_a` statements from the individuals to the supernodes of their categories, by default True.
+    """
+
+    base = split_codec(name)[0]
+    if source is not None:
+        atomic_write(partial(convert_rdf, out_dir.joinpath(source)), out_dir.joinpath(name))
+    elif base in LERCHE_EXPORTS:
+        atomic_write(partial(WRITERS[base], G, memberships=lerche_memberships), out_dir.joinpath(name))
+    else:
+        atomic_write(partial(WRITERS[base], G), out_dir.joinpath(name))
+
+
+def export_jobs(names: list) -> list:
+    """Groups the exports into independent jobs.
+
+    If `rdf.owl` is requested along with a streamed `rdf.nt` or `rdf.ttl` export, it is converted from the stream in the same job rather than built from the graph again.
+
+    Parameters
+    ----------
+    names : list
+        The file names of the exports, which may carry the extension of a codec.
+
+    Returns
+    -------
+    list
+        The jobs in the order of `WRITERS`, each a list of the file names of its exports and the file names of the streams that they are converted from, if any.
+    """
+
+    bases = {split_codec(name)[0]: name for name in names}
+    names = [bases[base] for base in WRITERS if base in bases]
+    stream = next((bases[base] for base in (RDF_NT, RDF_TTL) if base in bases), None)
+    jobs = []
+    for name in names:
+        if split_codec(name)[0] == RDF_OWL and stream is not None:
+            next(job for job in jobs if job[0][0] == stream).append((name, stream))
+        else:
+            jobs.append([(name, None)])
+
+    return jobs
+
+
+# The graph snapshot of each export worker process
+_snapshot = None
+
+
+def _load_snapshot(snapshot: bytes) -> None:
+    """Loads the pickled `CompactGraph` snapshot of an export worker process as a frozen graph."""
+    global _snapshot
+    _snapshot = nx.freeze(pickle.loads(snapshot).to_networkx(KnowledgeGraph))
+
+
+def _open_database(file: Path) -> None:
+    """Opens the graph database of an export worker process as its snapshot."""
+    global _snapshot
+    _snapshot = GraphDatabase(file)
+
+
+def _run_job(job: list, out_dir: Path, lerche_memberships: bool = True) -> dict:
+    """Runs an export job on the graph snapshot of an export worker process, returning the time of each export."""
+    times = {}
+    for name, source in job:
+        start = time.perf_counter()
+        write_export(_snapshot, name, out_dir, source, lerche_memberships)
+        times[name] = time.perf_counter() - start
+
+    return times
+
+
+def export_kg(
+    G: nx.DiGraph,
+    out_dir: Path,
+    names: list = None,
+    profiler: StageProfiler = None,
+    processes: int = 1,
+    lerche_memberships: bool = True,
+) -> dict:
+    """Writes the exports of the knowledge graph to a results folder.
+
+    Every export is written to a temporary file that replaces the export only once it is complete, so that a crashed run never leaves a partial export behind.
+    With several processes, the independent exports are written concurrently from a pickled `CompactGraph` snapshot of the graph, which each worker process loads once as a frozen graph, or from the database of a `GraphDatabase`, which each worker process opens itself.
+    Unlike a pickled `networkx` graph, the snapshot keeps a single object for each node label, so that a missing `float('nan')` tag remains one node.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to export, or a `database.GraphDatabase` to stream the exports out of.
+    out_dir : Path
+        The results folder to write the exports to.
+    names : list, optional
+        The file names of the exports to write, by default all of `EXPORTS`.
+    profiler : StageProfiler, optional
+        The profiler that records each export as a stage named after its file, by default None.
+    processes : int, optional
+        The number of worker processes, by default 1 to write the exports in this process, or None for one per job.
+    lerche_memberships : bool, optional
+        If false, the Lerche exports omit the `is_a` statements from the individuals to the supernodes of their categories, by default True.
+
+    Returns
+    -------
+    dict
+        The locations of the written files by their file names.
+    """
+
+    if names is None:
+        names = EXPORTS
+
+    jobs = export_jobs(names)
+    files = {name: out_dir.joinpath(name) for job in jobs for name, _ in job}
+
+    if processes == 1 or len(jobs) < 2:
+        for job in jobs:
+            for name, source in job:
+                with stage(profiler, name, G):
+                    write_export(G, name, out_dir, source, lerche_memberships)
+        return files
+
+    # The stage of the whole pool is followed by the times of the exports in their workers
+    with stage(profiler, 'exports', G):
+        if isinstance(G, GraphDatabase):
+            # Each worker process streams its exports out of its own connection to the database
+            initializer, initargs = _open_database, (G.file,)
+        else:
+            snapshot = pickle.dumps(CompactGraph.from_networkx(G), protocol=pickle.HIGHEST_PROTOCOL)
+            initializer, initargs = _load_snapshot, (snapshot,)
+        with ProcessPoolExecutor(
+            max_workers=min(processes or len(jobs), len(jobs)),
+            initializer=initializer,
+            initargs=initargs,
+        ) as pool:
+            times = {}
+            for job_times in pool.map(partial(_run_job, out_dir=out_dir, lerche_memberships=lerche_memberships), jobs):
+                times.update(job_times)
+    if profiler is not None:
+        for name, elapsed in times.items():
+            profiler.record(name, elapsed, worker=True)
+
+    return files
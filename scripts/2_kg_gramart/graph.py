@@ -0,0 +1,352 @@
+"""
+    graph.py
+
+# Description
+The graph type of the `2_kg_gramart` knowledge graphs, a `networkx.DiGraph` that indexes its nodes by category as they are added.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from typing import Iterator
+
+import networkx as nx
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The relation of the edges from each individual to the supernode of its category
+MEMBERSHIP = 'is_a'
+
+# -----------------------------------------------------------------------------
+# CLASSES
+# -----------------------------------------------------------------------------
+
+
+class KnowledgeGraph(nx.DiGraph):
+    """A directed knowledge graph that keeps an index of its nodes by their `category` attribute.
+
+    The index is updated by `add_node`, `add_nodes_from`, and the node removal methods.
+    Nodes that only appear through `add_edge` have no category and are not indexed, and setting `G.nodes[n]['category']` directly bypasses the index.
+
+    The `is_a` edges from the individuals to the supernodes of their categories repeat the `category` of each individual.
+    A graph that collapses them only records the position of each such edge among the edges of its individual in `memberships` as it is added, so that `iter_edges` can rebuild them in place for the exporters.
+    `has_edge` and `number_of_edges` count the collapsed edges, but the edge views and degrees of `networkx` only see the stored edges.
+    A collapsed edge is stored again if it gains other attributes or its individual changes category.
+
+    Attributes
+    ----------
+    categories : dict
+        The nodes of each category, in the order that they were indexed.
+    collapse : bool
+        If true, the `is_a` edges from the individuals to the supernodes of their categories are collapsed as they are added.
+    memberships : dict
+        The position of the collapsed `is_a` edge of each individual among its stored edges.
+    """
+
+    def __init__(self, incoming_graph_data=None, collapse: bool = False, **attr):
+        # The index must exist before the base class adds any incoming nodes
+        self.categories = {}
+        self._node_category = {}
+        self.collapse = collapse
+        self.memberships = {}
+        super().__init__(incoming_graph_data, **attr)
+
+    def _index(self, node) -> None:
+        """Moves a node to the index entry of its current category."""
+        category = self._node.get(node, {}).get('category', 0)
+        old = self._node_category.get(node, 0)
+        if category == old:
+            return
+        # The collapsed edge is rebuilt to the current category, so it is stored before the category changes
+        if node in self.memberships:
+            self._expand(node, old)
+        if old != 0:
+            del self.categories[old][node]
+        if category == 0:
+            self._node_category.pop(node, None)
+        else:
+            self._node_category[node] = category
+            self.categories.setdefault(category, {})[node] = None
+
+    def _unindex(self, node) -> None:
+        """Removes a node from the index."""
+        self.memberships.pop(node, None)
+        category = self._node_category.pop(node, 0)
+        if category != 0:
+            del self.categories[category][node]
+
+    def _expand(self, u, v) -> None:
+        """Stores the collapsed `is_a` edge of an individual to the supernode of its category at its position."""
+        position = self.memberships.pop(u)
+        later = list(self._succ[u].items())[position:]
+        super().remove_edges_from((u, w) for w, _ in later)
+        super().add_edge(u, v, relation=MEMBERSHIP)
+        super().add_edges_from((u, w, attributes) for w, attributes in later)
+
+    def _shift(self, u, v) -> None:
+        """Moves the collapsed edge of an individual back by one position if its stored edge to a node before it is removed."""
+        position = self.memberships.get(u)
+        if position is not None and v in self._succ[u] and list(self._succ[u]).index(v) < position:
+            self.memberships[u] = position - 1
+
+    def _is_collapsed(self, u, v) -> bool:
+        """Checks if an edge is the collapsed `is_a` edge of an individual."""
+        return u in self.memberships and self._node_category.get(u) == v
+
+    def _collapses(self, u, v, attr: dict) -> bool:
+        """Checks if an added edge is collapsed, recording it as a membership if it is new."""
+        if self._is_collapsed(u, v):
+            if attr == {'relation': MEMBERSHIP}:
+                return True
+            # Any other attributes are kept on a stored edge
+            self._expand(u, v)
+            return False
+
+        if (
+            self.collapse
+            and attr == {'relation': MEMBERSHIP}
+            and u in self._node
+            and v in self._node
+            and u not in self.memberships
+            and v not in self._succ[u]
+            and is_membership(self, u, v, attr)
+        ):
+            self.memberships[u] = len(self._succ[u])
+            return True
+
+        return False
+
+    def add_node(self, node_for_adding, **attr):
+        super().add_node(node_for_adding, **attr)
+        self._index(node_for_adding)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        nodes_for_adding = list(nodes_for_adding)
+        super().add_nodes_from(nodes_for_adding, **attr)
+        for n in nodes_for_adding:
+            # Follow the base class in telling `(node, attribute dict)` pairs from plain nodes
+            try:
+                n in self._node
+            except TypeError:
+                n = n[0]
+            self._index(n)
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        if not self._collapses(u_of_edge, v_of_edge, attr):
+            super().add_edge(u_of_edge, v_of_edge, **attr)
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        if not self.collapse and not self.memberships:
+            super().add_edges_from(ebunch_to_add, **attr)
+            return
+        # Each edge is checked on its own, following the base class in telling 2-tuples from 3-tuples
+        for e in ebunch_to_add:
+            if len(e) == 3:
+                u, v, dd = e
+            elif len(e) == 2:
+                u, v = e
+                dd = {}
+            else:
+                raise nx.NetworkXError(f"Edge tuple {e} must be a 2-tuple or 3-tuple.")
+            self.add_edge(u, v, **{**attr, **dd})
+
+    def remove_edge(self, u, v):
+        if self._is_collapsed(u, v):
+            del self.memberships[u]
+            return
+        if u in self._succ:
+            self._shift(u, v)
+        super().remove_edge(u, v)
+
+    def remove_edges_from(self, ebunch):
+        if not self.memberships:
+            super().remove_edges_from(ebunch)
+            return
+        for e in ebunch:
+            u, v = e[:2]
+            if self._is_collapsed(u, v) or (u in self._succ and v in self._succ[u]):
+                self.remove_edge(u, v)
+
+    def _remove_memberships(self, n) -> None:
+        """Drops the collapsed edges to a node and moves back the collapsed edges after the stored edges to it."""
+        for u in self.categories.get(n, ()):
+            self.memberships.pop(u, None)
+        for u in self._pred.get(n, ()):
+            self._shift(u, n)
+
+    def remove_node(self, n):
+        if n in self._node:
+            self._remove_memberships(n)
+        super().remove_node(n)
+        self._unindex(n)
+
+    def remove_nodes_from(self, nodes):
+        nodes = list(nodes)
+        for n in nodes:
+            if n in self._node:
+                self._remove_memberships(n)
+                super().remove_node(n)
+                self._unindex(n)
+
+    def clear(self):
+        super().clear()
+        self.categories.clear()
+        self._node_category.clear()
+        self.memberships.clear()
+
+    def clear_edges(self):
+        super().clear_edges()
+        self.memberships.clear()
+
+    def has_edge(self, u, v) -> bool:
+        return self._is_collapsed(u, v) or super().has_edge(u, v)
+
+    def number_of_edges(self, u=None, v=None) -> int:
+        if u is None:
+            return super().number_of_edges() + len(self.memberships)
+        return int(self.has_edge(u, v))
+
+    def copy(self, as_view: bool = False):
+        H = super().copy(as_view)
+        if not as_view:
+            H.collapse = self.collapse
+            H.memberships = dict(self.memberships)
+        return H
+
+    def nodes_of(self, category: str) -> list:
+        """Lists the nodes of a category.
+
+        Parameters
+        ----------
+        category : str
+            The category of the nodes.
+
+        Returns
+        -------
+        list
+            The nodes whose `category` attribute is `category`, in the order that they were indexed.
+        """
+
+        return list(self.categories.get(category, ()))
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def category_index(G: nx.DiGraph) -> dict:
+    """Gets the index of the nodes of a graph by their `category` attribute.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The graph, whose own index is used if it keeps one, like a `KnowledgeGraph` or a `database.GraphDatabase`.
+
+    Returns
+    -------
+    dict
+        A mapping of each category to the nodes of that category.
+    """
+
+    if isinstance(G, KnowledgeGraph) or not isinstance(G, nx.Graph):
+        return G.categories
+
+    # Otherwise index the graph with one pass over its nodes
+    categories = {}
+    for node, category in G.nodes(data='category', default=0):
+        if category != 0:
+            categories.setdefault(category, {})[node] = None
+
+    return categories
+
+
+def is_membership(G: nx.DiGraph, u, v, attributes: dict) -> bool:
+    """Checks if an edge is the `is_a` edge from an individual to the supernode of its category.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The graph of the edge.
+    u, v : Any
+        The source and target of the edge.
+    attributes : dict
+        The attributes of the edge.
+
+    Returns
+    -------
+    bool
+        True if the edge only repeats the `category` of its source.
+    """
+
+    return (
+        attributes.get('relation') == MEMBERSHIP
+        and G.nodes[u].get('class_type') == 'individual'
+        and G.nodes[u].get('category') == v
+        and G.nodes[v].get('class_type') == 'class'
+    )
+
+
+def iter_edges(G: nx.DiGraph, memberships: bool = True) -> Iterator[tuple]:
+    """Iterates over the edges of a graph and their attributes, rebuilding the `is_a` edges of a collapsed `KnowledgeGraph` in place.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The graph, which may have collapsed memberships (see `KnowledgeGraph`).
+    memberships : bool, optional
+        If false, skips the `is_a` edges from the individuals to the supernodes of their categories, by default True.
+
+    Yields
+    ------
+    tuple
+        The source, target, and attribute dict of each edge in the order that it was added.
+    """
+
+    collapsed = getattr(G, 'memberships', None)
+    if not collapsed:
+        if memberships:
+            yield from G.edges.data()
+        else:
+            for u, v, attributes in G.edges.data():
+                if not is_membership(G, u, v, attributes):
+                    yield u, v, attributes
+        return
+
+    for u, neighbors in G.adjacency():
+        edges = list(neighbors.items())
+        position = collapsed.get(u)
+        if position is not None:
+            edges.insert(position, (G.nodes[u]['category'], {'relation': MEMBERSHIP}))
+        for v, attributes in edges:
+            if memberships or not is_membership(G, u, v, attributes):
+                yield u, v, attributes
+
+
+def expand_memberships(G: nx.DiGraph) -> nx.DiGraph:
+    """Copies a graph with its collapsed memberships rebuilt as edges.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The graph, which may have collapsed memberships.
+
+    Returns
+    -------
+    nx.DiGraph
+        The graph itself if it has no collapsed memberships, or a `networkx.DiGraph` with the nodes and rebuilt edges of the graph in order.
+    """
+
+    if not getattr(G, 'memberships', None):
+        return G
+
+    H = nx.DiGraph()
+    H.add_nodes_from(G.nodes.data())
+    H.add_edges_from(iter_edges(G))
+
+    return H
@@ -0,0 +1,1104 @@
+"""
+    kg.py
+
+# Description
+The knowledge graph construction library used by `1_kg_gen.py` in the `2_kg_gramart` experiment.
+
+The graph is built from the tables of one disease folder in `work/data/kg/` with `build_kg`, and `build_all` builds several diseases in parallel on a process pool after loading their shared tables once.
+
+# Authors
+- Dr. Daniel Hier <dbhier@dbhier.com>
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import hashlib
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Iterator
+
+import networkx as nx
+import pandas as pd
+
+# Local imports
+from compressed import split_codec
+from database import (
+    DATABASE_FILE,
+    GraphDatabase,
+    GraphWriter,
+)
+from export import (
+    EXPORTS,
+    LERCHE_EDGE_ATTRIBUTES,
+    LERCHE_EXPORTS,
+    atomic_write,
+    export_kg,
+)
+from graph import (
+    KnowledgeGraph,
+    expand_memberships,
+    iter_edges,
+)
+from profiling import (
+    PROFILE_DIR,
+    REPORT_FILE,
+    StageProfiler,
+    stage,
+)
+from manifest import (
+    read_manifest,
+    record_artifacts,
+    stale_artifacts,
+    write_manifest,
+)
+from shards import (
+    SHARD_DIR,
+    shards_stale,
+    write_shards,
+)
+from utils import (
+    results_dir,
+    data_dir,
+    cached_parse,
+    file_digest,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+EXP_NAME = "2_kg_gramart"
+
+# The version of the generator, recorded with each export so that a change in its output invalidates older exports
+GENERATOR_VERSION = "1"
+
+# The local modules that the construction and exports depend on, whose contents are hashed into the code digest of each export
+GENERATOR_MODULES = [
+    "kg.py",
+    "export.py",
+    "graph.py",
+    "graphml.py",
+    "compact.py",
+    "compressed.py",
+    "database.py",
+    "triples.py",
+    "shards.py",
+    "utils.py",
+]
+REFLEXIVE = False
+DISEASES = [
+    "cmt",
+    "dystonia",
+    "parkinson",
+]
+
+# Data files within each disease folder
+CMT_DATA = "Location_Disease_Gene.csv"
+PHENOTYPE_DATA = "Phenotype_by_disease.csv"
+HPO_DATA = "HPO_to_tag.csv"
+PROTEIN_DATA = "protein_list.csv"
+INPUT_FILES = [
+    CMT_DATA,
+    PHENOTYPE_DATA,
+    HPO_DATA,
+    PROTEIN_DATA,
+]
+
+# The number of rows of the phenotype annotations parsed at a time
+PHENOTYPE_CHUNKSIZE = 50000
+
+# The single object standing in for missing text tags, which pandas reads as NaN
+MISSING_TAG = float('nan')
+
+# The class supernodes that every individual is linked to with an `is_a` edge
+SUPERNODES = [
+    'disease',
+    'gene',
+    'inheritance',
+    'protein',
+    'gene_location',
+    'phenotype',
+    'protein_class',
+    'biologic_process',
+    'molecular_function',
+    'disease_involvement',
+    'protein_location',
+    'protein_domain',
+    'protein_motif',
+    'chromosome',
+]
+
+# The accepted header names of each field of the protein tables, whose layouts differ between the diseases
+PROTEIN_COLUMNS = {
+    'gene': ('gene',),
+    'protein': ('protein', 'protein_name'),
+    'uniprot': ('uniprot',),
+    'chromosome': ('chromosome',),
+    'protein_class': ('protein_class',),
+    'biologic_process': ('biologic_process', 'biologic_proces', 'biological_process'),
+    'molecular_function': ('molecular_function',),
+    'disease_involvement': ('disease_involvement', 'disease_involved'),
+    'molecular_weight': ('mw',),
+    'protein_domain': ('domains', 'domain'),
+    'protein_motif': ('motifs', 'motif'),
+    'protein_location': ('cell_localization', 'protein_location'),
+    'protein_length': ('length',),
+}
+
+# The pipe-delimited protein fields, which are also the categories of their nodes, with the relation from the protein, whether the `is_a` edge of each value comes first, and whether a 'none' anywhere in the cell skips it (otherwise only a 'none' value does)
+PROTEIN_ATTRIBUTES = [
+    ('protein_class', 'has_protein_class', True, True),
+    ('biologic_process', 'has_biologic_process', False, True),
+    ('molecular_function', 'has_molecular_function', False, True),
+    ('disease_involvement', 'has_disease_involvement', False, True),
+    ('protein_domain', 'has_a_domain', True, False),
+    ('protein_motif', 'has_a_motif', True, False),
+    ('protein_location', 'is_located_at', True, True),
+]
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def input_file(disease: str, name: str) -> Path:
+    """Points to a data file in the knowledge graph data folder of a disease.
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+    name : str
+        The name of the data file.
+
+    Returns
+    -------
+    Path
+        A `pathlib.Path` pointing to the data file.
+    """
+
+    return data_dir("kg", disease, name)
+
+
+def output_dir(disease: str) -> Path:
+    """Points to the results folder of a disease, creating it if necessary.
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+
+    Returns
+    -------
+    Path
+        A `pathlib.Path` pointing to the results folder.
+    """
+
+    return results_dir(EXP_NAME, disease)
+
+
+def parse_table(file: Path) -> list:
+    """Parses a CSV file with a header row into a list of rows.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the CSV file.
+
+    Returns
+    -------
+    list
+        The rows of the table as lists.
+    """
+
+    return pd.read_csv(file).values.tolist()
+
+
+def parse_frame(file: Path) -> pd.DataFrame:
+    """Parses a CSV file with a header row into a data frame, keeping the header names.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the CSV file.
+
+    Returns
+    -------
+    pd.DataFrame
+        The table with its header names as columns.
+    """
+
+    return pd.read_csv(file)
+
+
+def read_table(file: Path, memo: dict = None, cache: bool = True, parse=parse_table) -> list:
+    """Reads a CSV file with a header row into a list of rows, reusing earlier parses of identical files.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the CSV file.
+    memo : dict, optional
+        A mapping of file content hashes and parser names to previously read tables, so that identical files in different folders are only read once.
+    cache : bool, optional
+        If true, loads the table from the on-disk cache of parsed tables (see `utils.cached_parse`), by default True.
+    parse : Callable[[Path], Any], optional
+        The parser of the file, by default `parse_table`, or `parse_frame` to keep the header names.
+
+    Returns
+    -------
+    list
+        The rows of the table as lists, or the table returned by `parse`.
+    """
+
+    if memo is None and not cache:
+        return parse(file)
+
+    digest = file_digest(file)
+    key = (digest, parse.__name__)
+    if memo is not None and key in memo:
+        return memo[key]
+
+    table = cached_parse(file, parse, digest) if cache else parse(file)
+    if memo is not None:
+        memo[key] = table
+
+    return table
+
+
+def read_tables(folder: Path, memo: dict = None, cache: bool = True) -> dict:
+    """Reads the tables used to build a knowledge graph from a data folder.
+
+    Parameters
+    ----------
+    folder : Path
+        The folder holding the `INPUT_FILES` of a knowledge graph.
+    memo : dict, optional
+        A mapping of file content hashes to previously read tables, shared between the diseases of a batch.
+    cache : bool, optional
+        If true, loads the CSV tables from the on-disk cache of parsed tables, by default True.
+
+    Returns
+    -------
+    dict
+        The `variants`, `hpo_tags`, `phenotype_by_disease`, and `proteins` tables of the folder.
+    """
+
+    variants = read_table(folder.joinpath(CMT_DATA), memo, cache)
+    disease_MIMs = [d[2] for d in variants]
+
+    return {
+        "variants": variants,
+        "hpo_tags": read_table(folder.joinpath(HPO_DATA), memo, cache),
+        # Only the rows of the diseases in this graph are kept while streaming the annotations
+        "phenotype_by_disease": list(read_phenotypes(folder.joinpath(PHENOTYPE_DATA), disease_MIMs)),
+        # The protein columns are resolved by their header names
+        "proteins": read_table(folder.joinpath(PROTEIN_DATA), memo, cache, parse_frame),
+    }
+
+
+def load_tables(disease: str, memo: dict = None, cache: bool = True) -> dict:
+    """Loads the tables used to build the knowledge graph of a disease.
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+    memo : dict, optional
+        A mapping of file content hashes to previously read tables, shared between the diseases of a batch.
+    cache : bool, optional
+        If true, loads the CSV tables from the on-disk cache of parsed tables, by default True.
+
+    Returns
+    -------
+    dict
+        The `variants`, `hpo_tags`, `phenotype_by_disease`, and `proteins` tables of the disease.
+    """
+
+    return read_tables(data_dir("kg", disease), memo, cache)
+
+
+def time_tables(disease: str) -> dict:
+    """Times loading the tables of a disease from their CSV files and from the cache of parsed tables.
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+
+    Returns
+    -------
+    dict
+        The `cold` time in seconds to parse the tables from their CSV files and the `warm` time to load them from the cache.
+    """
+
+    start = time.perf_counter()
+    load_tables(disease, cache=False)
+    cold = time.perf_counter() - start
+
+    # Make sure that the cache is populated before timing it
+    load_tables(disease)
+    start = time.perf_counter()
+    load_tables(disease)
+    warm = time.perf_counter() - start
+
+    return {
+        "cold": cold,
+        "warm": warm,
+    }
+
+
+def add_supernodes(G: nx.DiGraph) -> None:
+    """Adds the class supernodes to the graph.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to add the supernodes to.
+    """
+
+    for supernode in SUPERNODES:
+        G.add_node(supernode, category=supernode, class_type='class')
+
+
+#################################################################################################################
+# The file CMT_Location_Disease_Gene.csv is a CSV file derived from OMIM                                        #
+# First row is header row                                                                                        #
+# It has 81 datarows for 81 variants of CMT                                                                     #
+# All spaces replaced with underscore (_)                                                                       #
+# In column [5] when 2 modes of inheritance are noted, the two modes are separated by a pipe character (|)      #
+#                        [0]            [1]                [2]           [3]      [4]         [5]               #
+# Column headers are [Gene_Location]	[Disease_variant]	[Disease_MIM]	[Gene]	[Gene_MIM] [inheritance]         #
+################################################################################################################
+
+
+def add_variants(G: nx.DiGraph, variants: list) -> list:
+    """Adds the disease, gene, gene location, and inheritance nodes and edges of the disease variants to the graph.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to add the variants to.
+    variants : list
+        The rows of `Location_Disease_Gene.csv`.
+
+    Returns
+    -------
+    list
+        The MIM numbers of the disease variants in file order.
+    """
+
+    disease_MIMs = []
+    for d in variants:
+        gene_location = d[0]
+        disease = d[1]
+        disease_MIM = d[2]
+        gene = d[3]
+        gene_MIM = d[4]
+        inheritance = d[5]
+        G.add_node(disease, category='disease', MIM=disease_MIM, class_type='individual')   # the name of the disease variant
+        disease_MIMs.append(disease_MIM)     # append disease_MIM to a list of disease_MIMs
+        # if REFLEXIVE:
+        G.add_edge(disease, 'disease', relation='is_a')     # 'disease' is a supernode--all diseases are linked to this supernode
+        G.add_node(gene_location, category='gene_location', class_type='individual')
+        # if REFLEXIVE:
+        G.add_edge(gene_location, 'gene_location', relation='is_a')
+        G.add_edge(gene, gene_location, relation='has_gene_location')
+        G.add_node(gene, category='gene', MIM=gene_MIM, gene_location=gene_location, class_type='individual')   # add each gene as a node
+        G.add_edge(disease, gene, relation='is_caused_by')  # add an edge between disease and causative gene
+        # if REFLEXIVE:
+        G.add_edge(gene, 'gene', relation='is_a')
+        # Some diseases have multiple inheritances.  We use pipe charactder to separate multiple inheritances
+        for inherit_type in inheritance.split('|'):
+            G.add_node(inherit_type, category='inheritance', class_type='individual')   # Each form of inheritance is a node
+            # if REFLEXIVE:
+            G.add_edge(inherit_type, 'inheritance', relation='is_a')
+            G.add_edge(disease, inherit_type, relation='inherited_by')  # add an edge between the disease and how it is inherited
+
+    return disease_MIMs
+
+
+def index_hpo_tags(hpo_tags: list) -> dict:
+    """Indexes the HPO accession numbers to their text phenotype tags.
+
+    Duplicate accession numbers are kept in file order so that the index can replace a linear scan of `hpo_tags` exactly.
+
+    Parameters
+    ----------
+    hpo_tags : list
+        A list of `[hpo_ID, phenotype]` pairs, such as the rows of `HPO_to_tag.csv`.
+
+    Returns
+    -------
+    dict
+        A mapping of each HPO accession number to the list of phenotype tags that it names.
+    """
+
+    hpo_index = defaultdict(list)
+    for hpo, phenotype in hpo_tags:
+        # NaN never compares equal in the original scan, so it can never match
+        if hpo == hpo:
+            # Missing tags are one node, even if pickling has made copies of the NaN object
+            hpo_index[hpo].append(phenotype if phenotype == phenotype else MISSING_TAG)
+
+    return dict(hpo_index)
+
+
+###################################################################
+#      [0]            [1]           [2]
+# [disease_MIM]    [disease]      [hpo_ID]
+#########################################################################################################################
+
+
+def read_phenotypes(
+    file: Path,
+    disease_MIMs: list,
+    chunksize: int = PHENOTYPE_CHUNKSIZE,
+) -> Iterator[list]:
+    """Streams the phenotype annotations of the diseases in `disease_MIMs` from a `Phenotype_by_disease.csv` file.
+
+    The file is parsed in chunks of `chunksize` rows, and only the first three columns are read, so the peak memory is bounded by the chunk size rather than the size of the annotation file.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the phenotype annotations file with `[disease_MIM] [disease] [hpo_ID]` as its first three columns.
+    disease_MIMs : list
+        The MIM numbers of the diseases whose annotations are kept.
+    chunksize : int, optional
+        The number of rows parsed at a time, by default `PHENOTYPE_CHUNKSIZE`.
+
+    Yields
+    ------
+    list
+        The `[disease_MIM, disease, hpo_ID]` rows of the diseases in `disease_MIMs` in file order.
+    """
+
+    disease_MIM_set = set(disease_MIMs)
+    with pd.read_csv(file, usecols=[0, 1, 2], chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunk = chunk[chunk.iloc[:, 0].isin(disease_MIM_set)]
+            yield from chunk.values.tolist()
+
+
+def add_phenotypes(
+    G: nx.DiGraph,
+    phenotype_by_disease: list,
+    hpo_tags: list,
+    disease_MIMs: list,
+    phenotype_list: list = None,
+) -> list:
+    """Adds the phenotype nodes and edges for the diseases in `disease_MIMs` to the graph.
+
+    This is a hash join of the phenotype annotations against the HPO tags on the HPO accession number.
+    Nodes and edges are added in the same order as the original nested scan of `hpo_tags`, and only the first disease seen with each phenotype receives a `has_a_phenotype` edge.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to add the phenotypes to.
+    phenotype_by_disease : list
+        An iterable of `[disease_MIM, disease, hpo_ID]` rows, such as the rows of `Phenotype_by_disease.csv`.
+    hpo_tags : list
+        A list of `[hpo_ID, phenotype]` pairs, such as the rows of `HPO_to_tag.csv`.
+    disease_MIMs : list
+        The MIM numbers of the diseases in the graph.
+    phenotype_list : list, optional
+        The list of phenotypes already in the graph, which is extended in place.
+
+    Returns
+    -------
+    list
+        The list of phenotypes in the graph in the order that they were added.
+    """
+
+    if phenotype_list is None:
+        phenotype_list = []
+
+    hpo_index = index_hpo_tags(hpo_tags)
+    disease_MIM_set = set(disease_MIMs)
+    phenotype_set = set(phenotype_list)
+
+    for disease_MIM, disease, hpo_ID in phenotype_by_disease:
+        if disease_MIM not in disease_MIM_set:
+            continue
+        for phenotype in hpo_index.get(hpo_ID, ()):
+            if phenotype not in phenotype_set:
+                phenotype_set.add(phenotype)
+                phenotype_list.append(phenotype)
+                G.add_node(phenotype, category='phenotype', hpo_id=hpo_ID, class_type='individual')
+                # if REFLEXIVE:
+                G.add_edge(phenotype, 'phenotype', relation='is_a')
+                G.add_edge(disease, phenotype, relation='has_a_phenotype')
+
+    return phenotype_list
+
+
+####################################################################################################################################################################################
+# ADD PROTEIN DATA                                                                                                                                                                  #
+#  The file proteinatlas.csv has tabular data on different protein characteristics                                                                                                 #
+# data is on 20,090 proteins that links gene to protein name                                                                                                                       #
+# [0]  |    [1]        |       [2]      |      [3]    |       [4]       |     [5]           |            [6]      |         [7]       |   [8]  | [9]   | [10]  | 11 |     |12    | #
+# Gene |Protein Name   |	Uniprot_num Protein Class |	Biologic process |Molecular function |Disease involvement  | Protein_location  |    MW  | domain|motif  |location | length| #
+####################################################################################################################################################################################
+
+
+def protein_columns(proteins: pd.DataFrame) -> dict:
+    """Resolves the columns of a protein table by their header names.
+
+    Parameters
+    ----------
+    proteins : pd.DataFrame
+        The `protein_list.csv` table of a disease.
+
+    Returns
+    -------
+    dict
+        The header name of the column of each field of `PROTEIN_COLUMNS`.
+    """
+
+    headers = {str(column).lstrip('\ufeff').strip().lower(): column for column in proteins.columns}
+    columns = {}
+    for field, names in PROTEIN_COLUMNS.items():
+        column = next((headers[name] for name in names if name in headers), None)
+        if column is None:
+            raise KeyError(f"The protein table has no {field} column, expected one of {names}")
+        columns[field] = column
+
+    return columns
+
+
+def protein_frames(proteins: pd.DataFrame) -> tuple:
+    """Expands a protein table into deduplicated frames of the nodes and edges that it adds to the graph.
+
+    The pipe-delimited columns are exploded in bulk, and the rows are ordered as if each protein were added one at a time, so that the graph has the same node and edge order.
+    As with repeated `add_node` and `add_edge` calls, each node and edge keeps the position of its first occurrence and the attributes of its last.
+
+    Parameters
+    ----------
+    proteins : pd.DataFrame
+        The `protein_list.csv` table of a disease.
+
+    Returns
+    -------
+    tuple
+        The protein table with its columns renamed to the fields of `PROTEIN_COLUMNS`.
+        The node frame with the `node`, its last `category` (missing for the genes and supernodes, which are only added as edge endpoints), the category of its `first_category` record, and the last protein `row` of the table that its protein attributes come from.
+        The edge frame with the `source`, `relation`, and `target` of each edge.
+    """
+
+    columns = protein_columns(proteins)
+    # Object columns keep the node labels as native Python values
+    table = pd.DataFrame({
+        field: proteins[column].astype(object).to_numpy()
+        for field, column in columns.items()
+    })
+    rows = table.index.to_series()
+
+    def node_frame(rows, step, node, category, item=0, order=0):
+        return pd.DataFrame({
+            'row': rows, 'step': step, 'item': item, 'order': order,
+            'node': node, 'category': category,
+        })
+
+    def edge_frame(rows, step, source, relation, target, item=0, order=0):
+        return pd.DataFrame({
+            'row': rows, 'step': step, 'item': item, 'order': order,
+            'source': source, 'relation': relation, 'target': target,
+        })
+
+    # The steps follow the order in which each protein row used to add its nodes and edges, and the supernodes and genes are listed where their edges would first add them
+    node_parts = [
+        node_frame(rows, 0, table['chromosome'], 'chromosome'),
+        node_frame(rows, 0, 'chromosome', None, order=1),
+        node_frame(rows, 1, table['gene'], None),
+        node_frame(rows, 2, table['protein'], 'protein'),
+        node_frame(rows, 2, 'protein', None, order=1),
+    ]
+    edge_parts = [
+        edge_frame(rows, 0, table['chromosome'], 'is_a', 'chromosome'),
+        edge_frame(rows, 1, table['gene'], 'is_on_chromosome', table['chromosome']),
+        edge_frame(rows, 2, table['protein'], 'is_a', 'protein'),
+        edge_frame(rows, 3, table['gene'], 'codes_for', table['protein']),
+    ]
+    for k, (field, relation, is_a_first, skip_substring) in enumerate(PROTEIN_ATTRIBUTES):
+        values = table[field]
+        if skip_substring:
+            values = values[~values.str.contains('none', regex=False)]
+        values = values.str.split('|').explode()
+        if not skip_substring:
+            values = values[~values.index.isin(values.index[values == 'none'])]
+        value_rows = values.index.to_series()
+        item = values.groupby(level=0).cumcount()
+        protein = table['protein'].reindex(values.index)
+        node_parts.append(node_frame(value_rows, 3 + k, values, field, item))
+        node_parts.append(node_frame(value_rows, 3 + k, field, None, item, 1))
+        edge_parts.append(edge_frame(value_rows, 4 + k, values, 'is_a', field, item, 0 if is_a_first else 1))
+        edge_parts.append(edge_frame(value_rows, 4 + k, protein, relation, values, item, 1 if is_a_first else 0))
+
+    nodes = pd.concat(node_parts, ignore_index=True).sort_values(['row', 'step', 'item', 'order'], kind='stable')
+    # A node keeps its last category, the protein attributes of its last protein row, and the attribute order of its first record
+    records = nodes[nodes['category'].notna()]
+    last = records.drop_duplicates('node', keep='last')[['node', 'category']]
+    first = records.drop_duplicates('node')[['node', 'category']].rename(columns={'category': 'first_category'})
+    protein_rows = records[records['category'] == 'protein'].drop_duplicates('node', keep='last')[['node', 'row']]
+    nodes = nodes[['node']].drop_duplicates('node')
+    for attributes in (last, first, protein_rows):
+        nodes = nodes.merge(attributes, on='node', how='left', sort=False)
+
+    edges = pd.concat(edge_parts, ignore_index=True).sort_values(['row', 'step', 'item', 'order'], kind='stable')
+    edges['relation'] = edges.groupby(['source', 'target'], sort=False)['relation'].transform('last')
+    edges = edges.drop_duplicates(['source', 'target'])[['source', 'relation', 'target']]
+
+    return table, nodes, edges
+
+
+def add_proteins(G: nx.DiGraph, proteins: pd.DataFrame) -> None:
+    """Adds the protein nodes, their attribute nodes, and their edges to the graph.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to add the proteins to.
+    proteins : pd.DataFrame
+        The `protein_list.csv` table, whose columns are resolved by their header names.
+    """
+
+    table, nodes, edges = protein_frames(proteins)
+
+    uniprot = table['uniprot'].tolist()
+    molecular_weight = table['molecular_weight'].tolist()
+    protein_length = table['protein_length'].tolist()
+
+    def node_data(category, first_category, row):
+        if pd.isna(category):
+            return {}
+        if pd.isna(row):
+            return {'category': category, 'class_type': 'individual'}
+        row = int(row)
+        if first_category == 'protein':
+            data = {'category': category, 'uniprot': uniprot[row], 'class_type': 'individual'}
+        else:
+            # A node first added with another category already has its class type before the uniprot id
+            data = {'category': category, 'class_type': 'individual', 'uniprot': uniprot[row]}
+        data['molecular_weight'] = molecular_weight[row]
+        data['protein_length'] = protein_length[row]
+        return data
+
+    G.add_nodes_from(
+        (node, node_data(category, first_category, row))
+        for node, category, first_category, row in zip(
+            nodes['node'].tolist(),
+            nodes['category'].tolist(),
+            nodes['first_category'].tolist(),
+            nodes['row'].tolist(),
+        )
+    )
+    G.add_edges_from(
+        (source, target, {'relation': relation})
+        for source, relation, target in zip(edges['source'].tolist(), edges['relation'].tolist(), edges['target'].tolist())
+    )
+
+
+def build_kg(
+    disease: str,
+    tables: dict,
+    profiler: StageProfiler = None,
+    compact: bool = False,
+    graph: nx.DiGraph = None,
+) -> KnowledgeGraph:
+    """Builds the knowledge graph of a disease from its tables.
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+    tables : dict
+        The tables of the disease, as returned by `load_tables`.
+    profiler : StageProfiler, optional
+        The profiler that records the `variants`, `phenotypes`, and `proteins` stages, by default None.
+    compact : bool, optional
+        If true, collapses the `is_a` edges from the individuals to the supernodes of their categories as they are added, so that they are never stored as edges (see `KnowledgeGraph`), by default False.
+        Only applies to the graph built in memory.
+    graph : nx.DiGraph, optional
+        The empty graph that the nodes and edges are added to, such as a `database.GraphWriter` that writes them straight to a database, by default a new `KnowledgeGraph`.
+
+    Returns
+    -------
+    KnowledgeGraph
+        The knowledge graph of the disease, with its nodes indexed by category, or the given graph.
+    """
+
+    G = KnowledgeGraph(collapse=compact) if graph is None else graph
+    with stage(profiler, 'variants', G):
+        add_supernodes(G)
+        disease_MIMs = add_variants(G, tables["variants"])
+    with stage(profiler, 'phenotypes', G):
+        add_phenotypes(G, tables["phenotype_by_disease"], tables["hpo_tags"], disease_MIMs)
+    with stage(profiler, 'proteins', G):
+        add_proteins(G, tables["proteins"])
+
+    return G
+
+
+def build_database(disease: str, tables: dict, profiler: StageProfiler, file: Path) -> None:
+    """Builds the knowledge graph of a disease straight into a new SQLite database, without holding it in memory.
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+    tables : dict
+        The tables of the disease, as returned by `load_tables`.
+    profiler : StageProfiler
+        The profiler that records the stages of `build_kg` and the indexing of the database, or None.
+    file : Path
+        The location of the database, which must not exist yet.
+    """
+
+    with GraphWriter(file) as writer:
+        build_kg(disease, tables, profiler, graph=writer)
+        with stage(profiler, DATABASE_FILE, writer):
+            writer.finish()
+
+
+def summarize(G: nx.DiGraph) -> dict:
+    """Summarizes the size and contents of a knowledge graph.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph to summarize.
+
+    Returns
+    -------
+    dict
+        The number of nodes and edges, the isolated nodes, and the unique edge attributes of the graph, counting its collapsed memberships as edges.
+    """
+
+    edge_attributes = []
+    connected = set()
+    n_edges = 0
+    for u, v, attributes in iter_edges(G):
+        n_edges += 1
+        connected.update((u, v))
+        if attributes not in edge_attributes:
+            edge_attributes.append(attributes)
+
+    return {
+        "nodes": G.number_of_nodes(),
+        "edges": n_edges,
+        "isolated_nodes": [node for node in G if node not in connected],
+        "edge_attributes": edge_attributes,
+    }
+
+
+def input_digests(disease: str, exports: list = EXPORTS, lerche_memberships: bool = True) -> dict:
+    """Computes the content hashes of the input files of each export of a disease.
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+    exports : list, optional
+        The file names of the exports, by default `EXPORTS`.
+    lerche_memberships : bool, optional
+        If false, the Lerche exports omit the `is_a` statements of the category memberships, which is recorded as an extra input of only those exports so that their default builds are stale, by default True.
+
+    Returns
+    -------
+    dict
+        The content hashes of the input files by their names, by the file name of each export.
+    """
+
+    inputs = {name: file_digest(input_file(disease, name)) for name in INPUT_FILES}
+    lerche_inputs = inputs if lerche_memberships else dict(inputs, omit_is_a="true")
+
+    return {name: lerche_inputs if split_codec(name)[0] in LERCHE_EXPORTS else inputs for name in exports}
+
+
+def find_stale(manifest: dict, out_dir: Path, exports: list, inputs: dict, code: str) -> list:
+    """Finds the exports that are missing or out of date with `manifest.stale_artifacts`, given the inputs of each export from `input_digests`."""
+    return [name for name in exports if stale_artifacts(manifest, out_dir, [name], inputs[name], code)]
+
+
+def code_digest() -> str:
+    """Computes the content hash of the generator code, which covers `GENERATOR_VERSION` and the `GENERATOR_MODULES`.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 digest of the generator code.
+    """
+
+    digest = hashlib.sha256(GENERATOR_VERSION.encode())
+    for module in GENERATOR_MODULES:
+        digest.update(file_digest(Path(__file__).parent.joinpath(module)).encode())
+
+    return digest.hexdigest()
+
+
+def stale_exports(
+    disease: str,
+    exports: list = EXPORTS,
+    force: bool = False,
+    lerche_memberships: bool = True,
+) -> list:
+    """Finds the exports of a disease that are missing or out of date according to the manifest of its results folder.
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+    exports : list, optional
+        The file names of the requested exports, by default `EXPORTS`.
+    force : bool, optional
+        If true, treats every export as stale, by default False.
+    lerche_memberships : bool, optional
+        If false, the Lerche exports omit the `is_a` statements of the category memberships, by default True.
+
+    Returns
+    -------
+    list
+        The file names of the stale exports.
+    """
+
+    if force:
+        return list(exports)
+
+    out_dir = output_dir(disease)
+    inputs = input_digests(disease, exports, lerche_memberships)
+    return find_stale(read_manifest(out_dir), out_dir, exports, inputs, code_digest())
+
+
+def run_disease(
+    disease: str,
+    tables: dict = None,
+    draw: bool = False,
+    cache: bool = True,
+    force: bool = False,
+    exports: list = EXPORTS,
+    profile: bool = False,
+    profiler: StageProfiler = None,
+    export_processes: int = 1,
+    compact: bool = False,
+    lerche_memberships: bool = True,
+    shards: int = None,
+    shard_balance: str = 'count',
+) -> dict:
+    """Builds and exports the knowledge graph of a disease, skipping the build if none of its exports are stale.
+
+    Every build writes the timings, peak process memory, and graph size of its stages to `build_report.json` in the results folder.
+    If the exports include the SQLite database `knowledge_graph.sqlite`, every build writes the graph straight into it rather than building it in memory, and the other exports are streamed out of it.
+    With a number of shards, `edge_attributes_lerche.txt` is also split into balanced shards in `lerche_shards/` whenever its shards are out of date, because its statements or the requested shards changed (see `shards.shards_stale`).
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+    tables : dict, optional
+        The tables of the disease, which are loaded with `load_tables` if not provided.
+    draw : bool, optional
+        If true, draws a low-resolution plot of the graph, by default False.
+    cache : bool, optional
+        If true, loads the tables from the on-disk cache of parsed tables when they are not provided, by default True.
+    force : bool, optional
+        If true, rebuilds every export even if it is up to date, by default False.
+    exports : list, optional
+        The file names of the requested exports, by default `EXPORTS`.
+    profile : bool, optional
+        If true, dumps the `cProfile` statistics of each stage to the `profile/` subfolder of the results folder and traces the Python memory of each stage, by default False.
+    profiler : StageProfiler, optional
+        The profiler that already holds the earlier stages of this build, such as loading the tables that are provided, by default a new one.
+    export_processes : int, optional
+        The number of worker processes writing the exports concurrently, by default 1 to write them in this process (see `export.export_kg`).
+    compact : bool, optional
+        If true, collapses the category memberships of the graph while it is built in memory, which leaves the exports unchanged (see `build_kg`), by default False.
+    lerche_memberships : bool, optional
+        If false, the Lerche exports omit the `is_a` statements of the category memberships, by default True.
+    shards : int, optional
+        The number of shards of `edge_attributes_lerche.txt`, which must be one of the exports, by default None to write no shards.
+    shard_balance : str, optional
+        Either 'count' to balance the number of statements of the shards, or 'bytes' to balance their sizes, by default 'count'.
+
+    Returns
+    -------
+    dict
+        The summary of the graph from `summarize` along with the name of the disease, the locations of its exported files, the names of the exports that were rebuilt, the location of the build report if it was rebuilt, and the folder of the shards if they are requested.
+    """
+
+    if shards and LERCHE_EDGE_ATTRIBUTES not in exports:
+        raise ValueError(f"The shards are split from {LERCHE_EDGE_ATTRIBUTES}, which is not one of the exports")
+
+    out_dir = output_dir(disease)
+    inputs = input_digests(disease, exports, lerche_memberships)
+    code = code_digest()
+    manifest = read_manifest(out_dir)
+    files = {name: out_dir.joinpath(name) for name in exports}
+    stale = list(exports) if force else find_stale(manifest, out_dir, exports, inputs, code)
+    shard_dir = out_dir.joinpath(SHARD_DIR)
+    report = None
+
+    if stale:
+        if profiler is None:
+            profiler = new_profiler(disease, profile)
+        if tables is None:
+            with stage(profiler, 'load'):
+                tables = load_tables(disease, cache=cache)
+
+        if DATABASE_FILE in exports:
+            # The graph is written straight into the database as it is built, and the other exports stream out of it
+            atomic_write(partial(build_database, disease, tables, profiler), files[DATABASE_FILE])
+            stale = [DATABASE_FILE] + [name for name in stale if name != DATABASE_FILE]
+            G = GraphDatabase(files[DATABASE_FILE])
+        else:
+            G = build_kg(disease, tables, profiler, compact)
+
+        if draw:
+            # Draw a low-resolution graph
+            with stage(profiler, 'draw', G):
+                nx.draw_networkx(G.to_networkx() if isinstance(G, GraphDatabase) else expand_memberships(G), with_labels=False)
+
+        manifest["summary"] = summarize(G)
+        export_kg(
+            G,
+            out_dir,
+            [name for name in stale if name != DATABASE_FILE],
+            profiler,
+            export_processes,
+            lerche_memberships,
+        )
+        if isinstance(G, GraphDatabase):
+            G.close()
+        # The shards are only split again if the statements changed, not whenever another export is rebuilt
+        if shards and shards_stale(files[LERCHE_EDGE_ATTRIBUTES], shard_dir, shards, shard_balance):
+            with stage(profiler, SHARD_DIR):
+                write_shards(files[LERCHE_EDGE_ATTRIBUTES], shard_dir, shards, shard_balance)
+        for name in stale:
+            record_artifacts(manifest, {name: files[name]}, inputs[name], code)
+        write_manifest(out_dir, manifest)
+        report = out_dir.joinpath(REPORT_FILE)
+        profiler.write(report, disease=disease, built=stale)
+    elif shards and shards_stale(files[LERCHE_EDGE_ATTRIBUTES], shard_dir, shards, shard_balance):
+        write_shards(files[LERCHE_EDGE_ATTRIBUTES], shard_dir, shards, shard_balance)
+
+    summary = dict(manifest["summary"])
+    summary["disease"] = disease
+    summary["files"] = files
+    summary["built"] = stale
+    summary["report"] = report
+    summary["shards"] = shard_dir if shards else None
+
+    return summary
+
+
+def new_profiler(disease: str, profile: bool = False) -> StageProfiler:
+    """Creates the profiler of a build of a disease.
+
+    Parameters
+    ----------
+    disease : str
+        The name of the disease, one of `DISEASES`.
+    profile : bool, optional
+        If true, the profiler dumps the `cProfile` statistics of each stage to the `profile/` subfolder of the results folder and traces the Python memory of each stage, by default False.
+
+    Returns
+    -------
+    StageProfiler
+        The profiler of the build.
+    """
+
+    if profile:
+        return StageProfiler(output_dir(disease).joinpath(PROFILE_DIR), trace_memory=True)
+
+    return StageProfiler()
+
+
+def build_all(
+    diseases: list = DISEASES,
+    processes: int = None,
+    cache: bool = True,
+    force: bool = False,
+    exports: list = EXPORTS,
+    profile: bool = False,
+    export_processes: int = 1,
+    compact: bool = False,
+    lerche_memberships: bool = True,
+    shards: int = None,
+    shard_balance: str = 'count',
+) -> list:
+    """Builds and exports the knowledge graphs of several diseases in parallel.
+
+    The tables of all diseases with stale exports are loaded once in this process, with identical files shared between diseases, and each of these diseases is then built and exported in its own worker process.
+
+    Parameters
+    ----------
+    diseases : list, optional
+        The names of the diseases to build, by default `DISEASES`.
+    processes : int, optional
+        The number of worker processes, by default the number of diseases with stale exports.
+    cache : bool, optional
+        If true, loads the tables from the on-disk cache of parsed tables, by default True.
+    force : bool, optional
+        If true, rebuilds every export even if it is up to date, by default False.
+    exports : list, optional
+        The file names of the requested exports, by default `EXPORTS`.
+    profile : bool, optional
+        If true, dumps the `cProfile` statistics of each stage of each build, by default False.
+    export_processes : int, optional
+        The number of worker processes writing the exports of each build concurrently, by default 1.
+    compact : bool, optional
+        If true, collapses the category memberships of each graph while it is built, by default False.
+    lerche_memberships : bool, optional
+        If false, the Lerche exports omit the `is_a` statements of the category memberships, by default True.
+    shards : int, optional
+        The number of shards of the `edge_attributes_lerche.txt` of each build, by default None to write no shards.
+    shard_balance : str, optional
+        Either 'count' to balance the number of statements of the shards, or 'bytes' to balance their sizes, by default 'count'.
+
+    Returns
+    -------
+    list
+        The summaries from `run_disease` in the order of `diseases`.
+    """
+
+    memo = {}
+    stale = [disease for disease in diseases if stale_exports(disease, exports, force, lerche_memberships)]
+    profilers = [new_profiler(disease, profile) for disease in stale]
+    tables = []
+    for disease, profiler in zip(stale, profilers):
+        with stage(profiler, 'load'):
+            tables.append(load_tables(disease, memo, cache))
+
+    # Every disease is run with the same options, whether it is rebuilt or up to date
+    build = partial(
+        run_disease,
+        cache=cache,
+        force=force,
+        exports=exports,
+        profile=profile,
+        export_processes=export_processes,
+        compact=compact,
+        lerche_memberships=lerche_memberships,
+        shards=shards,
+        shard_balance=shard_balance,
+    )
+
+    # Only the diseases with stale exports need a worker process
+    summaries = {}
+    if stale:
+        with ProcessPoolExecutor(max_workers=processes or len(stale)) as pool:
+            # Each worker continues the profile of its disease after the tables were loaded here
+            futures = [
+                pool.submit(build, disease, disease_tables, profiler=profiler)
+                for disease, disease_tables, profiler in zip(stale, tables, profilers)
+            ]
+            summaries.update(zip(stale, (future.result() for future in futures)))
+
+    return [summaries[disease] if disease in summaries else build(disease) for disease in diseases]
@@ -0,0 +1,154 @@
+"""
+    manifest.py
+
+# Description
+The build manifest of the `2_kg_gramart` knowledge graph exports, used by `1_kg_gen.py` to skip rebuilding artifacts whose inputs and code are unchanged.
+
+Each results folder holds a `manifest.json` recording, for every exported artifact, the content hashes of the input files and generator code that produced it and the content hash of the artifact itself.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import json
+from pathlib import Path
+
+# Local imports
+from utils import file_digest
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The name of the manifest file in each results folder
+MANIFEST_FILE = 'manifest.json'
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def read_manifest(out_dir: Path) -> dict:
+    """Reads the build manifest of a results folder.
+
+    Parameters
+    ----------
+    out_dir : Path
+        The results folder.
+
+    Returns
+    -------
+    dict
+        The manifest, which is empty if the folder has none or it is unreadable.
+    """
+
+    try:
+        with open(out_dir.joinpath(MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(out_dir: Path, manifest: dict) -> None:
+    """Writes the build manifest of a results folder.
+
+    Parameters
+    ----------
+    out_dir : Path
+        The results folder.
+    manifest : dict
+        The manifest to write.
+    """
+
+    file = out_dir.joinpath(MANIFEST_FILE)
+    temp = file.with_name(f"{file.name}.tmp")
+    with open(temp, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    temp.replace(file)
+
+
+def stale_artifacts(
+    manifest: dict,
+    out_dir: Path,
+    names: list,
+    inputs: dict,
+    code: str,
+) -> list:
+    """Finds the artifacts that must be regenerated.
+
+    An artifact is stale if it has no manifest record, if it was built from different inputs or code, or if the file is missing or has been modified since it was built.
+
+    Parameters
+    ----------
+    manifest : dict
+        The manifest of the results folder from `read_manifest`.
+    out_dir : Path
+        The results folder.
+    names : list
+        The file names of the requested artifacts.
+    inputs : dict
+        The content hashes of the current input files by their names.
+    code : str
+        The content hash of the current generator code.
+
+    Returns
+    -------
+    list
+        The file names of the stale artifacts in the order of `names`.
+    """
+
+    artifacts = manifest.get("artifacts", {})
+    stale = []
+    for name in names:
+        record = artifacts.get(name)
+        file = out_dir.joinpath(name)
+        if (
+            record is None
+            or record["inputs"] != inputs
+            or record["code"] != code
+            or not file.exists()
+            or file_digest(file) != record["output"]
+        ):
+            stale.append(name)
+
+    return stale
+
+
+def record_artifacts(
+    manifest: dict,
+    files: dict,
+    inputs: dict,
+    code: str,
+) -> dict:
+    """Records freshly built artifacts in a manifest.
+
+    Parameters
+    ----------
+    manifest : dict
+        The manifest of the results folder, which is updated in place.
+    files : dict
+        The locations of the built artifacts by their file names.
+    inputs : dict
+        The content hashes of the input files that the artifacts were built from.
+    code : str
+        The content hash of the generator code that built the artifacts.
+
+    Returns
+    -------
+    dict
+        The updated manifest.
+    """
+
+    artifacts = manifest.setdefault("artifacts", {})
+    for name, file in files.items():
+        artifacts[name] = {
+            "inputs": inputs,
+            "code": code,
+            "output": file_digest(file),
+        }
+
+    return manifest
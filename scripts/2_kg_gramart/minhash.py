@@ -0,0 +1,469 @@
+"""
+    minhash.py
+
+# Description
+A MinHash and LSH index of the phenotype profiles of the diseases of the `2_kg_gramart` knowledge graphs, for finding near-duplicate diseases without comparing every pair.
+
+The features of each disease, by default its phenotypes, are hashed by their labels and reduced to a MinHash signature with one vectorized pass of `NUM_PERM` universal hash functions over a sparse incidence matrix.
+The other feature sets are followed through the graph with `similarity.incidence`.
+The fraction of equal values of two signatures estimates the Jaccard similarity of their sets.
+The signatures are split into bands, and the diseases whose signatures agree on every value of a band share a bucket, so that a query only compares the diseases sharing a bucket with it.
+With `b` bands of `r` values, a pair with Jaccard similarity `s` shares a bucket with probability `1 - (1 - s^r)^b`, which rises steeply around `(1 / b)^(1 / r)`.
+As `kg.add_phenotypes` only links each phenotype to the first disease annotated with it, the `has_a_phenotype` edges of one graph are disjoint.
+The phenotypes of the diseases are therefore taken from every annotation of the `Phenotype_by_disease.csv` table (see `annotation_incidence`) when the tables of the graph are given, and an index of the disjoint edges of a graph alone warns that no diseases share a feature.
+
+Run this file with the name of a disease, e.g., `python scripts/2_kg_gramart/minhash.py cmt --query Charcot_Marie_Tooth_disease_type_2E`, to find the most similar diseases of a disease, or with `--recall` to check the buckets against the exact Jaccard similarities.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+import warnings
+import zlib
+from typing import Iterable
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+# Local imports
+from kg import (
+    DISEASES,
+    build_kg,
+    index_hpo_tags,
+    load_tables,
+)
+from similarity import (
+    FEATURES,
+    incidence,
+    top_neighbors,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The Mersenne prime modulus of the universal hash functions, small enough that their products fit in 64 bits
+MERSENNE = (1 << 31) - 1
+
+# The signature value of an empty set, which is larger than every hash value
+EMPTY = MERSENNE
+
+# The default number of hash functions and of the bands that the signatures are split into
+NUM_PERM = 128
+BANDS = 32
+
+# The number of sets whose signatures are computed together
+CHUNK_SIZE = 1024
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def feature_hashes(labels: Iterable) -> np.ndarray:
+    """Hashes feature labels to `uint64` values below `MERSENNE`, which are the same in every graph and process."""
+    return np.fromiter(
+        (zlib.crc32(str(label).encode('utf-8')) % MERSENNE for label in labels),
+        dtype=np.uint64,
+    )
+
+
+def hash_functions(num_perm: int = NUM_PERM, seed: int = 0) -> tuple:
+    """Draws the coefficients of the universal hash functions `(a * x + b) mod MERSENNE`.
+
+    Parameters
+    ----------
+    num_perm : int, optional
+        The number of hash functions, by default `NUM_PERM`.
+    seed : int, optional
+        The seed of the coefficients, by default 0.
+
+    Returns
+    -------
+    tuple
+        The `uint64` arrays of the multipliers `a` and offsets `b` of the hash functions.
+    """
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE, num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE, num_perm, dtype=np.uint64)
+
+    return a, b
+
+
+def signatures(X: sparse.csr_matrix, hashes: np.ndarray, a: np.ndarray, b: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """Computes the MinHash signatures of the rows of an incidence matrix.
+
+    Parameters
+    ----------
+    X : sparse.csr_matrix
+        The incidence matrix of the sets by their features.
+    hashes : np.ndarray
+        The `feature_hashes` of the columns of the matrix.
+    a, b : np.ndarray
+        The coefficients of the `hash_functions`.
+    chunk_size : int, optional
+        The number of rows whose signatures are computed together, by default `CHUNK_SIZE`.
+
+    Returns
+    -------
+    np.ndarray
+        The `n x num_perm` `uint32` signatures, the minimum of each hash function over the features of each row, or `EMPTY` for empty rows.
+    """
+
+    X = sparse.csr_matrix(X)
+    result = np.full((X.shape[0], len(a)), EMPTY, dtype=np.uint32)
+    for start in range(0, X.shape[0], chunk_size):
+        rows = X[start:start + chunk_size]
+        nonempty = np.diff(rows.indptr) > 0
+        if not nonempty.any():
+            continue
+        # The hash values are laid out by hash function, so that each minimum reduces a contiguous run of features
+        values = (a[:, None] * hashes[rows.indices] + b[:, None]) % MERSENNE
+        # The features of the rows are contiguous, so the empty rows are skipped by reducing from the starts of the others
+        result[start:start + rows.shape[0]][nonempty] = np.minimum.reduceat(values, rows.indptr[:-1][nonempty], axis=1).T
+
+    return result
+
+
+def annotation_incidence(tables: dict, diseases: list = ()) -> tuple:
+    """Builds the sparse incidence matrix of the diseases of the tables of a knowledge graph and every phenotype that they are annotated with.
+
+    Unlike the `has_a_phenotype` edges of `kg.add_phenotypes`, a phenotype shared by several diseases is a feature of each of them.
+
+    Parameters
+    ----------
+    tables : dict
+        The tables of the knowledge graph from `kg.load_tables`.
+    diseases : list, optional
+        The labels of the first rows, such as the diseases of the graph, followed by the other annotated diseases, by default none.
+
+    Returns
+    -------
+    tuple
+        The labels of the diseases, the labels of the phenotypes in the order that they are first annotated, and the binary `float64` CSR matrix of the diseases by their phenotypes.
+    """
+
+    hpo_index = index_hpo_tags(tables["hpo_tags"])
+    disease_MIM_set = set(d[2] for d in tables["variants"])
+    rows = {disease: i for i, disease in enumerate(diseases)}
+    columns = {}
+    pairs = set()
+    for disease_MIM, disease, hpo_ID in tables["phenotype_by_disease"]:
+        if disease_MIM not in disease_MIM_set:
+            continue
+        for phenotype in hpo_index.get(hpo_ID, ()):
+            pairs.add((rows.setdefault(disease, len(rows)), columns.setdefault(phenotype, len(columns))))
+
+    pairs = np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+    X = sparse.csr_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(rows), len(columns)))
+
+    return list(rows), list(columns), X
+
+
+def disease_incidence(G: nx.DiGraph, features: list = ('phenotype',), tables: dict = None) -> tuple:
+    """Builds the incidence matrix of the diseases of a knowledge graph and their features, with the phenotypes of the annotation tables if they are given.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph.
+    features : list, optional
+        The names of the feature sets in `similarity.FEATURES`, by default only the phenotypes.
+    tables : dict, optional
+        The tables of the graph, whose annotations replace the `has_a_phenotype` edges as the phenotypes, by default None to use the edges.
+
+    Returns
+    -------
+    tuple
+        The labels of the diseases, the labels of the features, and the binary `float64` CSR matrix of the diseases by their features.
+    """
+
+    if tables is None or 'phenotype' not in features:
+        return incidence(G, features)
+
+    diseases, feature_labels, X = incidence(G, [name for name in features if name != 'phenotype'])
+    diseases, phenotypes, P = annotation_incidence(tables, diseases)
+    X = sparse.vstack([X, sparse.csr_matrix((len(diseases) - X.shape[0], X.shape[1]))])
+
+    # A phenotype with the label of another feature is the same feature
+    known = {label: j for j, label in enumerate(feature_labels)}
+    new = [phenotype for phenotype in phenotypes if phenotype not in known]
+    known.update((phenotype, len(feature_labels) + j) for j, phenotype in enumerate(new))
+    moved = sparse.csr_matrix(
+        (np.ones(len(phenotypes)), (np.arange(len(phenotypes)), [known[phenotype] for phenotype in phenotypes])),
+        shape=(len(phenotypes), len(known)),
+    )
+    X = sparse.hstack([X, sparse.csr_matrix((X.shape[0], len(new)))]) + P @ moved
+    X = X.astype(bool).astype(np.float64).tocsr()
+    X.sort_indices()
+
+    return diseases, feature_labels + new, X
+
+
+# -----------------------------------------------------------------------------
+# CLASSES
+# -----------------------------------------------------------------------------
+
+
+class MinHashIndex:
+    """An LSH index of the MinHash signatures of a collection of labeled sets.
+
+    Attributes
+    ----------
+    labels : list
+        The labels of the indexed sets.
+    label_index : dict
+        The position of each label.
+    a, b : np.ndarray
+        The coefficients of the `hash_functions`.
+    bands : int
+        The number of bands that the signatures are split into.
+    signatures : np.ndarray
+        The `n x num_perm` `uint32` signatures of the sets.
+    bucket_keys : np.ndarray
+        The `bands x m` sorted `uint64` bucket keys of each band of the `m` nonempty sets.
+    bucket_sets : np.ndarray
+        The `bands x m` positions of the sets in the order of their bucket keys.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = 0):
+        if num_perm % bands:
+            raise ValueError(f"The {num_perm} hash functions do not split into {bands} bands of equal size")
+        self.labels = []
+        self.label_index = {}
+        self.a, self.b = hash_functions(num_perm, seed)
+        self.bands = bands
+        self.signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self.bucket_keys = np.zeros((bands, 0), dtype=np.uint64)
+        self.bucket_sets = np.zeros((bands, 0), dtype=np.int64)
+        # The random odd multipliers that combine the values of a band into its bucket key
+        self._band_multipliers = np.random.default_rng(seed + 1).integers(0, 1 << 63, num_perm // bands, dtype=np.uint64) * 2 + 1
+
+    def __len__(self):
+        return len(self.labels)
+
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def from_graph(
+        cls,
+        G: nx.DiGraph,
+        features: list = ('phenotype',),
+        tables: dict = None,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS,
+        seed: int = 0,
+    ) -> "MinHashIndex":
+        """Indexes the feature sets of the diseases of a knowledge graph.
+
+        Parameters
+        ----------
+        G : nx.DiGraph
+            The knowledge graph.
+        features : list, optional
+            The names of the feature sets in `similarity.FEATURES`, by default only the phenotypes.
+        tables : dict, optional
+            The tables of the graph, whose annotations are the phenotypes of the diseases (see `disease_incidence`), by default None to use the `has_a_phenotype` edges.
+        num_perm : int, optional
+            The number of hash functions, by default `NUM_PERM`.
+        bands : int, optional
+            The number of bands, which divides the number of hash functions, by default `BANDS`.
+        seed : int, optional
+            The seed of the hash functions, by default 0.
+
+        Returns
+        -------
+        MinHashIndex
+            The index of the diseases.
+        """
+
+        diseases, feature_labels, X = disease_incidence(G, features, tables)
+
+        return cls(num_perm, bands, seed).fit(diseases, X, feature_labels)
+
+    def fit(self, labels: list, X: sparse.csr_matrix, feature_labels: list) -> "MinHashIndex":
+        """Indexes the rows of an incidence matrix, replacing any indexed sets.
+
+        Warns if several sets are indexed but no two of them share a feature, as every query then only finds the set itself.
+
+        Parameters
+        ----------
+        labels : list
+            The label of each row.
+        X : sparse.csr_matrix
+            The incidence matrix of the sets by their features.
+        feature_labels : list
+            The label of each column, which is hashed so that the signatures of the same features agree across indexes.
+
+        Returns
+        -------
+        MinHashIndex
+            This index.
+        """
+
+        X = sparse.csr_matrix(X)
+        if np.count_nonzero(X.getnnz(axis=1)) > 1 and X.getnnz(axis=0).max(initial=0) <= 1:
+            warnings.warn(
+                f"No two of the {X.shape[0]} indexed sets share a feature, so no pairs of sets are similar. "
+                "The phenotypes of a knowledge graph are only linked to the first disease annotated with them, "
+                "so index the diseases by the phenotypes of their annotation tables or by other features.",
+                stacklevel=2,
+            )
+
+        self.labels = list(labels)
+        self.label_index = {label: i for i, label in enumerate(self.labels)}
+        self.signatures = signatures(X, feature_hashes(feature_labels), self.a, self.b)
+
+        # The empty sets are not put in any bucket, as their signatures would all agree
+        indexed = np.flatnonzero(self.signatures[:, 0] != EMPTY)
+        keys = self.band_keys(self.signatures[indexed]).T
+        order = np.argsort(keys, axis=1, kind='stable')
+        self.bucket_keys = np.take_along_axis(keys, order, axis=1)
+        self.bucket_sets = indexed[order]
+
+        return self
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """Combines the values of each band of signatures into the `n x bands` `uint64` keys of their buckets."""
+        bands = signatures.reshape(len(signatures), self.bands, -1).astype(np.uint64)
+
+        # The products and sums wrap around modulo 2^64
+        return (bands * self._band_multipliers).sum(axis=2, dtype=np.uint64)
+
+    def signature(self, features: Iterable) -> np.ndarray:
+        """Computes the MinHash signature of a set of feature labels."""
+        hashes = feature_hashes(features)
+        if not len(hashes):
+            return np.full(len(self.a), EMPTY, dtype=np.uint32)
+
+        return ((hashes[:, None] * self.a + self.b) % MERSENNE).min(axis=0).astype(np.uint32)
+
+    def candidates(self, signature: np.ndarray) -> np.ndarray:
+        """Finds the sorted positions of the indexed sets that share a bucket with a signature."""
+        if signature[0] == EMPTY:
+            return np.zeros(0, dtype=np.int64)
+        keys = self.band_keys(signature[None, :])[0]
+        found = []
+        for band, key in enumerate(keys):
+            lo = np.searchsorted(self.bucket_keys[band], key, side='left')
+            hi = np.searchsorted(self.bucket_keys[band], key, side='right')
+            found.append(self.bucket_sets[band, lo:hi])
+
+        return np.unique(np.concatenate(found))
+
+    def query(self, item, k: int = 10) -> list:
+        """Finds the indexed sets most similar to a set by their estimated Jaccard similarity.
+
+        Only the sets sharing a bucket with the queried set are compared, so dissimilar sets are never returned.
+
+        Parameters
+        ----------
+        item : Any
+            The label of an indexed set, which is left out of the results, or an iterable of feature labels.
+            An unknown label raises a `KeyError`.
+        k : int, optional
+            The number of results, by default 10.
+
+        Returns
+        -------
+        list
+            The `(label, estimated Jaccard similarity)` pairs of the most similar sets, by descending similarity and then by their order in the index.
+        """
+
+        if isinstance(item, str):
+            position = self.label_index[item]
+            signature = self.signatures[position]
+        else:
+            position = None
+            signature = self.signature(item)
+
+        found = self.candidates(signature)
+        if position is not None:
+            found = found[found != position]
+        estimates = (self.signatures[found] == signature).mean(axis=1)
+        order = np.lexsort((found, -estimates))[:k]
+
+        return [(self.labels[i], float(s)) for i, s in zip(found[order].tolist(), estimates[order].tolist())]
+
+    def recall(self, X: sparse.csr_matrix, threshold: float = 0.5) -> dict:
+        """Checks the buckets of the index against the exact Jaccard similarities of its sets.
+
+        Parameters
+        ----------
+        X : sparse.csr_matrix
+            The incidence matrix that the index was fit to.
+        threshold : float, optional
+            The exact Jaccard similarity from which a pair of sets is expected to share a bucket, by default 0.5.
+
+        Returns
+        -------
+        dict
+            The number of ordered `pairs` of sets with at least the threshold similarity, the number of them `found` in a shared bucket, their `recall`, which is 1 if there are no such pairs, and the mean number of `candidates` of each set.
+        """
+
+        rows, neighbors, _, scores, _ = top_neighbors(X, X.shape[0], 'jaccard')
+        similar = scores >= threshold
+        rows, neighbors = rows[similar], neighbors[similar]
+
+        found = 0
+        candidates = 0
+        for i in range(X.shape[0]):
+            matches = self.candidates(self.signatures[i])
+            candidates += len(matches) - int(i in matches)
+            lo, hi = np.searchsorted(rows, [i, i + 1])
+            found += np.isin(neighbors[lo:hi], matches).sum()
+
+        return {
+            "pairs": len(rows),
+            "found": int(found),
+            "recall": found / len(rows) if len(rows) else 1.0,
+            "candidates": candidates / max(X.shape[0], 1),
+        }
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='minhash.py',
+        description='Finds near-duplicate diseases of a knowledge graph with a MinHash and LSH index of their phenotype profiles.',
+    )
+    parser.add_argument('disease', choices=DISEASES, help='the disease whose knowledge graph is built')
+    parser.add_argument(
+        '--features',
+        nargs='+',
+        choices=list(FEATURES),
+        default=['phenotype'],
+        help='the feature sets that the diseases are compared by (default: phenotype)',
+    )
+    parser.add_argument('--num-perm', type=int, default=NUM_PERM, help='the number of hash functions')
+    parser.add_argument('--bands', type=int, default=BANDS, help='the number of bands of the signatures')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the hash functions')
+    parser.add_argument('--query', nargs='*', default=[], help='the diseases whose most similar diseases are listed')
+    parser.add_argument('-k', type=int, default=10, help='the number of listed diseases (default: 10)')
+    parser.add_argument('--recall', type=float, default=None, metavar='THRESHOLD', help='check the buckets against the exact pairs with this Jaccard similarity')
+    args = parser.parse_args()
+
+    # The phenotypes of the diseases are taken from every annotation of the tables rather than the disjoint edges of the graph
+    tables = load_tables(args.disease)
+    G = build_kg(args.disease, tables)
+    diseases, feature_labels, X = disease_incidence(G, args.features, tables)
+    index = MinHashIndex(args.num_perm, args.bands, args.seed).fit(diseases, X, feature_labels)
+    print(f"{len(index)} diseases indexed by {', '.join(args.features)} with {args.num_perm} hash functions in {args.bands} bands")
+
+    for disease in args.query:
+        print(disease)
+        for label, estimate in index.query(disease, args.k):
+            print(f"    {estimate:.3f} {label}")
+    if args.recall is not None:
+        report = index.recall(X, args.recall)
+        print(f"{report['found']} of {report['pairs']} pairs with Jaccard similarity >= {args.recall} share a bucket (recall {report['recall']:.3f}), {report['candidates']:.1f} candidates per disease")
@@ -0,0 +1,221 @@
+"""
+    profiling.py
+
+# Description
+Per-stage instrumentation of the `2_kg_gramart` knowledge graph builds.
+
+A `StageProfiler` times each stage of a build, from loading the tables through every export, and records the peak memory of the process so far and the size of the graph at the end of each stage.
+The peak resident memory of the process (`process_max_rss`) never decreases, so it is the peak of the build up to the end of a stage rather than the memory of the stage itself, which is traced as `python_peak` with `--profile`.
+`1_kg_gen.py` writes its report to `build_report.json` in the results folder of each rebuilt disease, and with `--profile` it also dumps the `cProfile` statistics of each stage to a `profile/` subfolder.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import (
+    contextmanager,
+    nullcontext,
+)
+from pathlib import Path
+
+import networkx as nx
+
+# The peak resident set size is only available on Unix
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The name of the build report in each results folder
+REPORT_FILE = 'build_report.json'
+
+# The name of the folder of the per-stage profiles in each results folder
+PROFILE_DIR = 'profile'
+
+# The number of functions listed in the text summary of each profile
+PROFILE_LINES = 30
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def max_rss() -> int:
+    """Gets the peak resident set size of this process.
+
+    Returns
+    -------
+    int
+        The high-water mark of the resident memory of the process in bytes, or None if the platform does not report it.
+    """
+
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes and macOS reports bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def stage(profiler: "StageProfiler", name: str, G: nx.DiGraph = None):
+    """Enters a stage of a profiler, if there is one.
+
+    Parameters
+    ----------
+    profiler : StageProfiler
+        The profiler of the build, or None to skip the instrumentation.
+    name : str
+        The name of the stage.
+    G : nx.DiGraph, optional
+        The graph whose size is recorded at the end of the stage.
+
+    Returns
+    -------
+    ContextManager
+        The context of the stage.
+    """
+
+    return nullcontext() if profiler is None else profiler.stage(name, G)
+
+# -----------------------------------------------------------------------------
+# CLASSES
+# -----------------------------------------------------------------------------
+
+
+class StageProfiler:
+    """Records the wall time, peak process memory, and graph size of the stages of a knowledge graph build.
+
+    Attributes
+    ----------
+    stages : list
+        The records of the completed stages in the order that they ran.
+    profile_dir : Path
+        The folder that the `cProfile` statistics of each stage are dumped to, or None to skip profiling.
+    trace_memory : bool
+        If true, also records the peak memory allocated by Python in each stage with `tracemalloc`, which slows the build down.
+    """
+
+    def __init__(self, profile_dir: Path = None, trace_memory: bool = False):
+        self.stages = []
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+
+    @contextmanager
+    def stage(self, name: str, G: nx.DiGraph = None):
+        """Instruments a stage of the build.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage, which names its profile files.
+        G : nx.DiGraph, optional
+            The graph whose number of nodes and edges is recorded at the end of the stage.
+        """
+
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        profile = cProfile.Profile() if self.profile_dir is not None else None
+
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            elapsed = time.perf_counter() - start
+            # The peak memory of the whole process up to the end of the stage
+            fields = {"process_max_rss": max_rss()}
+            if self.trace_memory:
+                fields["python_peak"] = tracemalloc.get_traced_memory()[1]
+                if tracing:
+                    tracemalloc.stop()
+            if profile is not None:
+                self.dump_profile(name, profile)
+            self.record(name, elapsed, G, **fields)
+
+    def record(self, name: str, elapsed: float, G: nx.DiGraph = None, **fields) -> None:
+        """Records a stage that was timed elsewhere, such as in a worker process.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        elapsed : float
+            The wall time of the stage in seconds.
+        G : nx.DiGraph, optional
+            The graph whose number of nodes and edges is recorded with the stage.
+        **fields
+            Additional entries of the record of the stage.
+        """
+
+        record = {"stage": name, "time": elapsed, **fields}
+        if G is not None:
+            record["nodes"] = G.number_of_nodes()
+            record["edges"] = G.number_of_edges()
+        self.stages.append(record)
+
+    def dump_profile(self, name: str, profile: cProfile.Profile) -> None:
+        """Dumps the statistics of a stage as a `pstats` file and a text summary sorted by cumulative time.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+        profile : cProfile.Profile
+            The profile of the stage.
+        """
+
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(self.profile_dir.joinpath(f"{name}.prof"))
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(PROFILE_LINES)
+        self.profile_dir.joinpath(f"{name}.prof.txt").write_text(summary.getvalue())
+
+    def report(self) -> dict:
+        """Summarizes the recorded stages.
+
+        Returns
+        -------
+        dict
+            The records of the stages and their total time.
+        """
+
+        return {
+            # Stages timed in worker processes overlap the stage of their pool
+            "total_time": sum(record["time"] for record in self.stages if not record.get("worker")),
+            "stages": list(self.stages),
+        }
+
+    def write(self, file: Path, **info) -> None:
+        """Writes the report of the recorded stages to a JSON file.
+
+        Parameters
+        ----------
+        file : Path
+            The location of the report.
+        **info
+            Additional entries of the report, such as the name of the disease.
+        """
+
+        with open(file, 'w') as f:
+            json.dump({**info, **self.report()}, f, indent=4)
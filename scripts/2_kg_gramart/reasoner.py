@@ -0,0 +1,316 @@
+"""
+    reasoner.py
+
+# Description
+A forward-chaining RDFS materializer for the ontologies of the `2_kg_gramart` knowledge graphs.
+
+The triples of an ontology are interned to integer ids (see `store.TripleStore`), and the RDFS entailment rules for domains, ranges, subproperties, and subclasses are applied until no new triples follow.
+The rules are evaluated semi-naively: every round only joins the triples that were new in the previous round against all known triples, so that no derivation is repeated.
+Each join is a hash join of integer columns on `pandas`, and the derived triples are deduplicated against the known triples with a hash anti-join.
+The inferred triples are written to a separate N-Triples file, along with a report of the derivations, new triples, and time of each rule.
+
+Run this file with the name of a disease, e.g., `python scripts/2_kg_gramart/reasoner.py cmt`, to materialize the ontology of its knowledge graph, or with `--rdf <file>` to materialize an RDF export, whose results are written next to it unless a disease or `--out` folder is given.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from rdflib import (
+    RDF,
+    RDFS,
+    Literal,
+)
+
+# Local imports
+from compressed import open_output
+from kg import (
+    DISEASES,
+    build_kg,
+    load_tables,
+    output_dir,
+)
+from store import TripleStore
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The names of the inferred triples and the inference report in each results folder
+INFERRED_FILE = 'rdf_inferred.nt'
+INFERENCE_REPORT = 'inference_report.json'
+
+# The applied RDFS entailment rules by their names in the RDF 1.1 Semantics, and a short name of each
+RULES = {
+    # (p rdfs:domain c), (x p y) -> (x rdf:type c)
+    'rdfs2': 'domain',
+    # (p rdfs:range c), (x p y) -> (y rdf:type c) for a resource y
+    'rdfs3': 'range',
+    # (p rdfs:subPropertyOf q), (q rdfs:subPropertyOf r) -> (p rdfs:subPropertyOf r)
+    'rdfs5': 'subproperty_transitivity',
+    # (p rdfs:subPropertyOf q), (x p y) -> (x q y)
+    'rdfs7': 'subproperty',
+    # (c rdfs:subClassOf d), (x rdf:type c) -> (x rdf:type d)
+    'rdfs9': 'type_propagation',
+    # (c rdfs:subClassOf d), (d rdfs:subClassOf e) -> (c rdfs:subClassOf e)
+    'rdfs11': 'subclass_transitivity',
+}
+
+# The columns of a frame of triples
+COLUMNS = ['s', 'p', 'o']
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def to_frame(triples: np.ndarray) -> pd.DataFrame:
+    """Wraps an `m x 3` integer array of triples as a frame of `s`, `p`, and `o` columns."""
+    return pd.DataFrame(np.asarray(triples, dtype=np.int64).reshape(-1, 3), columns=COLUMNS)
+
+
+def with_predicate(triples: pd.DataFrame, predicate: int) -> pd.DataFrame:
+    """Selects the triples of a predicate, or none if the predicate is not a term of the ontology."""
+    if predicate is None:
+        return triples.iloc[:0]
+
+    return triples[triples['p'].to_numpy() == predicate]
+
+
+def derive(left: pd.DataFrame, right: pd.DataFrame, on: tuple, head: tuple) -> pd.DataFrame:
+    """Derives the conclusions of a rule with two premises by a hash join of their triples.
+
+    Parameters
+    ----------
+    left : pd.DataFrame
+        The triples matching the first premise.
+    right : pd.DataFrame
+        The triples matching the second premise.
+    on : tuple
+        The columns of the left and right triples that the premises share.
+    head : tuple
+        The subject, predicate, and object of the conclusion, each a column of the joined triples with an `_l` or `_r` suffix, or a fixed term id.
+
+    Returns
+    -------
+    pd.DataFrame
+        The concluded triples, with one row per derivation.
+    """
+
+    joined = left.merge(right, left_on=on[0], right_on=on[1], suffixes=('_l', '_r'))
+    if not len(joined):
+        return to_frame(np.zeros((0, 3)))
+
+    return pd.DataFrame({
+        column: joined[term].to_numpy() if isinstance(term, str) else np.full(len(joined), term, dtype=np.int64)
+        for column, term in zip(COLUMNS, head)
+    })
+
+
+def materialize(store: TripleStore) -> tuple:
+    """Computes the RDFS closure of the triples of a store by semi-naive forward chaining.
+
+    Parameters
+    ----------
+    store : TripleStore
+        The store of the ontology.
+
+    Returns
+    -------
+    tuple
+        The terms of the store followed by any RDF and RDFS vocabulary that the ontology does not use.
+        The `m x 3` `int64` array of the ids of the inferred triples, which are not in the store, in the order that they were derived.
+        The report of the evaluation with the number of rounds and the derivations, new triples, and time of each rule.
+    """
+
+    # The vocabulary of the conclusions gets ids after the terms of the store if the ontology does not use it
+    terms = list(store.terms)
+    ids = dict(store.ids)
+    for term in (RDF.type, RDFS.subClassOf, RDFS.subPropertyOf):
+        if term not in ids:
+            ids[term] = len(terms)
+            terms.append(term)
+    rdf_type, domain, range_ = ids[RDF.type], ids.get(RDFS.domain), ids.get(RDFS.range)
+    subclass, subproperty = ids[RDFS.subClassOf], ids[RDFS.subPropertyOf]
+    is_literal = np.fromiter((isinstance(term, Literal) for term in terms), dtype=bool, count=len(terms))
+
+    known = to_frame(store.indexes['spo'][0])
+    delta = known
+    inferred = []
+    report = {rule: {"derivations": 0, "new": 0, "time": 0.0} for rule in RULES}
+    rounds = 0
+    while len(delta):
+        rounds += 1
+        conclusions = []
+        # The new triples of the last round are the tail of the known triples
+        old = known.iloc[:len(known) - len(delta)]
+
+        def fire(rule: str, joins: list) -> None:
+            start = time.perf_counter()
+            derived = pd.concat([derive(*join) for join in joins], ignore_index=True)
+            if rule == 'rdfs3':
+                # A literal object has no type in RDF, so only the ranges of resources are concluded
+                derived = derived[~is_literal[derived['s'].to_numpy()]]
+            report[rule]["derivations"] += len(derived)
+            report[rule]["time"] += time.perf_counter() - start
+            conclusions.append((rule, derived))
+
+        # Each rule joins the new triples of the last round for either premise, against all triples for the other premise or only the older ones, so that each derivation is made once
+        type_head = ('s_l', rdf_type, 'o_r')
+        fire('rdfs2', [
+            (delta, with_predicate(known, domain), ('p', 's'), type_head),
+            (old, with_predicate(delta, domain), ('p', 's'), type_head),
+        ])
+        range_head = ('o_l', rdf_type, 'o_r')
+        fire('rdfs3', [
+            (delta, with_predicate(known, range_), ('p', 's'), range_head),
+            (old, with_predicate(delta, range_), ('p', 's'), range_head),
+        ])
+        chain_head = ('s_l', subproperty, 'o_r')
+        fire('rdfs5', [
+            (with_predicate(delta, subproperty), with_predicate(known, subproperty), ('o', 's'), chain_head),
+            (with_predicate(old, subproperty), with_predicate(delta, subproperty), ('o', 's'), chain_head),
+        ])
+        lift_head = ('s_l', 'o_r', 'o_l')
+        fire('rdfs7', [
+            (delta, with_predicate(known, subproperty), ('p', 's'), lift_head),
+            (old, with_predicate(delta, subproperty), ('p', 's'), lift_head),
+        ])
+        fire('rdfs9', [
+            (with_predicate(delta, rdf_type), with_predicate(known, subclass), ('o', 's'), type_head),
+            (with_predicate(old, rdf_type), with_predicate(delta, subclass), ('o', 's'), type_head),
+        ])
+        chain_head = ('s_l', subclass, 'o_r')
+        fire('rdfs11', [
+            (with_predicate(delta, subclass), with_predicate(known, subclass), ('o', 's'), chain_head),
+            (with_predicate(old, subclass), with_predicate(delta, subclass), ('o', 's'), chain_head),
+        ])
+
+        # The new triples of each rule are the ones that neither earlier rules nor earlier rounds concluded
+        delta = []
+        for rule, derived in conclusions:
+            start = time.perf_counter()
+            derived = derived.drop_duplicates()
+            new = derived.merge(known, on=COLUMNS, how='left', indicator=True)
+            new = new.loc[new['_merge'].to_numpy() == 'left_only', COLUMNS]
+            known = pd.concat([known, new], ignore_index=True)
+            report[rule]["new"] += len(new)
+            report[rule]["time"] += time.perf_counter() - start
+            delta.append(new)
+        delta = pd.concat(delta, ignore_index=True)
+        inferred.append(delta)
+
+    inferred = pd.concat(inferred, ignore_index=True).to_numpy(dtype=np.int64) if inferred else np.zeros((0, 3), np.int64)
+
+    return terms, inferred.reshape(-1, 3), {"rounds": rounds, "rules": report}
+
+
+def write_inferred(terms: list, inferred: np.ndarray, file: Path) -> None:
+    """Writes inferred triples to an N-Triples file.
+
+    Parameters
+    ----------
+    terms : list
+        The `rdflib` term of each id.
+    inferred : np.ndarray
+        The `m x 3` array of the term ids of the inferred triples.
+    file : Path
+        The location of the N-Triples file, which is compressed if it has the extension of a codec.
+    """
+
+    terms = [term.n3() for term in terms]
+    with open_output(file, 'w') as f:
+        for s, p, o in inferred.tolist():
+            f.write(f"{terms[s]} {terms[p]} {terms[o]} .\n")
+
+
+def materialize_file(store: TripleStore, out_dir: Path) -> dict:
+    """Materializes the ontology of a store and writes its inferred triples and inference report to a results folder.
+
+    Parameters
+    ----------
+    store : TripleStore
+        The store of the ontology.
+    out_dir : Path
+        The results folder.
+
+    Returns
+    -------
+    dict
+        The inference report, with the number of asserted and inferred triples, the total time, and the locations of the written files.
+    """
+
+    start = time.perf_counter()
+    terms, inferred, report = materialize(store)
+    report["time"] = time.perf_counter() - start
+    report["asserted"] = len(store)
+    report["inferred"] = len(inferred)
+
+    write_inferred(terms, inferred, out_dir.joinpath(INFERRED_FILE))
+    with open(out_dir.joinpath(INFERENCE_REPORT), 'w') as f:
+        json.dump(report, f, indent=4)
+    report["files"] = [out_dir.joinpath(INFERRED_FILE), out_dir.joinpath(INFERENCE_REPORT)]
+
+    return report
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='reasoner.py',
+        description='Materializes the RDFS entailments of the ontology of a knowledge graph.',
+    )
+    parser.add_argument(
+        'disease',
+        nargs='?',
+        choices=DISEASES,
+        default=None,
+        help='the disease whose knowledge graph is built, and whose results folder is written to by default',
+    )
+    parser.add_argument(
+        '--rdf',
+        type=Path,
+        default=None,
+        help='materialize this RDF export, e.g., rdf.owl or rdf.nt.gz, instead of building the knowledge graph',
+    )
+    parser.add_argument(
+        '--out',
+        type=Path,
+        default=None,
+        help='the folder of the inferred triples and report (default: the results folder of the disease, or the folder of the RDF export)',
+    )
+    args = parser.parse_args()
+
+    if args.disease is None and args.rdf is None:
+        parser.error("either a disease or an --rdf export is required")
+    if args.rdf is not None:
+        store = TripleStore.from_rdf(args.rdf)
+    else:
+        store = TripleStore.from_graph(build_kg(args.disease, load_tables(args.disease)))
+    if args.out is not None:
+        out_dir = args.out
+    elif args.disease is not None:
+        out_dir = output_dir(args.disease)
+    else:
+        out_dir = args.rdf.parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    report = materialize_file(store, out_dir)
+
+    print(f"{report['asserted']} asserted and {report['inferred']} inferred triples in {report['rounds']} rounds, {report['time']:.3f} s")
+    for rule, counts in report["rules"].items():
+        print(f"    {rule:<8} {RULES[rule]:<26} {counts['derivations']:>10} derivations {counts['new']:>10} new {counts['time']:>9.4f} s")
+    for file in report["files"]:
+        print("Written to", file)
@@ -0,0 +1,290 @@
+"""
+    shards.py
+
+# Description
+Balanced shards of the Lerche statement file `edge_attributes_lerche.txt`, so that each worker of a distributed run can parse only its own slice of the statements.
+
+The statement file is split into contiguous shards, balanced either by their number of statements or by their size in bytes, so that the shards concatenated in order reproduce the statement file exactly.
+The line boundaries are found with one vectorized scan of the file, and each shard is written in parallel with a single large write from a view of the file contents.
+The shards are written to `lerche_shards/` in the results folder along with `shards.json`, a manifest of the statements, size, and SHA-256 hash of each shard and the hash of the statement file they were split from.
+
+Run this file with a statement file, e.g., `python scripts/2_kg_gramart/shards.py <results>/edge_attributes_lerche.txt -n 8 --balance bytes`, or build the shards along with the exports with `1_kg_gen.py --shards 8`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Local imports
+from export import (
+    LERCHE_EDGE_ATTRIBUTES,
+    atomic_write,
+)
+from utils import file_digest
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The name of the folder of the shards in each results folder
+SHARD_DIR = 'lerche_shards'
+
+# The name of the shard manifest in the folder of the shards
+SHARD_MANIFEST = 'shards.json'
+
+# The file names of the shards start with the name of the statement file
+SHARD_STEM = Path(LERCHE_EDGE_ATTRIBUTES).stem
+
+# The quantities that the shards can be balanced by
+BALANCE = ['count', 'bytes']
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def shard_name(index: int) -> str:
+    """Gets the file name of a shard from its index."""
+    return f"{SHARD_STEM}_{index:04d}.txt"
+
+
+def line_ends(data: bytes) -> np.ndarray:
+    """Finds the end of each line of the contents of a statement file.
+
+    Parameters
+    ----------
+    data : bytes
+        The contents of the statement file.
+
+    Returns
+    -------
+    np.ndarray
+        The `int64` offset just past each line, including a last line without a newline.
+    """
+
+    ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n')) + 1
+    if len(data) and (not len(ends) or ends[-1] != len(data)):
+        ends = np.append(ends, len(data))
+
+    return ends.astype(np.int64)
+
+
+def shard_bounds(ends: np.ndarray, n: int, balance: str = 'count') -> np.ndarray:
+    """Splits the lines of a statement file into contiguous balanced shards.
+
+    Parameters
+    ----------
+    ends : np.ndarray
+        The offset just past each line, from `line_ends`.
+    n : int
+        The number of shards.
+    balance : str, optional
+        Either 'count' to balance the number of statements of the shards, or 'bytes' to balance their sizes, by default 'count'.
+
+    Returns
+    -------
+    np.ndarray
+        The `n + 1` line indices where the shards start, ending with the number of lines.
+    """
+
+    if n < 1:
+        raise ValueError(f"The number of shards must be positive, not {n}")
+    if balance not in BALANCE:
+        raise ValueError(f"The shards are balanced by one of {BALANCE}, not {balance!r}")
+
+    if balance == 'count':
+        return np.arange(n + 1, dtype=np.int64) * len(ends) // n
+
+    # Cut after the first line that reaches each multiple of an n-th of the file
+    total = ends[-1] if len(ends) else 0
+    bounds = np.searchsorted(ends, np.arange(1, n, dtype=np.int64) * total / n, side='left') + 1
+
+    return np.concatenate([[0], np.minimum(bounds, len(ends)), [len(ends)]]).astype(np.int64)
+
+
+def write_shard(view: memoryview, file: Path) -> str:
+    """Atomically writes the statements of one shard with a single write, returning their SHA-256 hash."""
+    atomic_write(lambda temp: temp.write_bytes(view), file)
+
+    return hashlib.sha256(view).hexdigest()
+
+
+def write_shards(
+    source: Path,
+    out_dir: Path,
+    n: int,
+    balance: str = 'count',
+    processes: int = None,
+) -> dict:
+    """Splits a statement file into balanced shards.
+
+    Shards left over from an earlier split into more shards are removed, and the shard manifest is written last, so that it only describes complete shards.
+
+    Parameters
+    ----------
+    source : Path
+        The location of the statement file.
+    out_dir : Path
+        The folder of the shards, which is created if it does not exist.
+    n : int
+        The number of shards.
+    balance : str, optional
+        Either 'count' to balance the number of statements of the shards, or 'bytes' to balance their sizes, by default 'count'.
+    processes : int, optional
+        The number of threads writing the shards, by default one per processor.
+
+    Returns
+    -------
+    dict
+        The shard manifest.
+    """
+
+    data = source.read_bytes()
+    ends = line_ends(data)
+    bounds = shard_bounds(ends, n, balance)
+    offsets = np.concatenate([[0], ends])[bounds].tolist()
+    view = memoryview(data)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    names = [shard_name(i) for i in range(n)]
+    # The shards are written from views of the file contents, which threads share without copies
+    with ThreadPoolExecutor(max_workers=processes) as pool:
+        hashes = list(pool.map(
+            lambda i: write_shard(view[offsets[i]:offsets[i + 1]], out_dir.joinpath(names[i])),
+            range(n),
+        ))
+
+    for file in out_dir.glob(f"{SHARD_STEM}_*.txt"):
+        if file.name not in names:
+            file.unlink()
+
+    manifest = {
+        "source": source.name,
+        "source_sha256": hashlib.sha256(view).hexdigest(),
+        "balance": balance,
+        "statements": len(ends),
+        "bytes": len(data),
+        "shards": [
+            {
+                "file": names[i],
+                "statements": int(bounds[i + 1] - bounds[i]),
+                "bytes": offsets[i + 1] - offsets[i],
+                "sha256": hashes[i],
+            }
+            for i in range(n)
+        ],
+    }
+    atomic_write(lambda temp: temp.write_text(json.dumps(manifest, indent=4)), out_dir.joinpath(SHARD_MANIFEST))
+
+    return manifest
+
+
+def read_shard_manifest(out_dir: Path) -> dict:
+    """Reads the shard manifest of a folder of shards.
+
+    Parameters
+    ----------
+    out_dir : Path
+        The folder of the shards.
+
+    Returns
+    -------
+    dict
+        The shard manifest, which is empty if the folder has none or it is unreadable.
+    """
+
+    try:
+        with open(out_dir.joinpath(SHARD_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def verify_shards(out_dir: Path) -> list:
+    """Checks the shards of a folder against their manifest.
+
+    Parameters
+    ----------
+    out_dir : Path
+        The folder of the shards.
+
+    Returns
+    -------
+    list
+        The file names of the shards that are missing or whose hashes differ from the manifest.
+    """
+
+    return [
+        shard["file"]
+        for shard in read_shard_manifest(out_dir).get("shards", [])
+        if not out_dir.joinpath(shard["file"]).exists() or file_digest(out_dir.joinpath(shard["file"])) != shard["sha256"]
+    ]
+
+
+def shards_stale(source: Path, out_dir: Path, n: int, balance: str = 'count') -> bool:
+    """Checks if the shards of a statement file must be split again.
+
+    Parameters
+    ----------
+    source : Path
+        The location of the statement file.
+    out_dir : Path
+        The folder of the shards.
+    n : int
+        The requested number of shards.
+    balance : str, optional
+        The requested balance of the shards, by default 'count'.
+
+    Returns
+    -------
+    bool
+        True if the shards were split from other statements or with other options, or if any of them were modified.
+    """
+
+    manifest = read_shard_manifest(out_dir)
+
+    return (
+        len(manifest.get("shards", [])) != n
+        or manifest.get("balance") != balance
+        or manifest.get("source_sha256") != file_digest(source)
+        or bool(verify_shards(out_dir))
+    )
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='shards.py',
+        description='Splits a Lerche statement file into balanced shards with a manifest of their sizes and hashes.',
+    )
+    parser.add_argument('source', type=Path, help='the edge_attributes_lerche.txt statement file')
+    parser.add_argument('-n', '--shards', type=int, required=True, help='the number of shards')
+    parser.add_argument('--balance', choices=BALANCE, default='count', help='balance the number of statements or the bytes of the shards')
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        default=None,
+        help=f'the folder of the shards, by default {SHARD_DIR}/ next to the statement file',
+    )
+    parser.add_argument('--processes', type=int, default=None, help='the number of writer threads (default: one per processor)')
+    args = parser.parse_args()
+
+    out_dir = args.output if args.output is not None else args.source.parent.joinpath(SHARD_DIR)
+    manifest = write_shards(args.source, out_dir, args.shards, args.balance, args.processes)
+    for shard in manifest["shards"]:
+        print(f"{shard['file']}: {shard['statements']} statements, {shard['bytes']} bytes")
+    print(f"{len(manifest['shards'])} shards of {manifest['statements']} statements written to {out_dir}")
@@ -0,0 +1,308 @@
+"""
+    similarity.py
+
+# Description
+The disease-disease similarity of a `2_kg_gramart` knowledge graph by the phenotypes, genes, inheritance, and protein features that the diseases share.
+
+The graph is projected onto a sparse disease x feature incidence matrix, where each feature set is a path of relations from the diseases.
+For example, the protein features are reached through the causative genes and their proteins, and each path is followed with sparse products of the relation adjacency matrices of a `CompactGraph`.
+The shared features of every pair of diseases are the sparse product of the incidence matrix with its transpose, which is computed for a chunk of diseases at a time so that memory stays bounded.
+Only the top-k neighbors of each disease by Jaccard, cosine, or overlap similarity are kept from each chunk.
+As `kg.add_phenotypes` only links each phenotype to the first disease annotated with it, the phenotypes of the diseases of one graph are disjoint, and their similarity comes from the other feature sets.
+
+Run this file with the name of a disease, e.g., `python scripts/2_kg_gramart/similarity.py cmt --features gene protein -k 10`, to write the top-k neighbor table of its diseases to its results folder.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Local imports
+from compact import CompactGraph
+from kg import (
+    DISEASES,
+    PROTEIN_ATTRIBUTES,
+    build_kg,
+    load_tables,
+    output_dir,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The relation paths from a disease to each set of its features, where each step follows any of its relations
+FEATURES = {
+    'phenotype': [('has_a_phenotype',)],
+    'gene': [('is_caused_by',)],
+    'inheritance': [('inherited_by',)],
+    'protein': [('is_caused_by',), ('codes_for',), tuple(relation for _, relation, _, _ in PROTEIN_ATTRIBUTES)],
+}
+
+# The similarity measures of two feature sets
+METRICS = ['jaccard', 'cosine', 'overlap']
+
+# The number of diseases whose similarities are computed together
+CHUNK_SIZE = 1024
+
+# The columns of a neighbor table
+NEIGHBOR_COLUMNS = ['disease', 'neighbor', 'rank', 'similarity', 'shared']
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def similarity_file(metric: str) -> str:
+    """Gets the name of the neighbor table of a similarity measure in each results folder."""
+    return f"disease_similarity_{metric}.csv"
+
+
+def relation_matrix(graph: CompactGraph, relations: tuple) -> sparse.csr_matrix:
+    """Builds the sparse adjacency matrix of the edges of a graph with any of a set of relations.
+
+    Parameters
+    ----------
+    graph : CompactGraph
+        The knowledge graph.
+    relations : tuple
+        The followed relations.
+
+    Returns
+    -------
+    sparse.csr_matrix
+        The `n x n` matrix with a one for each followed edge from its source to its target node id.
+    """
+
+    n = graph.number_of_nodes()
+    codes = [graph.relations.codes[relation] for relation in relations if relation in graph.relations.codes]
+    keep = np.isin(graph.relation_codes, codes)
+    sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(graph.indptr))[keep]
+
+    return sparse.csr_matrix((np.ones(len(sources)), (sources, graph.indices[keep])), shape=(n, n))
+
+
+def incidence(
+    G: nx.DiGraph,
+    features: list = tuple(FEATURES),
+    category: str = 'disease',
+) -> tuple:
+    """Projects a knowledge graph onto the sparse incidence matrix of the entities of a category and their features.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph.
+    features : list, optional
+        The names of the feature sets in `FEATURES`, by default all of them.
+    category : str, optional
+        The category of the entities, by default 'disease'.
+
+    Returns
+    -------
+    tuple
+        The labels of the entities, the labels of the features, and the binary `float64` CSR matrix of the entities by the features that any of their feature paths reaches.
+    """
+
+    graph = CompactGraph.from_networkx(G)
+    roots = graph.categories.get(category, np.zeros(0, dtype=np.int32))
+    # The supernode of the category is not one of its entities
+    roots = roots[[graph.nodes[root] != category for root in roots.tolist()]] if len(roots) else roots
+    n = graph.number_of_nodes()
+    selection = sparse.csr_matrix((np.ones(len(roots)), (np.arange(len(roots)), roots)), shape=(len(roots), n))
+
+    steps = {}
+    reached = sparse.csr_matrix((len(roots), n))
+    for name in features:
+        paths = selection
+        for relations in FEATURES[name]:
+            if relations not in steps:
+                steps[relations] = relation_matrix(graph, relations)
+            # The paths are binarized at each step, so that their counts stay bounded
+            paths = (paths @ steps[relations]).astype(bool).astype(np.float64)
+        reached = reached + paths
+
+    reached = reached.astype(bool).astype(np.float64).tocsr()
+    columns = np.unique(reached.indices)
+    X = reached[:, columns]
+    X.sort_indices()
+
+    return [graph.nodes[root] for root in roots.tolist()], [graph.nodes[column] for column in columns.tolist()], X
+
+
+def similarity(shared: np.ndarray, left: np.ndarray, right: np.ndarray, metric: str = 'jaccard') -> np.ndarray:
+    """Computes the similarities of pairs of feature sets from their sizes and shared features.
+
+    Parameters
+    ----------
+    shared : np.ndarray
+        The number of features that each pair shares.
+    left, right : np.ndarray
+        The number of features of the first and second set of each pair.
+    metric : str, optional
+        One of `METRICS`, by default 'jaccard'.
+
+    Returns
+    -------
+    np.ndarray
+        The similarity of each pair.
+    """
+
+    if metric == 'jaccard':
+        return shared / (left + right - shared)
+    if metric == 'cosine':
+        return shared / np.sqrt(left * right)
+    if metric == 'overlap':
+        return shared / np.minimum(left, right)
+    raise ValueError(f"Unknown similarity metric {metric!r}, expected one of {METRICS}")
+
+
+def top_neighbors(
+    X: sparse.csr_matrix,
+    k: int = 10,
+    metric: str = 'jaccard',
+    chunk_size: int = CHUNK_SIZE,
+) -> tuple:
+    """Finds the k most similar other rows of each row of an incidence matrix with chunked sparse products.
+
+    Only the pairs that share a feature are similar, so a row has fewer than k neighbors if fewer rows share its features.
+    Ties are broken by the order of the rows.
+
+    Parameters
+    ----------
+    X : sparse.csr_matrix
+        The binary incidence matrix of the entities by their features.
+    k : int, optional
+        The number of neighbors of each row, by default 10.
+    metric : str, optional
+        One of `METRICS`, by default 'jaccard'.
+    chunk_size : int, optional
+        The number of rows whose similarities are computed together, by default `CHUNK_SIZE`.
+
+    Returns
+    -------
+    tuple
+        The `int64` row, neighbor, and rank arrays, and the `float64` similarity and shared feature arrays of the neighbors, sorted by row and rank.
+    """
+
+    if metric not in METRICS:
+        raise ValueError(f"Unknown similarity metric {metric!r}, expected one of {METRICS}")
+    X = sparse.csr_matrix(X, dtype=np.float64)
+    sizes = np.asarray(X.sum(axis=1)).ravel()
+    transposed = X.T.tocsr()
+
+    parts = []
+    for start in range(0, X.shape[0], chunk_size):
+        products = X[start:start + chunk_size] @ transposed
+        products.sort_indices()
+        products = products.tocoo()
+        # The rows of the chunk are kept in the smallest integer type, which a stable sort orders with a radix sort
+        local = products.row.astype(np.min_scalar_type(products.shape[0]))
+        neighbors = products.col.astype(np.int64)
+        keep = local.astype(np.int64) + start != neighbors
+        local, neighbors, shared = local[keep], neighbors[keep], products.data[keep]
+        rows = local.astype(np.int64) + start
+        scores = similarity(shared, sizes[rows], sizes[neighbors], metric)
+
+        # Rank the neighbors of each row by descending similarity and keep the first k, where the stable sorts keep ties in the order of the neighbors
+        order = np.argsort(-scores, kind='stable')
+        order = order[np.argsort(local[order], kind='stable')]
+        rows, neighbors, scores, shared = rows[order], neighbors[order], scores[order], shared[order]
+        counts = np.bincount(local, minlength=products.shape[0])
+        ranks = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        keep = ranks < k
+        parts.append((rows[keep], neighbors[keep], ranks[keep] + 1, scores[keep], shared[keep]))
+
+    if not parts:
+        return tuple(np.zeros(0, dtype=dtype) for dtype in (np.int64, np.int64, np.int64, np.float64, np.float64))
+
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+def neighbor_table(labels: list, neighbors: tuple) -> pd.DataFrame:
+    """Labels the top neighbors of `top_neighbors` as a table with the `NEIGHBOR_COLUMNS`."""
+    rows, columns, ranks, scores, shared = neighbors
+    labels = np.asarray(labels, dtype=object)
+
+    return pd.DataFrame({
+        'disease': labels[rows],
+        'neighbor': labels[columns],
+        'rank': ranks,
+        'similarity': scores,
+        'shared': shared.astype(np.int64),
+    }, columns=NEIGHBOR_COLUMNS)
+
+
+def disease_similarity(
+    G: nx.DiGraph,
+    features: list = tuple(FEATURES),
+    k: int = 10,
+    metric: str = 'jaccard',
+    chunk_size: int = CHUNK_SIZE,
+) -> pd.DataFrame:
+    """Finds the top-k most similar diseases of each disease of a knowledge graph by their shared features.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph.
+    features : list, optional
+        The names of the feature sets in `FEATURES`, by default all of them.
+    k : int, optional
+        The number of neighbors of each disease, by default 10.
+    metric : str, optional
+        One of `METRICS`, by default 'jaccard'.
+    chunk_size : int, optional
+        The number of diseases whose similarities are computed together, by default `CHUNK_SIZE`.
+
+    Returns
+    -------
+    pd.DataFrame
+        The neighbor table of the diseases, with the `NEIGHBOR_COLUMNS`.
+    """
+
+    diseases, _, X = incidence(G, features)
+
+    return neighbor_table(diseases, top_neighbors(X, k, metric, chunk_size))
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='similarity.py',
+        description='Writes the top-k most similar diseases of each disease of a knowledge graph by their shared features.',
+    )
+    parser.add_argument('disease', choices=DISEASES, help='the disease whose knowledge graph is built')
+    parser.add_argument(
+        '--features',
+        nargs='+',
+        choices=list(FEATURES),
+        default=list(FEATURES),
+        help='the feature sets that the diseases are compared by (default: all of them)',
+    )
+    parser.add_argument('--metric', choices=METRICS, default='jaccard', help='the similarity measure (default: jaccard)')
+    parser.add_argument('-k', type=int, default=10, help='the number of neighbors of each disease (default: 10)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='the number of diseases compared together')
+    parser.add_argument('--out', type=Path, default=None, help='the location of the neighbor table (default: in the results folder)')
+    args = parser.parse_args()
+
+    G = build_kg(args.disease, load_tables(args.disease))
+    table = disease_similarity(G, args.features, args.k, args.metric, args.chunk_size)
+    file = args.out or output_dir(args.disease).joinpath(similarity_file(args.metric))
+    file.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(file, index=False)
+    print(f"{len(table)} neighbors of {table['disease'].nunique()} diseases by {', '.join(args.features)} written to {file}")
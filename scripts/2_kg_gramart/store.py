@@ -0,0 +1,508 @@
+"""
+    store.py
+
+# Description
+An indexed in-memory triple store for the ontologies of the `2_kg_gramart` knowledge graphs.
+
+A `TripleStore` interns the RDF terms of an ontology to integer ids and keeps the triples sorted in SPO, POS, and OSP order, so that every triple pattern is answered with a binary search over one index instead of a scan.
+`TripleStore.query` answers basic graph patterns with filters, which covers the SPARQL queries of `cmt/knowledge_graph_cmt_simple.py`, by matching each pattern against its index, filtering each variable once per distinct term, and hash joining the patterns on their shared variables.
+Stores are built directly from a knowledge graph with `TripleStore.from_graph` or from an RDF export with `TripleStore.from_rdf`.
+
+Run this file to benchmark the store against `rdflib` SPARQL on the same queries over synthetic knowledge graphs.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+import math
+import time
+from array import array
+from pathlib import Path
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+)
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from rdflib import RDF
+from rdflib.term import Identifier
+
+# Local imports
+from compressed import read_rdf
+from export import (
+    EX,
+    build_rdf,
+    iter_triples,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The positions of the subject, predicate, and object in the sort order of each index
+INDEXES = {
+    'spo': (0, 1, 2),
+    'pos': (1, 2, 0),
+    'osp': (2, 0, 1),
+}
+
+# The index answering the patterns with each combination of bound positions
+INDEX_OF_BOUND = {
+    (): 'spo',
+    (0,): 'spo',
+    (0, 1): 'spo',
+    (0, 1, 2): 'spo',
+    (1,): 'pos',
+    (1, 2): 'pos',
+    (2,): 'osp',
+    (0, 2): 'osp',
+}
+
+# The queries of the benchmark, as SPARQL and as the equivalent patterns, filters, and selected variables of `TripleStore.query`
+PREFIX = f"PREFIX ex: <{EX}>\nPREFIX xsd: <http://www.w3.org/2001/XMLSchema#>\n"
+QUERIES = {
+    # The proteins with a molecular weight over 10, as in `cmt/knowledge_graph_cmt_simple.py`
+    'heavy_proteins': (
+        PREFIX + """
+        SELECT ?protein ?mw
+        WHERE {
+            ?protein a ex:protein;
+                ex:protein_weight ?mw.
+            FILTER (xsd:double(?mw) > 10)
+        }
+        """,
+        [('?protein', RDF.type, EX.protein), ('?protein', EX.protein_weight, '?mw')],
+        {'?mw': lambda mw: numeric(mw) > 10},
+        ['?protein', '?mw'],
+    ),
+    # The phenotypes of the diseases caused by each gene
+    'gene_phenotypes': (
+        PREFIX + """
+        SELECT ?gene ?phenotype
+        WHERE {
+            ?disease ex:is_caused_by ?gene;
+                ex:has_a_phenotype ?phenotype.
+        }
+        """,
+        [('?disease', EX.is_caused_by, '?gene'), ('?disease', EX.has_a_phenotype, '?phenotype')],
+        {},
+        ['?gene', '?phenotype'],
+    ),
+    # The diseases caused by the genes of proteins with a molecular weight over 100
+    'heavy_protein_diseases': (
+        PREFIX + """
+        SELECT ?protein ?disease
+        WHERE {
+            ?gene ex:codes_for ?protein.
+            ?protein ex:protein_weight ?mw.
+            ?disease ex:is_caused_by ?gene.
+            FILTER (xsd:double(?mw) > 100)
+        }
+        """,
+        [('?gene', EX.codes_for, '?protein'), ('?protein', EX.protein_weight, '?mw'), ('?disease', EX.is_caused_by, '?gene')],
+        {'?mw': lambda mw: numeric(mw) > 100},
+        ['?protein', '?disease'],
+    ),
+}
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def is_variable(term) -> bool:
+    """Checks if a term of a triple pattern is a variable.
+
+    Parameters
+    ----------
+    term : Any
+        The term, either an `rdflib` term or a variable name starting with '?'.
+
+    Returns
+    -------
+    bool
+        True if the term is a variable.
+    """
+
+    if isinstance(term, Identifier):
+        return False
+    if isinstance(term, str) and term.startswith('?'):
+        return True
+
+    raise ValueError(f"Pattern terms must be rdflib terms or variables starting with '?', got {term!r}")
+
+
+def numeric(value) -> float:
+    """Converts the value of a literal to a number for comparisons in filters.
+
+    The data properties of the ontology are typed as strings, so that numeric filters compare their values as numbers like the `xsd:double` casts of SPARQL.
+
+    Parameters
+    ----------
+    value : Any
+        The Python value of the literal.
+
+    Returns
+    -------
+    float
+        The value as a number, or NaN if it is not numeric, which fails every comparison.
+    """
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+# -----------------------------------------------------------------------------
+# CLASSES
+# -----------------------------------------------------------------------------
+
+
+class TripleStore:
+    """An in-memory RDF triple store with integer-interned terms and SPO, POS, and OSP indexes.
+
+    Attributes
+    ----------
+    terms : list
+        The `rdflib` term of each id.
+    ids : dict
+        The id of each term.
+    indexes : dict
+        The unique triples sorted in the order of each of `INDEXES`, as a tuple of the sorted `m x 3` `int32` array of their ids in that order and the `int64` keys of their first two ids.
+    """
+
+    def __init__(self, terms: list, triples: np.ndarray):
+        self.terms = terms
+        self.ids = {term: i for i, term in enumerate(terms)}
+        self.indexes = {}
+        for name, order in INDEXES.items():
+            rows = np.unique(triples[:, order], axis=0) if len(triples) else triples.reshape(0, 3)
+            keys = rows[:, 0].astype(np.int64) * len(terms) + rows[:, 1]
+            self.indexes[name] = (rows, keys)
+
+    @classmethod
+    def from_triples(cls, statements: Iterable[tuple]) -> "TripleStore":
+        """Builds a store from a series of triples.
+
+        Parameters
+        ----------
+        statements : Iterable[tuple]
+            The `(subject, predicate, object)` triples of `rdflib` terms, where repeated triples are stored once.
+
+        Returns
+        -------
+        TripleStore
+            The store of the triples.
+        """
+
+        ids = {}
+        terms = []
+        codes = array('i')
+        for statement in statements:
+            for term in statement:
+                code = ids.get(term)
+                if code is None:
+                    code = ids[term] = len(terms)
+                    terms.append(term)
+                codes.append(code)
+
+        return cls(terms, np.frombuffer(codes, dtype=np.int32).reshape(-1, 3))
+
+    @classmethod
+    def from_graph(cls, G: nx.DiGraph) -> "TripleStore":
+        """Builds a store of the ontology of a knowledge graph without building an `rdflib.Graph`.
+
+        Parameters
+        ----------
+        G : nx.DiGraph
+            The knowledge graph.
+
+        Returns
+        -------
+        TripleStore
+            The store of the triples of `export.iter_triples`.
+        """
+
+        return cls.from_triples(iter_triples(G))
+
+    @classmethod
+    def from_rdf(cls, file: Path, format: str = None) -> "TripleStore":
+        """Builds a store from a plain or compressed RDF export.
+
+        Parameters
+        ----------
+        file : Path
+            The location of the RDF file, e.g., `rdf.owl` or `rdf.nt.gz`.
+        format : str, optional
+            The `rdflib` format of the file, by default guessed from its extension.
+
+        Returns
+        -------
+        TripleStore
+            The store of the triples of the file.
+        """
+
+        return cls.from_triples(read_rdf(file, format))
+
+    def __len__(self) -> int:
+        return len(self.indexes['spo'][0])
+
+    def match(self, s=None, p=None, o=None) -> np.ndarray:
+        """Finds the triples matching a pattern of bound and free positions.
+
+        Parameters
+        ----------
+        s, p, o : Identifier, optional
+            The `rdflib` terms of the bound positions, or None for free positions.
+
+        Returns
+        -------
+        np.ndarray
+            The `k x 3` `int32` array of the subject, predicate, and object ids of the matching triples.
+        """
+
+        pattern = (s, p, o)
+        bound = tuple(i for i, term in enumerate(pattern) if term is not None)
+        if any(pattern[i] not in self.ids for i in bound):
+            return np.empty((0, 3), dtype=np.int32)
+
+        # The bound positions are always a prefix of the sort order of their index
+        order = INDEXES[INDEX_OF_BOUND[bound]]
+        rows, keys = self.indexes[INDEX_OF_BOUND[bound]]
+        key = [self.ids[pattern[i]] for i in order if pattern[i] is not None]
+        if len(key) == 1:
+            lo, hi = np.searchsorted(rows[:, 0], key[0], 'left'), np.searchsorted(rows[:, 0], key[0], 'right')
+        elif len(key) >= 2:
+            pair = key[0] * len(self.terms) + key[1]
+            lo, hi = np.searchsorted(keys, pair, 'left'), np.searchsorted(keys, pair, 'right')
+            if len(key) == 3:
+                third = rows[lo:hi, 2]
+                lo, hi = lo + np.searchsorted(third, key[2], 'left'), lo + np.searchsorted(third, key[2], 'right')
+        else:
+            lo, hi = 0, len(rows)
+
+        # Restore the subject, predicate, object layout of the rows of the index
+        return rows[lo:hi][:, np.argsort(order)]
+
+    def triples(self, s=None, p=None, o=None) -> Iterator[tuple]:
+        """Iterates over the triples matching a pattern as `rdflib` terms, like `rdflib.Graph.triples`.
+
+        Parameters
+        ----------
+        s, p, o : Identifier, optional
+            The `rdflib` terms of the bound positions, or None for free positions.
+
+        Yields
+        ------
+        tuple
+            The subject, predicate, and object of each matching triple.
+        """
+
+        for s_id, p_id, o_id in self.match(s, p, o).tolist():
+            yield self.terms[s_id], self.terms[p_id], self.terms[o_id]
+
+    def keep(self, ids: np.ndarray, predicate: Callable) -> np.ndarray:
+        """Evaluates a filter once per distinct term of a column of ids.
+
+        Parameters
+        ----------
+        ids : np.ndarray
+            The term ids.
+        predicate : Callable
+            The filter, called with the Python value of each term, e.g., the string of a literal typed as a string.
+
+        Returns
+        -------
+        np.ndarray
+            The boolean mask of the ids whose terms pass the filter.
+        """
+
+        unique, inverse = np.unique(ids, return_inverse=True)
+        passed = np.fromiter(
+            (bool(predicate(self.terms[i].toPython())) for i in unique.tolist()),
+            dtype=bool,
+            count=len(unique),
+        )
+
+        return passed[inverse]
+
+    def bindings(self, pattern: tuple, filters: dict) -> pd.DataFrame:
+        """Matches a single triple pattern and applies the filters of its variables.
+
+        Parameters
+        ----------
+        pattern : tuple
+            The subject, predicate, and object of the pattern, each an `rdflib` term or a variable name starting with '?'.
+        filters : dict
+            The filter of each variable, see `TripleStore.keep`.
+
+        Returns
+        -------
+        pd.DataFrame
+            The term ids bound to each variable of the pattern, one row per matching triple, or for a ground pattern without variables, no columns and one row if its triple exists or none otherwise.
+        """
+
+        free = [is_variable(term) for term in pattern]
+        rows = self.match(*(None if is_free else term for term, is_free in zip(pattern, free)))
+        columns = {}
+        mask = np.ones(len(rows), dtype=bool)
+        for position, (term, is_free) in enumerate(zip(pattern, free)):
+            if not is_free:
+                continue
+            if term in columns:
+                # A variable repeated within the pattern binds the same term
+                mask &= rows[:, position] == columns[term]
+            else:
+                columns[term] = rows[:, position]
+        for variable, column in columns.items():
+            if variable in filters:
+                mask &= self.keep(column, filters[variable])
+
+        if not columns:
+            return pd.DataFrame(index=range(int(mask.any())))
+
+        return pd.DataFrame({variable: column[mask] for variable, column in columns.items()})
+
+    def query(self, patterns: list, filters: dict = None, select: list = None) -> list:
+        """Answers a basic graph pattern with filters, like a SPARQL `SELECT` query.
+
+        The patterns are joined on their shared variables starting from the pattern with the fewest matches, and each filter is applied to the matches of every pattern binding its variable before any join.
+        A ground pattern without variables only checks that its triple exists, keeping every solution if it does and none otherwise.
+
+        Parameters
+        ----------
+        patterns : list
+            The triple patterns, each a tuple of `rdflib` terms and variable names starting with '?'.
+        filters : dict, optional
+            The filter of each variable, called with the Python value of the bound term, by default None.
+        select : list, optional
+            The variables of the results, by default every variable in order of appearance.
+
+        Returns
+        -------
+        list
+            The tuples of the `rdflib` terms bound to the selected variables of each solution.
+        """
+
+        filters = {} if filters is None else filters
+        tables = [self.bindings(tuple(pattern), filters) for pattern in patterns]
+        if select is None:
+            select = list(dict.fromkeys(term for pattern in patterns for term in pattern if is_variable(term)))
+
+        # The ground patterns are checks that bind no variables
+        if any(not len(table) for table in tables if not len(table.columns)):
+            return []
+        tables = [table for table in tables if len(table.columns)]
+        if not tables:
+            return [()]
+
+        # Greedily join the smallest table that shares a variable with the solutions so far
+        tables.sort(key=len)
+        solutions = tables.pop(0)
+        while tables:
+            shared = [i for i, table in enumerate(tables) if set(table.columns) & set(solutions.columns)]
+            table = tables.pop(shared[0] if shared else 0)
+            on = [variable for variable in table.columns if variable in solutions.columns]
+            solutions = solutions.merge(table, on=on) if on else solutions.merge(table, how='cross')
+
+        return [
+            tuple(self.terms[i] for i in row)
+            for row in solutions[select].to_numpy().tolist()
+        ]
+
+
+def benchmark(n_diseases: int, repeats: int = 3) -> dict:
+    """Benchmarks the store against `rdflib` SPARQL on the `QUERIES` over the ontology of a synthetic knowledge graph.
+
+    Parameters
+    ----------
+    n_diseases : int
+        The number of diseases of the synthetic data of `benchmark.synthetic_data`.
+    repeats : int, optional
+        The number of runs of each query, of which the fastest is reported, by default 3.
+
+    Returns
+    -------
+    dict
+        The number of triples, the build time of each store, and the number of solutions, best time of each store, and agreement of the results of each query.
+    """
+
+    # The generator is only imported by the benchmark, so that importing the store does not load the whole pipeline
+    from benchmark import synthetic_data
+    from kg import (
+        build_kg,
+        read_tables,
+    )
+
+    G = build_kg("synthetic", read_tables(synthetic_data(n_diseases)))
+
+    def best(run):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = run()
+            times.append(time.perf_counter() - start)
+        return result, min(times)
+
+    g, rdflib_build = best(lambda: build_rdf(G))
+    store, store_build = best(lambda: TripleStore.from_graph(G))
+    result = {
+        "triples": len(store),
+        "rdflib_build": rdflib_build,
+        "store_build": store_build,
+        "queries": {},
+    }
+    for name, (sparql, patterns, filters, select) in QUERIES.items():
+        expected, rdflib_time = best(lambda: [tuple(row) for row in g.query(sparql)])
+        solutions, store_time = best(lambda: store.query(patterns, filters, select))
+        result["queries"][name] = {
+            "solutions": len(solutions),
+            "rdflib_time": rdflib_time,
+            "store_time": store_time,
+            "match": sorted(solutions) == sorted(expected),
+        }
+
+    return result
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='store.py',
+        description='Benchmarks the indexed triple store against rdflib SPARQL on synthetic knowledge graphs.',
+    )
+    parser.add_argument(
+        'sizes',
+        nargs='*',
+        type=int,
+        default=[1000, 10000],
+        help='the numbers of diseases of the synthetic knowledge graphs',
+    )
+    parser.add_argument('--repeats', type=int, default=3, help='the number of runs of each query')
+    args = parser.parse_args()
+
+    print(f"{'diseases':>10} {'triples':>10} {'query':<24} {'solutions':>10} {'rdflib s':>10} {'store s':>10} {'speedup':>8} match")
+    for size in args.sizes:
+        result = benchmark(size, args.repeats)
+        print(
+            f"{size:>10} {result['triples']:>10} {'(build)':<24} {'':>10} "
+            f"{result['rdflib_build']:>10.3f} {result['store_build']:>10.3f} "
+            f"{result['rdflib_build'] / result['store_build']:>8.1f}"
+        )
+        for name, query in result["queries"].items():
+            print(
+                f"{size:>10} {result['triples']:>10} {name:<24} {query['solutions']:>10} "
+                f"{query['rdflib_time']:>10.4f} {query['store_time']:>10.4f} "
+                f"{query['rdflib_time'] / query['store_time']:>8.1f} {query['match']}"
+            )
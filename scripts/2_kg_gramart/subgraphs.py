@@ -0,0 +1,331 @@
+"""
+    subgraphs.py
+
+# Description
+The statements within k hops of each entity of a `2_kg_gramart` knowledge graph, for per-entity analyses instead of the single flat `edge_attributes_lerche.txt`.
+
+The adjacency of the graph is precomputed once as the CSR arrays of a `CompactGraph`, and a batch of entities is searched at once by a breadth-first search over arrays of `(entity, node)` pairs.
+The batches run in parallel worker processes, which each write the statements of their entities to one file per entity, in the form and order of `edge_attributes_lerche.txt`.
+The `is_a` edges to the category supernodes connect every entity of a category in two hops, so they can be excluded from the search.
+
+Run this file with the name of a disease, e.g., `python scripts/2_kg_gramart/subgraphs.py cmt -k 2 --exclude-hubs`, to write the subgraphs of its diseases to `subgraphs/` in its results folder.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+import pickle
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+
+# Local imports
+from compact import (
+    MISSING,
+    CompactGraph,
+)
+from graph import expand_memberships
+from kg import (
+    DISEASES,
+    build_kg,
+    load_tables,
+    output_dir,
+)
+from triples import quote
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The name of the folder of the subgraphs in each results folder
+SUBGRAPH_DIR = 'subgraphs'
+
+# The number of entities searched together in each batch
+BATCH_SIZE = 256
+
+# The directions that the search follows the edges in
+DIRECTIONS = ['out', 'both']
+
+# The characters of entity labels that are not kept in the names of their files
+UNSAFE = re.compile(r"[^A-Za-z0-9_.\-]")
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def adjacency(graph: CompactGraph, direction: str = 'out') -> list:
+    """Precomputes the adjacency arrays that the search follows.
+
+    Parameters
+    ----------
+    graph : CompactGraph
+        The knowledge graph.
+    direction : str, optional
+        Either 'out' to follow the edges from each node, or 'both' to also follow them backwards, by default 'out'.
+
+    Returns
+    -------
+    list
+        The CSR row pointers, neighbor ids, and edge ids of each direction, where the id of an edge is its position in the edges of the graph.
+    """
+
+    edge_ids = np.arange(graph.number_of_edges(), dtype=np.int64)
+    arrays = [(graph.indptr, graph.indices, edge_ids)]
+    if direction == 'both':
+        sources = np.repeat(np.arange(graph.number_of_nodes(), dtype=np.int32), np.diff(graph.indptr))
+        order = np.argsort(graph.indices, kind='stable')
+        indptr = np.zeros(graph.number_of_nodes() + 1, dtype=np.int64)
+        np.cumsum(np.bincount(graph.indices, minlength=graph.number_of_nodes()), out=indptr[1:])
+        arrays.append((indptr, sources[order], edge_ids[order]))
+
+    return arrays
+
+
+def hubs(graph: CompactGraph) -> np.ndarray:
+    """Finds the category supernodes of a knowledge graph.
+
+    Parameters
+    ----------
+    graph : CompactGraph
+        The knowledge graph.
+
+    Returns
+    -------
+    np.ndarray
+        The boolean mask of the nodes whose `class_type` is 'class'.
+    """
+
+    code = graph.node_values['class_type'].codes.get('class', MISSING - 1)
+
+    return graph.node_codes['class_type'] == code
+
+
+def khop_edges(arrays: list, roots: np.ndarray, k: int, n_nodes: int, blocked: np.ndarray = None) -> list:
+    """Finds the edges within k hops of each of a batch of root nodes with one breadth-first search.
+
+    The search holds its frontier as arrays of `(root, node)` pairs, so that each hop expands the frontier of every root at once.
+    An edge is within k hops of a root if the search follows it from a node at most `k - 1` hops from the root.
+
+    Parameters
+    ----------
+    arrays : list
+        The adjacency arrays from `adjacency`.
+    roots : np.ndarray
+        The node ids of the roots.
+    k : int
+        The number of hops.
+    n_nodes : int
+        The number of nodes of the graph.
+    blocked : np.ndarray, optional
+        The boolean mask of the nodes that the search never enters, such as the `hubs`, by default None.
+
+    Returns
+    -------
+    list
+        The sorted `int64` array of the ids of the edges within k hops of each root.
+    """
+
+    frontier_roots = np.arange(len(roots), dtype=np.int64)
+    frontier = np.asarray(roots, dtype=np.int64)
+    visited = frontier_roots * n_nodes + frontier
+    found = []
+    for _ in range(k):
+        reached = []
+        for indptr, neighbors, edge_ids in arrays:
+            starts = indptr[frontier]
+            counts = indptr[frontier + 1] - starts
+            # Gather the ragged neighbor lists of the frontier with one index array
+            positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            pair_roots = np.repeat(frontier_roots, counts)
+            pair_nodes = neighbors[positions]
+            if blocked is not None:
+                keep = ~blocked[pair_nodes]
+                positions, pair_roots, pair_nodes = positions[keep], pair_roots[keep], pair_nodes[keep]
+            found.append(pair_roots * len(edge_ids) + edge_ids[positions])
+            reached.append(pair_roots * n_nodes + pair_nodes)
+
+        reached = np.setdiff1d(np.concatenate(reached), visited)
+        visited = np.union1d(visited, reached)
+        frontier_roots, frontier = np.divmod(reached, n_nodes)
+
+    n_edges = len(arrays[0][2])
+    found = np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+    edge_roots, edges = np.divmod(found, n_edges)
+    bounds = np.searchsorted(edge_roots, np.arange(len(roots) + 1))
+
+    return [edges[bounds[i]:bounds[i + 1]] for i in range(len(roots))]
+
+
+def write_statements(graph: CompactGraph, edges: np.ndarray, file: Path) -> None:
+    """Writes edges of a graph as the quoted statements of `edge_attributes_lerche.txt`, skipping the edges without a relation.
+
+    Parameters
+    ----------
+    graph : CompactGraph
+        The knowledge graph.
+    edges : np.ndarray
+        The sorted ids of the edges.
+    file : Path
+        The location of the statement file.
+    """
+
+    sources = np.searchsorted(graph.indptr, edges, side='right') - 1
+    with open(file, 'w') as f:
+        for u, v, r in zip(sources.tolist(), graph.indices[edges].tolist(), graph.relation_codes[edges].tolist()):
+            if r != MISSING:
+                f.write(f"{quote(graph.nodes[u])} {quote(graph.relations[r])} {quote(graph.nodes[v])}\n")
+
+
+def file_names(labels: list) -> list:
+    """Gets a unique file name for the statements of each entity.
+
+    Parameters
+    ----------
+    labels : list
+        The labels of the entities.
+
+    Returns
+    -------
+    list
+        The file names, the labels with unsafe characters replaced by underscores and a numbered suffix for repeated names.
+    """
+
+    names = []
+    seen = set()
+    for label in labels:
+        name = UNSAFE.sub('_', str(label))
+        candidate, i = name, 1
+        while candidate in seen:
+            candidate, i = f"{name}-{i}", i + 1
+        seen.add(candidate)
+        names.append(f"{candidate}.txt")
+
+    return names
+
+
+# The graph and search of each worker process
+_worker = None
+
+
+def _load_worker(snapshot: bytes, direction: str, exclude_hubs: bool) -> None:
+    """Loads the pickled `CompactGraph` snapshot of a worker process and precomputes its adjacency."""
+    global _worker
+    graph = pickle.loads(snapshot)
+    _worker = (graph, adjacency(graph, direction), hubs(graph) if exclude_hubs else None)
+
+
+def _run_batch(batch: list, k: int, out_dir: Path) -> int:
+    """Searches a batch of `(root id, file name)` pairs in a worker process and writes their statements."""
+    graph, arrays, blocked = _worker
+    roots = np.array([root for root, _ in batch], dtype=np.int64)
+    for (_, name), edges in zip(batch, khop_edges(arrays, roots, k, graph.number_of_nodes(), blocked)):
+        write_statements(graph, edges, out_dir.joinpath(name))
+
+    return len(batch)
+
+
+def extract_subgraphs(
+    G: nx.DiGraph,
+    out_dir: Path,
+    category: str = 'disease',
+    k: int = 2,
+    direction: str = 'out',
+    exclude_hubs: bool = False,
+    processes: int = 1,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """Writes the statements within k hops of each node of a category to one statement file per node.
+
+    Parameters
+    ----------
+    G : nx.DiGraph
+        The knowledge graph.
+    out_dir : Path
+        The folder of the statement files, which is created if it does not exist.
+    category : str, optional
+        The category of the entities, by default 'disease'.
+    k : int, optional
+        The number of hops, by default 2.
+    direction : str, optional
+        Either 'out' to follow the edges from each node, or 'both' to also follow them backwards, by default 'out'.
+    exclude_hubs : bool, optional
+        If true, the search never enters the category supernodes, so that their `is_a` edges are excluded, by default False.
+    processes : int, optional
+        The number of worker processes, by default 1 to search in this process, or None for one per processor.
+    batch_size : int, optional
+        The number of entities searched together, by default `BATCH_SIZE`.
+
+    Returns
+    -------
+    dict
+        The location of the statement file of each entity.
+    """
+
+    graph = CompactGraph.from_networkx(expand_memberships(G))
+    roots = graph.categories.get(category, np.zeros(0, dtype=np.int32)).tolist()
+    # The supernode of the category is not one of its entities
+    roots = [root for root in roots if graph.nodes[root] != category]
+    names = file_names([graph.nodes[root] for root in roots])
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    pairs = list(zip(roots, names))
+    batches = [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
+    snapshot = pickle.dumps(graph, protocol=pickle.HIGHEST_PROTOCOL)
+    search = partial(_run_batch, k=k, out_dir=out_dir)
+    if processes == 1 or len(batches) < 2:
+        _load_worker(snapshot, direction, exclude_hubs)
+        for batch in batches:
+            search(batch)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_load_worker,
+            initargs=(snapshot, direction, exclude_hubs),
+        ) as pool:
+            list(pool.map(search, batches))
+
+    return {graph.nodes[root]: out_dir.joinpath(name) for root, name in pairs}
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='subgraphs.py',
+        description='Writes the statements within k hops of each entity of a category of a knowledge graph to one file per entity.',
+    )
+    parser.add_argument('disease', choices=DISEASES, help='the disease whose knowledge graph is built')
+    parser.add_argument('--category', default='disease', help='the category of the entities (default: disease)')
+    parser.add_argument('-k', type=int, default=2, help='the number of hops (default: 2)')
+    parser.add_argument('--direction', choices=DIRECTIONS, default='out', help='follow the edges from each node, or in both directions')
+    parser.add_argument('--exclude-hubs', action='store_true', help='do not enter the category supernodes through their is_a edges')
+    parser.add_argument('--processes', type=int, default=None, help='the number of worker processes (default: one per processor)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='the number of entities searched together')
+    args = parser.parse_args()
+
+    G = build_kg(args.disease, load_tables(args.disease))
+    name = f"{args.category}_k{args.k}_{args.direction}" + ("_no_hubs" if args.exclude_hubs else "")
+    out_dir = output_dir(args.disease).joinpath(SUBGRAPH_DIR, name)
+    files = extract_subgraphs(
+        G,
+        out_dir,
+        args.category,
+        args.k,
+        args.direction,
+        args.exclude_hubs,
+        args.processes,
+        args.batch_size,
+    )
+    print(f"{len(files)} subgraphs of {args.category} nodes written to {out_dir}")
@@ -0,0 +1,70 @@
+"""
+    conftest.py
+
+# Description
+Common pytest configuration for the `2_kg_gramart` experiment tests.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Add the experiment folder to the path so that its modules are importable
+EXP_DIR = str(Path(__file__).resolve().parents[1])
+if EXP_DIR not in sys.path:
+    sys.path.insert(0, EXP_DIR)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The header of the CMT `protein_list.csv` table
+PROTEIN_HEADER = [
+    'gene', 'protein', 'uniprot', 'chromosome', 'chromosome_location', 'protein_class', 'biologic_process',
+    'molecular_function', 'disease_involved', 'MW', 'DOMAINS', 'MOTIFS', 'cell_localization', 'length',
+]
+
+# -----------------------------------------------------------------------------
+# FIXTURES
+# -----------------------------------------------------------------------------
+
+
+@pytest.fixture
+def sample_tables() -> dict:
+    """A small set of CMT tables in the layout returned by `kg.load_tables`."""
+    return {
+        "variants": [
+            ['1p36.22', 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 609260, 'MFN2', 608507, 'AD'],
+            ['1p36.22', 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 617087, 'MFN2', 608507, 'AD|AR'],
+            ['22q12.2', 'Charcot_Marie_Tooth_disease_axonal_type_2CC', 616924, 'NEFH', 162230, 'AD'],
+            ['8p21.2', 'Charcot_Marie_Tooth_disease_type_2E', 607684, 'NEFL', 162280, 'AD|AR'],
+        ],
+        "hpo_tags": [
+            ['HP:0001250', 'Seizure'],
+            ['HP:0001251', 'Ataxia'],
+            ['HP:0001252', 'Hypotonia'],
+            ['HP:0003380', 'Decreased_number_of_peripheral_myelinated_nerve_fibers'],
+            ['HP:0002936', 'Distal_sensory_impairment'],
+        ],
+        "phenotype_by_disease": [
+            [609260, 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'HP:0001251'],
+            [609260, 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'HP:0002936'],
+            [617087, 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'HP:0001252'],
+            [616924, 'Charcot_Marie_Tooth_disease_axonal_type_2CC', 'HP:0003380'],
+            [607684, 'Charcot_Marie_Tooth_disease_type_2E', 'HP:0001250'],
+        ],
+        "proteins": pd.DataFrame(columns=PROTEIN_HEADER, data=[
+            ['MFN2', 'Mitofusin_2', 'O95140', '1', '11980181_12013515', 'Enzymes|Transporters', 'Apoptosis', 'Hydrolase', 'Neuropathy', 86, 'TM', 'none', 'mitochondrion', 757],
+            ['NEFH', 'Neurofilament_heavy', 'P12036', '22', '29480218_29491390', 'none', 'none', 'none', 'Neuropathy|Disease_variant', 112, 'IF', 'CC|SP', 'cytoskeleton', 1020],
+            ['NEFL', 'Neurofilament_light', 'P07196', '8', '24950955_24956612', 'Disease_related_genes', 'none', 'Structural_molecule', 'Neuropathy', 61, 'IF', 'CC', 'cytoskeleton|cytoplasm', 543],
+        ]),
+    }
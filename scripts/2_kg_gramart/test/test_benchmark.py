@@ -0,0 +1,43 @@
+"""
+    test_benchmark.py
+
+# Description
+Tests for the synthetic data of the scaling benchmark in `benchmark.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from benchmark import (
+    PHENOTYPES_PER_DISEASE,
+    generate_data,
+)
+from kg import (
+    build_kg,
+    read_tables,
+)
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_generate_data(tmp_path):
+    """Tests that the synthetic tables build a knowledge graph of the requested size."""
+    generate_data(tmp_path, 100, n_phenotypes=300)
+    tables = read_tables(tmp_path, cache=False)
+
+    assert len(tables["variants"]) == 100
+    assert len(tables["hpo_tags"]) == 300
+    assert len(tables["phenotype_by_disease"]) == 100 * PHENOTYPES_PER_DISEASE
+    assert len(tables["proteins"]) == 50
+
+    G = build_kg("synthetic", tables)
+    assert len(G.nodes_of('disease')) == 1 + 100
+    assert len(G.nodes_of('protein')) == 1 + 50
+    assert 1 < len(G.nodes_of('phenotype')) <= 1 + 300
+    assert all(len(G.nodes_of(category)) > 1 for category in ('protein_class', 'protein_domain', 'protein_location'))
@@ -0,0 +1,76 @@
+"""
+    test_compact.py
+
+# Description
+Tests for the array-backed compact knowledge graph store in `compact.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import pickle
+
+import networkx as nx
+
+from compact import (
+    CompactGraph,
+    synthetic_kg,
+)
+from graph import KnowledgeGraph
+from kg import build_kg
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_networkx_round_trip(sample_tables):
+    """Tests that a knowledge graph survives a round trip through the compact store in order."""
+    G = build_kg('cmt', sample_tables)
+    graph = CompactGraph.from_networkx(G)
+    assert graph.number_of_nodes() == G.number_of_nodes()
+    assert graph.number_of_edges() == G.number_of_edges()
+    assert graph.nodes_of('gene') == G.nodes_of('gene')
+
+    H = graph.to_networkx()
+    assert list(H.nodes(data=True)) == list(G.nodes(data=True))
+    assert list(H.edges(data=True)) == list(G.edges(data=True))
+    assert list(graph.edges()) == [(u, v, r) for u, v, r in G.edges(data='relation')]
+
+
+def test_from_edges():
+    """Tests that building from edge lists matches building a networkx graph in the same order."""
+    nodes, edges = synthetic_kg(50)
+    # Repeat an edge with a new relation to check the networkx update semantics
+    edges.append((edges[0][0], 'updated', edges[0][2]))
+
+    G = nx.DiGraph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from((u, v, {'relation': r}) for u, r, v in edges)
+    graph = CompactGraph.from_edges(edges, nodes)
+
+    H = graph.to_networkx()
+    assert list(H.nodes(data=True)) == list(G.nodes(data=True))
+    assert list(H.edges(data=True)) == list(G.edges(data=True))
+    assert list(graph.successors('disease_0')) == [(v, r) for _, v, r in G.edges('disease_0', data='relation')]
+
+
+def test_pickled_snapshot():
+    """Tests that a pickled compact graph restores a shared missing label and the category index order."""
+    G = KnowledgeGraph()
+    G.add_node('phenotype', category='phenotype', class_type='class')
+    G.add_node('Ataxia', category='gene')
+    G.add_node(float('nan'), category='phenotype', class_type='individual')
+    G.add_edge(G.nodes_of('phenotype')[1], 'phenotype', relation='is_a')
+    # Moving a node to another category puts it last in the index
+    G.add_node('Ataxia', category='phenotype')
+
+    H = pickle.loads(pickle.dumps(CompactGraph.from_networkx(G))).to_networkx(KnowledgeGraph)
+
+    assert H.number_of_nodes() == G.number_of_nodes() == 3
+    assert H.number_of_edges() == 1
+    assert [str(node) for node in H.nodes_of('phenotype')] == ['phenotype', 'nan', 'Ataxia']
@@ -0,0 +1,85 @@
+"""
+    test_compressed.py
+
+# Description
+Tests for the compressed exports in `compressed.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import gzip
+
+import networkx as nx
+import pytest
+from rdflib.compare import isomorphic
+
+from compressed import (
+    available_codecs,
+    compressed_name,
+    detect_codec,
+    read_graphml,
+    read_rdf,
+    split_codec,
+)
+from export import (
+    GRAPHML_FILE,
+    LERCHE_EDGE_ATTRIBUTES,
+    LERCHE_TRIPLES,
+    RDF_NT,
+    RDF_OWL,
+    export_kg,
+    select_exports,
+)
+from kg import build_kg
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_codec_names():
+    """Tests that the codec extensions are appended to and split from the compressible exports only."""
+    assert compressed_name(RDF_OWL, 'gzip') == "rdf.owl.gz"
+    assert split_codec("rdf.owl.gz") == (RDF_OWL, 'gzip')
+    assert split_codec(RDF_OWL) == (RDF_OWL, None)
+    assert select_exports(['graphml', 'owl', 'lerche'], rdf_format='nt', rdf_xml=True, compress='gzip') == [
+        "gephy.graphml.gz", "rdf.nt.gz", LERCHE_EDGE_ATTRIBUTES, LERCHE_TRIPLES, "rdf.owl.gz",
+    ]
+
+
+@pytest.mark.parametrize("codec", ['gzip', 'zstd'])
+def test_compressed_round_trip(codec, sample_tables, tmp_path):
+    """Tests that the compressed GraphML and RDF exports read back to the same graphs as the plain exports."""
+    if codec not in available_codecs():
+        pytest.skip(f"{codec} is not installed")
+    G = build_kg("cmt", sample_tables)
+    names = [GRAPHML_FILE, RDF_NT, RDF_OWL]
+    for folder in ("plain", codec):
+        tmp_path.joinpath(folder).mkdir()
+    plain = export_kg(G, tmp_path.joinpath("plain"), names)
+    packed = export_kg(G, tmp_path.joinpath(codec), [compressed_name(name, codec) for name in names])
+
+    for name in names:
+        file = packed[compressed_name(name, codec)]
+        assert detect_codec(file) == codec
+        assert file.stat().st_size < plain[name].stat().st_size
+    assert nx.utils.graphs_equal(
+        read_graphml(packed[compressed_name(GRAPHML_FILE, codec)]),
+        nx.read_graphml(plain[GRAPHML_FILE]),
+    )
+    for name in (RDF_NT, RDF_OWL):
+        assert isomorphic(read_rdf(packed[compressed_name(name, codec)]), read_rdf(plain[name]))
+
+
+def test_gzip_streams(sample_tables, tmp_path):
+    """Tests that a gzip GraphML export decompresses to exactly the bytes of the plain export."""
+    G = build_kg("cmt", sample_tables)
+    plain = export_kg(G, tmp_path, [GRAPHML_FILE])[GRAPHML_FILE]
+    packed = export_kg(G, tmp_path, [compressed_name(GRAPHML_FILE, 'gzip')])["gephy.graphml.gz"]
+
+    assert gzip.decompress(packed.read_bytes()) == plain.read_bytes()
@@ -0,0 +1,158 @@
+"""
+    test_database.py
+
+# Description
+Tests for the SQLite knowledge graph backend in `database.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import math
+
+import networkx as nx
+import pytest
+
+from database import (
+    DATABASE_FILE,
+    GraphDatabase,
+    GraphWriter,
+    write_database,
+)
+from export import (
+    EDGE_ATTRIBUTES,
+    GRAPH_ATTRIBUTES,
+    GRAPHML_FILE,
+    LERCHE_EDGE_ATTRIBUTES,
+    LERCHE_TRIPLES,
+    RDF_NT,
+    export_kg,
+)
+from kg import build_kg
+
+# -----------------------------------------------------------------------------
+# FIXTURES
+# -----------------------------------------------------------------------------
+
+
+@pytest.fixture
+def tables(sample_tables):
+    """The sample tables, including a phenotype with a missing tag."""
+    sample_tables["hpo_tags"].append(['HP:0001253', float('nan')])
+    sample_tables["phenotype_by_disease"].append([609260, 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'HP:0001253'])
+
+    return sample_tables
+
+
+@pytest.fixture
+def kg(tables):
+    """The knowledge graph of the sample tables, built in memory."""
+    return build_kg("cmt", tables)
+
+
+@pytest.fixture(params=["written", "streamed"])
+def database(request, kg, tables, tmp_path):
+    """The database of the knowledge graph, either written from the graph in memory or built straight from the tables."""
+    file = tmp_path.joinpath(DATABASE_FILE)
+    if request.param == "written":
+        write_database(kg, file)
+    else:
+        with GraphWriter(file) as writer:
+            build_kg("cmt", tables, graph=writer)
+            writer.finish()
+    with GraphDatabase(file) as database:
+        yield database
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_streamed_exports(kg, database, tmp_path):
+    """Tests that the exports streamed out of the database match the exports of the graph in memory, in order."""
+    names = [GRAPHML_FILE, GRAPH_ATTRIBUTES, EDGE_ATTRIBUTES, RDF_NT, LERCHE_EDGE_ATTRIBUTES, LERCHE_TRIPLES]
+    for folder in ("memory", "serial", "concurrent"):
+        tmp_path.joinpath(folder).mkdir()
+    memory = export_kg(kg, tmp_path.joinpath("memory"), names)
+    serial = export_kg(database, tmp_path.joinpath("serial"), names)
+    concurrent = export_kg(database, tmp_path.joinpath("concurrent"), names, processes=3)
+
+    for files in (serial, concurrent):
+        for name in names:
+            assert files[name].read_bytes() == memory[name].read_bytes()
+
+
+def test_lookups(kg, database):
+    """Tests the indexed lookups of nodes, categories, and neighborhoods."""
+    assert database.number_of_nodes() == kg.number_of_nodes()
+    assert database.number_of_edges() == kg.number_of_edges()
+    # The missing tag comes back as another `float('nan')` object
+    assert [(str(n), a) for n, a in database.nodes.data()] == [(str(n), a) for n, a in kg.nodes.data()]
+    assert [(str(u), str(v), a) for u, v, a in database.edges.data()] == [(str(u), str(v), a) for u, v, a in kg.edges.data()]
+    assert {category: list(map(str, nodes)) for category, nodes in database.categories.items()} == {
+        category: list(map(str, nodes)) for category, nodes in kg.categories.items()
+    }
+
+    for node in ('MFN2', 'gene', 'Charcot_Marie_Tooth_disease_axonal_type_2A2A'):
+        assert database.nodes[node] == kg.nodes[node]
+        assert list(map(str, database.successors(node))) == list(map(str, kg.successors(node)))
+        assert sorted(database.predecessors(node)) == sorted(kg.predecessors(node))
+        assert [(u, str(v), a) for u, v, a in database.out_edges(node)] == [(u, str(v), a) for u, v, a in kg.out_edges(node, data=True)]
+
+    assert 'not_a_node' not in database.nodes
+    with pytest.raises(KeyError):
+        database.nodes['not_a_node']
+    with pytest.raises(KeyError):
+        list(database.successors('not_a_node'))
+
+
+def test_missing_values(tmp_path):
+    """Tests that None and `float('nan')` values are stored apart and both come back."""
+    G = nx.DiGraph()
+    G.add_node('a', value=None, weight=float('nan'), count=0, label='')
+    G.add_edge('a', 'b', relation='knows')
+    write_database(G, tmp_path.joinpath(DATABASE_FILE))
+
+    with GraphDatabase(tmp_path.joinpath(DATABASE_FILE)) as database:
+        attributes = database.nodes['a']
+    assert attributes['value'] is None
+    assert math.isnan(attributes['weight'])
+    assert (attributes['count'], attributes['label']) == (0, '')
+
+    G.add_node('c', value=b'')
+    with pytest.raises(ValueError):
+        write_database(G, tmp_path.joinpath("bytes.sqlite"))
+
+
+def test_writer_merges(tmp_path):
+    """Tests that the writer merges repeated nodes and edges in place and moves the nodes whose category changes, like a `KnowledgeGraph`."""
+    G = nx.DiGraph()
+    G.add_nodes_from([('a', {'category': 'gene'}), ('b', {'category': 'gene'})])
+    G.add_edge('a', 'b', relation='is_caused_by')
+    G.add_edge('b', 'c')
+    G.add_edge('a', 'b', relation='has_gene_location')
+    G.add_node('a', category='disease', MIM=1)
+    G.add_node('a', category='gene')
+
+    with GraphWriter(tmp_path.joinpath(DATABASE_FILE)) as writer:
+        writer.add_nodes_from([('a', {'category': 'gene'}), ('b', {'category': 'gene'})])
+        writer.add_edge('a', 'b', relation='is_caused_by')
+        writer.add_edges_from([('b', 'c')])
+        writer.add_edge('a', 'b', relation='has_gene_location')
+        writer.add_node('a', category='disease', MIM=1)
+        writer.add_node('a', category='gene')
+        with pytest.raises(ValueError):
+            writer.add_edge('a', 'c', weight=1)
+        assert (writer.number_of_nodes(), writer.number_of_edges()) == (3, 2)
+        writer.finish()
+
+    with GraphDatabase(tmp_path.joinpath(DATABASE_FILE)) as database:
+        assert list(database.nodes.data()) == list(G.nodes.data())
+        assert list(database.edges.data()) == list(G.edges.data())
+        assert nx.utils.graphs_equal(database.to_networkx(), G)
+        # The node that left its category and came back is indexed after the others
+        assert dict(database.categories) == {'gene': ['b', 'a']}
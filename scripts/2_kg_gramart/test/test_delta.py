@@ -0,0 +1,82 @@
+"""
+    test_delta.py
+
+# Description
+Tests for the differences between knowledge graph builds in `delta.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import copy
+
+import numpy as np
+
+from delta import (
+    canonical,
+    compute_delta,
+    load_statements,
+    read_delta,
+    sort_merge,
+    write_delta,
+)
+from export import (
+    LERCHE_EDGE_ATTRIBUTES,
+    LERCHE_TRIPLES,
+    export_kg,
+)
+from kg import build_kg
+from triples import (
+    read_lerche,
+    write_triples,
+)
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_sort_merge():
+    """Tests that the sort-merge finds the items of only one sequence in order."""
+    assert list(sort_merge([1, 3, 4, 7], [2, 3, 7, 8, 9])) == [('-', 1), ('+', 2), ('-', 4), ('+', 8), ('+', 9)]
+    assert list(sort_merge([], [(0, 1)])) == [('+', (0, 1))]
+
+
+def test_canonical():
+    """Tests that the canonical triples are sorted by their strings and unique."""
+    symbols, triples = canonical(['b', 'a', 'c'], np.array([[0, 2, 1], [1, 2, 0], [0, 2, 1]]))
+
+    assert symbols == ['a', 'b', 'c']
+    assert triples.tolist() == [[0, 2, 1], [1, 2, 0]]
+    assert np.shares_memory(canonical(symbols, triples)[1], triples)
+
+
+def test_build_delta(sample_tables, tmp_path):
+    """Tests the delta between builds before and after an update of the tables against the set difference of their statements."""
+    new_tables = copy.deepcopy(sample_tables)
+    new_tables["hpo_tags"].append(['HP:0001253', 'Spasticity'])
+    new_tables["phenotype_by_disease"].append([609260, 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'HP:0001253'])
+    del new_tables["variants"][3]
+    for folder, tables in (("old", sample_tables), ("new", new_tables)):
+        tmp_path.joinpath(folder).mkdir()
+        export_kg(build_kg("cmt", tables), tmp_path.joinpath(folder), [LERCHE_EDGE_ATTRIBUTES, LERCHE_TRIPLES])
+
+    old = set(read_lerche(tmp_path.joinpath("old", LERCHE_EDGE_ATTRIBUTES)))
+    new = set(read_lerche(tmp_path.joinpath("new", LERCHE_EDGE_ATTRIBUTES)))
+    delta = compute_delta(load_statements(tmp_path.joinpath("old")), load_statements(tmp_path.joinpath("new")))
+    assert delta["added"] == sorted(new - old)
+    assert delta["removed"] == sorted(old - new)
+    assert 'Spasticity' in delta["added_nodes"]
+    assert 'Charcot_Marie_Tooth_disease_type_2E' in delta["removed_nodes"]
+
+    # The text statements and the canonical triple file give the same delta
+    canonical_file = tmp_path.joinpath("old.bin")
+    write_triples(canonical_file, *load_statements(tmp_path.joinpath("old", LERCHE_TRIPLES)))
+    assert compute_delta(load_statements(canonical_file), load_statements(tmp_path.joinpath("new", LERCHE_EDGE_ATTRIBUTES))) == delta
+
+    write_delta(delta, tmp_path.joinpath("delta.txt"))
+    assert read_delta(tmp_path.joinpath("delta.txt")) == delta
@@ -0,0 +1,126 @@
+"""
+    test_export.py
+
+# Description
+Tests for the knowledge graph exporters in `export.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import pytest
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+from export import (
+    EDGE_ATTRIBUTES,
+    EXPORTS,
+    GRAPH_ATTRIBUTES,
+    GRAPHML_FILE,
+    LERCHE_EDGE_ATTRIBUTES,
+    LERCHE_TRIPLES,
+    RDF_NT,
+    RDF_OWL,
+    RDF_TTL,
+    atomic_write,
+    build_rdf,
+    export_kg,
+    iter_triples,
+    select_exports,
+)
+from kg import build_kg
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_iter_triples_unique(sample_tables):
+    """Tests that the streamed ontology never repeats a triple."""
+    G = build_kg("cmt", sample_tables)
+    triples = list(iter_triples(G))
+
+    assert len(triples) == len(set(triples)) == len(build_rdf(G))
+
+
+def test_streamed_rdf_isomorphic(sample_tables, tmp_path):
+    """Tests that the streamed N-Triples and Turtle ontologies and their RDF/XML conversion match the in-memory ontology."""
+    G = build_kg("cmt", sample_tables)
+    expected = build_rdf(G)
+
+    files = export_kg(G, tmp_path, [RDF_NT, RDF_TTL, RDF_OWL])
+
+    assert isomorphic(Graph().parse(files[RDF_NT], format="nt"), expected)
+    assert isomorphic(Graph().parse(files[RDF_TTL], format="turtle"), expected)
+    assert isomorphic(Graph().parse(files[RDF_OWL], format="xml"), expected)
+
+
+def test_select_exports():
+    """Tests that the output groups select their exports in the order that they are written."""
+    assert select_exports() == EXPORTS
+    assert select_exports(['lerche', 'graphml']) == [GRAPHML_FILE, LERCHE_EDGE_ATTRIBUTES, LERCHE_TRIPLES]
+    assert select_exports(['owl', 'attributes'], rdf_format='ttl') == [GRAPH_ATTRIBUTES, EDGE_ATTRIBUTES, RDF_TTL]
+    assert select_exports(['owl'], rdf_format='nt', rdf_xml=True) == [RDF_NT, RDF_OWL]
+    assert select_exports(['graphml'], rdf_format='nt') == [GRAPHML_FILE]
+
+
+def test_concurrent_exports(sample_tables, tmp_path):
+    """Tests that the exports written concurrently from a snapshot match the exports written in turn, including a missing phenotype tag."""
+    sample_tables["hpo_tags"].append(['HP:0001253', float('nan')])
+    sample_tables["phenotype_by_disease"].append([609260, 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'HP:0001253'])
+    G = build_kg("cmt", sample_tables)
+    names = EXPORTS + [RDF_NT]
+
+    for folder in ("serial", "concurrent"):
+        tmp_path.joinpath(folder).mkdir()
+    serial = export_kg(G, tmp_path.joinpath("serial"), names)
+    concurrent = export_kg(G, tmp_path.joinpath("concurrent"), names, processes=3)
+
+    assert list(concurrent) == list(serial)
+    for name in names:
+        if name == RDF_OWL:
+            assert isomorphic(Graph().parse(concurrent[name]), Graph().parse(serial[name]))
+        else:
+            assert concurrent[name].read_bytes() == serial[name].read_bytes()
+    assert sorted(path.name for path in tmp_path.joinpath("concurrent").iterdir()) == sorted(names)
+
+
+def test_compact_exports(sample_tables, tmp_path):
+    """Tests that the exports of a graph with collapsed memberships match the exports of the full graph."""
+    names = [name for name in EXPORTS if name != RDF_OWL] + [RDF_NT]
+    for folder in ("full", "compact", "omitted"):
+        tmp_path.joinpath(folder).mkdir()
+    full = export_kg(build_kg("cmt", sample_tables), tmp_path.joinpath("full"), names)
+    G = build_kg("cmt", sample_tables, compact=True)
+    compact = export_kg(G, tmp_path.joinpath("compact"), names, processes=2)
+    for name in names:
+        assert compact[name].read_bytes() == full[name].read_bytes()
+
+    omitted = export_kg(G, tmp_path.joinpath("omitted"), [LERCHE_EDGE_ATTRIBUTES], lerche_memberships=False)
+    statements = full[LERCHE_EDGE_ATTRIBUTES].read_text().splitlines()
+    kept = omitted[LERCHE_EDGE_ATTRIBUTES].read_text().splitlines()
+    assert len(statements) - len(kept) == len(G.memberships)
+    assert all(f'"{u}" "is_a" "{G.nodes[u]["category"]}"' not in kept for u in G.memberships)
+
+
+def test_atomic_write(tmp_path):
+    """Tests that a failed write leaves neither a partial file nor its temporary file behind."""
+    file = tmp_path.joinpath("export.txt")
+    file.write_text("old")
+
+    def fail(temp):
+        temp.write_text("partial")
+        raise RuntimeError("crash")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(fail, file)
+    assert file.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [file]
+
+    atomic_write(lambda temp: temp.write_text("new"), file)
+    assert file.read_text() == "new"
+    assert list(tmp_path.iterdir()) == [file]
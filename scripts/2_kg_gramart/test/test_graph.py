@@ -0,0 +1,139 @@
+"""
+    test_graph.py
+
+# Description
+Tests for the category-indexed knowledge graph in `graph.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import pickle
+
+import networkx as nx
+
+from compact import CompactGraph
+from graph import (
+    MEMBERSHIP,
+    KnowledgeGraph,
+    category_index,
+    expand_memberships,
+    is_membership,
+    iter_edges,
+)
+from kg import (
+    build_kg,
+    summarize,
+)
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_category_index():
+    """Tests that the category index follows node additions, updates, and removals."""
+    G = KnowledgeGraph()
+    G.add_node('gene', category='gene', class_type='class')
+    G.add_edge('MFN2', 'Mitofusin_2', relation='codes_for')
+    assert G.nodes_of('gene') == ['gene']
+
+    G.add_node('MFN2', category='gene', class_type='individual')
+    G.add_nodes_from([
+        ('Mitofusin_2', {'category': 'protein'}),
+        ('NEFH', {'category': 'gene'}),
+    ])
+    G.add_nodes_from(['AD', 'AR'], category='inheritance')
+    assert G.nodes_of('gene') == ['gene', 'MFN2', 'NEFH']
+    assert G.nodes_of('protein') == ['Mitofusin_2']
+    assert G.nodes_of('inheritance') == ['AD', 'AR']
+
+    # Changing the category of a node moves it in the index
+    G.add_node('NEFH', category='protein')
+    assert G.nodes_of('gene') == ['gene', 'MFN2']
+    assert G.nodes_of('protein') == ['Mitofusin_2', 'NEFH']
+
+    G.remove_node('MFN2')
+    G.remove_nodes_from(['AD', 'missing'])
+    assert G.nodes_of('gene') == ['gene']
+    assert G.nodes_of('inheritance') == ['AR']
+
+    # The index of a plain graph is built with a scan
+    assert category_index(G) is G.categories
+    plain = category_index(nx.DiGraph(G))
+    assert {c: list(nodes) for c, nodes in plain.items()} == {c: list(nodes) for c, nodes in G.categories.items() if nodes}
+
+
+def test_collapse_memberships(sample_tables):
+    """Tests that the memberships collapsed while a knowledge graph is built are rebuilt in place, also after a pickled snapshot."""
+    G = build_kg('cmt', sample_tables)
+    edges = list(G.edges.data())
+    summary = summarize(G)
+
+    H = build_kg('cmt', sample_tables, compact=True)
+    n_collapsed = len(H.memberships)
+    assert n_collapsed > 0
+    # The collapsed edges are never stored, but they are still counted and found
+    assert nx.DiGraph.number_of_edges(H) == len(edges) - n_collapsed
+    assert H.number_of_edges() == len(edges)
+    assert all(H.has_edge(u, H.nodes[u]['category']) and H.nodes[u]['category'] not in H.succ[u] for u in H.memberships)
+    assert all(G.edges[u, G.nodes[u]['category']]['relation'] == MEMBERSHIP for u in H.memberships)
+    assert list(iter_edges(H)) == edges
+    assert list(expand_memberships(H).edges.data()) == edges
+    assert expand_memberships(G) is G
+    assert summarize(H) == summary
+
+    # Omitting the memberships gives the same edges with or without collapsing
+    kept = [(u, v, r) for u, v, r in edges if not is_membership(G, u, v, r)]
+    assert len(kept) == len(edges) - n_collapsed
+    assert list(iter_edges(G, memberships=False)) == kept
+    assert list(iter_edges(H, memberships=False)) == kept
+
+    snapshot = pickle.loads(pickle.dumps(CompactGraph.from_networkx(H))).to_networkx(KnowledgeGraph)
+    assert snapshot.memberships == H.memberships
+    assert list(iter_edges(snapshot)) == edges
+    assert list(iter_edges(H.copy())) == edges
+
+
+def test_membership_updates():
+    """Tests that a collapsing graph keeps the edges of a plain graph through edge updates, category changes, and removals."""
+    def build(G):
+        G.add_node('gene', category='gene', class_type='class')
+        G.add_node('protein', category='protein', class_type='class')
+        for gene in ('MFN2', 'NEFL', 'NEFH'):
+            G.add_edge(gene, 'chr1', relation='has_gene_location')
+            G.add_node(gene, category='gene', class_type='individual')
+            G.add_edges_from([(gene, 'gene', {'relation': MEMBERSHIP}), (gene, 'AD', {'relation': 'inherited_by'})])
+        # Repeated edges keep their positions
+        G.add_edge('MFN2', 'gene', relation=MEMBERSHIP)
+        G.add_edges_from([('NEFH', 'chr1')], relation='has_gene_location')
+        # An edge with other attributes and a change of category store the collapsed edges again
+        G.add_edge('NEFL', 'gene', relation=MEMBERSHIP, source='OMIM')
+        G.add_node('NEFH', category='protein')
+        G.add_edge('NEFH', 'protein', relation=MEMBERSHIP)
+        # Removing an edge before a collapsed edge moves it back
+        G.remove_edge('MFN2', 'chr1')
+        G.add_edge('MFN2', 'AR', relation='inherited_by')
+        return G
+
+    G = build(KnowledgeGraph())
+    H = build(KnowledgeGraph(collapse=True))
+    assert set(H.memberships) == {'MFN2', 'NEFH'}
+    assert list(iter_edges(H)) == list(G.edges.data())
+    assert list(iter_edges(H, memberships=False)) == list(iter_edges(G, memberships=False))
+    assert H.number_of_edges() == G.number_of_edges()
+
+    for g in (G, H):
+        g.remove_edges_from([('NEFH', 'protein'), ('NEFL', 'missing')])
+        g.remove_node('AD')
+    assert H.memberships == {'MFN2': 0}
+    assert list(iter_edges(H)) == list(G.edges.data())
+
+    G.remove_nodes_from(['gene', 'missing'])
+    H.remove_nodes_from(['gene', 'missing'])
+    assert H.memberships == {}
+    assert list(iter_edges(H)) == list(G.edges.data())
@@ -0,0 +1,76 @@
+"""
+    test_graphml.py
+
+# Description
+Tests for the streaming GraphML writer in `graphml.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import io
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from graphml import write_graphml
+from kg import build_kg
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def write_both(G: nx.DiGraph) -> tuple:
+    """Writes a graph with `networkx.write_graphml` and the streaming writer, returning both files."""
+    expected, actual = io.BytesIO(), io.BytesIO()
+    # The networkx writer pops the id of the graph
+    nx.write_graphml(G.copy(), expected)
+    write_graphml(G, actual)
+
+    return expected.getvalue(), actual.getvalue()
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_identical_to_networkx(sample_tables, compact):
+    """Tests that a knowledge graph with a missing phenotype tag is written as networkx writes it."""
+    sample_tables["hpo_tags"].append(['HP:0001253', float('nan')])
+    sample_tables["phenotype_by_disease"].append([609260, 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'HP:0001253'])
+    G = build_kg("cmt", sample_tables)
+    expected, _ = write_both(G)
+
+    actual = io.BytesIO()
+    write_graphml(build_kg("cmt", sample_tables, compact=compact), actual)
+    assert actual.getvalue() == expected
+
+
+def test_attribute_types_and_escapes():
+    """Tests the keys of mixed attribute types, numpy values, graph data, and escaped text."""
+    G = nx.DiGraph(name='a & b', id='kg')
+    label = 'A<&>"\'\n\r\t é'
+    G.add_node(label, text=label, number=1, real=1.5, flag=True, missing=float('nan'), count=np.int64(3))
+    G.add_node('mixed', number='one')
+    G.add_node('isolated')
+    G.add_edge(label, 'mixed', relation='has_a', weight=2.0)
+    G.add_edge('mixed', 'isolated')
+
+    expected, actual = write_both(G)
+    assert actual == expected
+    H = nx.read_graphml(io.BytesIO(actual))
+    assert list(H.nodes) == list(G.nodes)
+    assert H.nodes[label]['text'] == label
+    assert H.nodes['mixed']['number'] == 'one'
+
+    expected, actual = write_both(nx.DiGraph())
+    assert actual == expected
+    with pytest.raises(TypeError):
+        write_graphml(nx.DiGraph([(1, 2, {'relation': [1]})]), io.BytesIO())
@@ -0,0 +1,309 @@
+"""
+    test_kg.py
+
+# Description
+Tests for the knowledge graph construction stages in `kg.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import ast
+import pickle
+import random
+from pathlib import Path
+
+import networkx as nx
+import pandas as pd
+
+import kg
+from kg import (
+    GENERATOR_MODULES,
+    add_phenotypes,
+    add_proteins,
+    build_kg,
+    code_digest,
+    input_digests,
+    read_phenotypes,
+)
+
+# -----------------------------------------------------------------------------
+# FIXTURES
+# -----------------------------------------------------------------------------
+
+HPO_TAGS = [
+    ['HP:0000001', 'All'],
+    ['HP:0001250', 'Seizure'],
+    ['HP:0001251', 'Ataxia'],
+    ['HP:0001252', 'Hypotonia'],
+    # A repeated accession number and a label shared by two accession numbers
+    ['HP:0001252', 'Muscle_hypotonia'],
+    ['HP:0009830', 'Ataxia'],
+    [float('nan'), 'Unlabeled'],
+]
+
+PHENOTYPE_BY_DISEASE = [
+    [609260, 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'HP:0001251'],
+    [609260, 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'HP:0001252'],
+    [100000, 'Unrelated_disease', 'HP:0000001'],
+    [617087, 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'HP:0001251'],
+    [617087, 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'HP:0009830'],
+    [617087, 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'HP:9999999'],
+    [617087, 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', float('nan')],
+    [616924, 'Charcot_Marie_Tooth_disease_axonal_type_2CC', 'HP:0001250'],
+]
+
+DISEASE_MIMS = [609260, 617087, 616924]
+
+VARIANTS = [
+    ['1p36.22', 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 609260, 'MFN2', 608507, 'AD'],
+    ['1p36.22', 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 617087, 'MFN2', 608507, 'AD|AR'],
+    ['22q12.2', 'Charcot_Marie_Tooth_disease_axonal_type_2CC', 616924, 'NEFH', 162230, 'AD'],
+]
+
+PROTEINS = pd.DataFrame(
+    columns=[
+        'gene', 'protein', 'uniprot', 'chromosome', 'chromosome_location', 'protein_class', 'biologic_process',
+        'molecular_function', 'disease_involved', 'MW', 'DOMAINS', 'MOTIFS', 'cell_localization', 'length',
+    ],
+    data=[
+        ['MFN2', 'Mitofusin_2', 'O95140', 1, '11980181_12013515', 'Enzymes|Transporters', 'Apoptosis', 'Hydrolase', 'Neuropathy', 86, 'TM', 'none', 'mitochondrion', 757],
+        ['NEFH', 'Neurofilament_heavy', 'P12036', 22, '29480218_29491390', 'none', 'none', 'none', 'Neuropathy', 112, 'IF', 'CC|SP', 'cytoskeleton', 1020],
+    ],
+)
+
+# A repeated protein, values shared between columns, 'none' inside a value, and a protein named like an earlier value
+PROTEINS_REPEATED = pd.concat([PROTEINS, pd.DataFrame(columns=PROTEINS.columns, data=[
+    ['MFN2', 'Mitofusin_2', 'O95141', 1, '11980181_12013515', 'Transporters|Neuropathy', 'Nonenzymatic_none', 'Hydrolase', 'Neuropathy|Enzymes', 87, 'none|TM', 'CC', 'mitochondrion', 758],
+    ['HYD', 'Hydrolase', 'Q00000', 'X', '1_2', 'Enzymes', 'Apoptosis', 'none', 'none', 20, 'none', 'none', 'Mitofusin_2', 180],
+])], ignore_index=True)
+
+# The data folder of each disease
+DATA_DIR = Path(__file__).resolve().parents[3].joinpath("work", "data", "kg")
+
+# The HPO tags shared by all of the disease data folders
+HPO_DATA = DATA_DIR.joinpath("cmt", "HPO_to_tag.csv")
+
+# -----------------------------------------------------------------------------
+# UTILITIES
+# -----------------------------------------------------------------------------
+
+
+def add_phenotypes_scan(G, phenotype_by_disease, hpo_tags, disease_MIMs, phenotype_list):
+    """The original nested scan of the phenotype stage in `1_kg_gen.py`, kept as a reference."""
+    for p in phenotype_by_disease:
+        disease_MIM = p[0]
+        disease = p[1]
+        hpo_ID = p[2]
+        if disease_MIM in disease_MIMs:
+            for h in hpo_tags:
+                hpo = h[0]
+                phenotype = h[1]
+                if hpo == hpo_ID:
+                    if phenotype not in phenotype_list:
+                        phenotype_list.append(phenotype)
+                        G.add_node(phenotype, category='phenotype', hpo_id=hpo_ID, class_type='individual')
+                        G.add_edge(phenotype, 'phenotype', relation='is_a')
+                        G.add_edge(disease, phenotype, relation='has_a_phenotype')
+    return phenotype_list
+
+
+def add_proteins_loop(G, proteins, disease):
+    """The original row-by-row protein stage of `1_kg_gen.py` with positional columns, kept as a reference."""
+    for p in proteins:
+        if disease == "parkinson":
+            gene, protein, uniprot, chromosome = p[0:4]
+            protein_class, biologic_process, molecular_function, disease_involvement, protein_location = p[4:9]
+            MW, length, domain, motif = p[9:13]
+        else:
+            gene, protein, uniprot, chromosome = p[0:4]
+            protein_class, biologic_process, molecular_function, disease_involvement = p[5:9]
+            MW, domain, motif, protein_location, length = p[9:14]
+        G.add_node(chromosome, category='chromosome', class_type='individual')
+        G.add_edge(chromosome, 'chromosome', relation='is_a')
+        G.add_edge(gene, chromosome, relation='is_on_chromosome')
+        G.add_node(protein, category='protein', uniprot=uniprot, class_type='individual')
+        G.add_edge(protein, 'protein', relation='is_a')
+        G.add_edge(gene, protein, relation='codes_for')
+        if 'none' not in protein_class:
+            for pc in protein_class.split('|'):
+                G.add_node(pc, category='protein_class', class_type='individual')
+                G.add_edge(pc, 'protein_class', relation='is_a')
+                G.add_edge(protein, pc, relation='has_protein_class')
+        for value, category, relation in [
+            (biologic_process, 'biologic_process', 'has_biologic_process'),
+            (molecular_function, 'molecular_function', 'has_molecular_function'),
+            (disease_involvement, 'disease_involvement', 'has_disease_involvement'),
+        ]:
+            if 'none' not in value:
+                for v in value.split('|'):
+                    G.add_node(v, category=category, class_type='individual')
+                    G.add_edge(protein, v, relation=relation)
+                    G.add_edge(v, category, relation='is_a')
+        for value, category, relation in [
+            (domain, 'protein_domain', 'has_a_domain'),
+            (motif, 'protein_motif', 'has_a_motif'),
+        ]:
+            if 'none' not in value.split('|'):
+                for v in value.split('|'):
+                    G.add_node(v, category=category, class_type='individual')
+                    G.add_edge(v, category, relation='is_a')
+                    G.add_edge(protein, v, relation=relation)
+        if 'none' not in protein_location:
+            for pl in protein_location.split('|'):
+                G.add_node(pl, category='protein_location', class_type='individual')
+                G.add_edge(pl, 'protein_location', relation='is_a')
+                G.add_edge(protein, pl, relation='is_located_at')
+        G.nodes[protein]["molecular_weight"] = MW
+        G.nodes[protein]["protein_length"] = length
+
+
+def new_graph():
+    """Creates a graph with the supernodes and diseases that precede the phenotype stage."""
+    G = nx.DiGraph()
+    G.add_node('disease', category='disease', class_type='class')
+    G.add_node('phenotype', category='phenotype', class_type='class')
+    for disease, MIM in zip(
+        [row[1] for row in PHENOTYPE_BY_DISEASE if row[0] in DISEASE_MIMS],
+        [row[0] for row in PHENOTYPE_BY_DISEASE if row[0] in DISEASE_MIMS],
+    ):
+        G.add_node(disease, category='disease', MIM=MIM, class_type='individual')
+        G.add_edge(disease, 'disease', relation='is_a')
+    return G
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_add_phenotypes_matches_scan():
+    """Tests that the indexed phenotype join produces the same graph as the original scan."""
+    G_scan = new_graph()
+    scan_list = add_phenotypes_scan(G_scan, PHENOTYPE_BY_DISEASE, HPO_TAGS, DISEASE_MIMS, [])
+
+    G_join = new_graph()
+    join_list = add_phenotypes(G_join, PHENOTYPE_BY_DISEASE, HPO_TAGS, DISEASE_MIMS)
+
+    assert join_list == scan_list
+    assert list(G_join.nodes(data=True)) == list(G_scan.nodes(data=True))
+    assert list(G_join.edges(data=True)) == list(G_scan.edges(data=True))
+
+
+def test_add_phenotypes_extends_list():
+    """Tests that phenotypes already in the graph are not added again."""
+    G = new_graph()
+    phenotype_list = ['Ataxia']
+    add_phenotypes(G, PHENOTYPE_BY_DISEASE, HPO_TAGS, DISEASE_MIMS, phenotype_list)
+
+    assert phenotype_list == ['Ataxia', 'Hypotonia', 'Muscle_hypotonia', 'Seizure']
+    assert 'Ataxia' not in G
+
+
+def test_add_phenotypes_matches_scan_hpo_sample():
+    """Tests the indexed phenotype join against the original scan on a random sample of the real HPO tags."""
+    hpo_tags = pd.read_csv(HPO_DATA).values.tolist()
+    rng = random.Random(1234)
+    disease_MIMs = list(range(10))
+    phenotype_by_disease = [
+        [rng.randrange(20), f"disease_{rng.randrange(20)}", rng.choice(hpo_tags)[0]]
+        for _ in range(500)
+    ]
+
+    G_scan = nx.DiGraph()
+    add_phenotypes_scan(G_scan, phenotype_by_disease, hpo_tags, disease_MIMs, [])
+    G_join = nx.DiGraph()
+    add_phenotypes(G_join, phenotype_by_disease, hpo_tags, disease_MIMs)
+
+    assert list(G_join.nodes(data=True)) == list(G_scan.nodes(data=True))
+    assert list(G_join.edges(data=True)) == list(G_scan.edges(data=True))
+
+
+def test_add_proteins_matches_loop():
+    """Tests that the vectorized protein stage produces the same graph as the original loop."""
+    G_loop = nx.DiGraph()
+    add_proteins_loop(G_loop, PROTEINS_REPEATED.values.tolist(), "cmt")
+    G_frame = nx.DiGraph()
+    add_proteins(G_frame, PROTEINS_REPEATED)
+
+    assert list(G_frame.nodes(data=True)) == list(G_loop.nodes(data=True))
+    assert list(G_frame.edges(data=True)) == list(G_loop.edges(data=True))
+
+
+def test_add_proteins_matches_loop_disease_tables():
+    """Tests the vectorized protein stage against the original loop on the protein table of every disease, whose columns are resolved by header name."""
+    for disease in ["cmt", "dystonia", "parkinson"]:
+        proteins = pd.read_csv(DATA_DIR.joinpath(disease, "protein_list.csv"))
+        G_loop = nx.DiGraph()
+        add_proteins_loop(G_loop, proteins.values.tolist(), disease)
+        G_frame = nx.DiGraph()
+        add_proteins(G_frame, proteins)
+
+        assert list(G_frame.nodes(data=True)) == list(G_loop.nodes(data=True))
+        assert list(G_frame.edges(data=True)) == list(G_loop.edges(data=True))
+
+
+def test_read_phenotypes_filters_chunks(tmp_path):
+    """Tests that the streaming phenotype reader keeps exactly the rows of the requested diseases."""
+    file = tmp_path.joinpath("Phenotype_by_disease.csv")
+    df = pd.DataFrame(PHENOTYPE_BY_DISEASE[:6], columns=["disease_MIM", "disease", "hpo_ID"])
+    df["frequency"] = "HP:0040283"
+    df.to_csv(file, index=False)
+
+    rows = list(read_phenotypes(file, DISEASE_MIMS, chunksize=2))
+
+    assert rows == [row for row in PHENOTYPE_BY_DISEASE[:6] if row[0] in DISEASE_MIMS]
+
+
+def test_build_kg_pickled_tables():
+    """Tests that the graph built from tables sent to a worker process matches the graph built in place."""
+    tables = {
+        "variants": VARIANTS,
+        "hpo_tags": HPO_TAGS + [['HP:0001253', float('nan')], ['HP:0001254', float('nan')]],
+        "phenotype_by_disease": PHENOTYPE_BY_DISEASE + [
+            [609260, 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'HP:0001253'],
+            [617087, 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'HP:0001254'],
+        ],
+        "proteins": PROTEINS,
+    }
+
+    G = build_kg("cmt", tables)
+    G_pickled = build_kg("cmt", pickle.loads(pickle.dumps(tables)))
+
+    assert [str(node) for node in G_pickled.nodes] == [str(node) for node in G.nodes]
+    assert G_pickled.number_of_edges() == G.number_of_edges()
+    assert G.nodes['Mitofusin_2']['molecular_weight'] == 86
+    assert G.has_edge('Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'AR')
+
+
+def test_code_digest_covers_modules(monkeypatch):
+    """Tests that the code digest covers every local module that the construction and exports import."""
+    folder = Path(kg.__file__).parent
+    # The profiler and the manifest only write the build report and the manifest, not the exports
+    bookkeeping = {"profiling.py", "manifest.py"}
+    for module in GENERATOR_MODULES:
+        tree = ast.parse(folder.joinpath(module).read_text())
+        for node in ast.walk(tree):
+            names = [alias.name for alias in node.names] if isinstance(node, ast.Import) else [node.module] if isinstance(node, ast.ImportFrom) else []
+            for name in names:
+                if folder.joinpath(f"{name}.py").exists():
+                    assert f"{name}.py" in set(GENERATOR_MODULES) | bookkeeping, f"{module} imports {name}"
+
+    digest = code_digest()
+    file_digest = kg.file_digest
+    monkeypatch.setattr(kg, "file_digest", lambda file: "edited" if file.name == "graphml.py" else file_digest(file))
+    assert code_digest() != digest
+
+
+def test_input_digests_omit_is_a(monkeypatch):
+    """Tests that omitting the `is_a` statements is only an input of the Lerche exports."""
+    monkeypatch.setattr(kg, "file_digest", lambda file: file.name)
+    exports = ["gephy.graphml", "edge_attributes_lerche.txt.gz", "edge_attributes_lerche.bin"]
+
+    inputs = input_digests("cmt", exports, lerche_memberships=False)
+    assert inputs["gephy.graphml"] == input_digests("cmt", exports)["gephy.graphml"]
+    assert "omit_is_a" not in inputs["gephy.graphml"]
+    assert all(inputs[name]["omit_is_a"] == "true" for name in exports[1:])
@@ -0,0 +1,51 @@
+"""
+    test_manifest.py
+
+# Description
+Tests for the build manifest in `manifest.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from manifest import (
+    read_manifest,
+    record_artifacts,
+    stale_artifacts,
+    write_manifest,
+)
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_stale_artifacts(tmp_path):
+    """Tests that only artifacts with changed inputs, code, or contents are stale."""
+    names = ["gephy.graphml", "rdf.owl"]
+    inputs = {"HPO_to_tag.csv": "abc"}
+    files = {}
+    for name in names:
+        files[name] = tmp_path.joinpath(name)
+        files[name].write_text(name)
+
+    # Nothing is fresh before the first build
+    assert stale_artifacts(read_manifest(tmp_path), tmp_path, names, inputs, "v1") == names
+
+    write_manifest(tmp_path, record_artifacts({}, files, inputs, "v1"))
+    manifest = read_manifest(tmp_path)
+    assert stale_artifacts(manifest, tmp_path, names, inputs, "v1") == []
+
+    # Changed inputs or code invalidate every artifact
+    assert stale_artifacts(manifest, tmp_path, names, {"HPO_to_tag.csv": "abd"}, "v1") == names
+    assert stale_artifacts(manifest, tmp_path, names, inputs, "v2") == names
+
+    # Modified or missing artifacts are stale on their own
+    files["rdf.owl"].write_text("edited")
+    assert stale_artifacts(manifest, tmp_path, names, inputs, "v1") == ["rdf.owl"]
+    files["gephy.graphml"].unlink()
+    assert stale_artifacts(manifest, tmp_path, names, inputs, "v1") == names
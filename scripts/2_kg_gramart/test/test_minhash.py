@@ -0,0 +1,142 @@
+"""
+    test_minhash.py
+
+# Description
+Tests for the MinHash and LSH index of `minhash.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from kg import build_kg
+from minhash import (
+    EMPTY,
+    MERSENNE,
+    MinHashIndex,
+    annotation_incidence,
+    disease_incidence,
+    feature_hashes,
+    hash_functions,
+    signatures,
+)
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def planted_sets(n: int = 200, n_features: int = 3000, size: int = 40, seed: int = 3) -> list:
+    """Draws random feature sets, each followed by a near-duplicate with a few features replaced."""
+    rng = np.random.default_rng(seed)
+    sets = []
+    for _ in range(n):
+        features = rng.choice(n_features, size + 5, replace=False)
+        replaced = rng.integers(1, 6)
+        copy = np.concatenate([features[replaced:size], features[size:size + replaced]])
+        sets.extend([set(features[:size].tolist()), set(copy.tolist())])
+
+    return sets
+
+
+def to_matrix(sets: list, n_features: int = 3000) -> sparse.csr_matrix:
+    """Builds the incidence matrix of a list of integer feature sets."""
+    rows = np.repeat(np.arange(len(sets)), [len(s) for s in sets])
+    columns = np.fromiter((f for s in sets for f in sorted(s)), dtype=np.int64, count=len(rows))
+
+    return sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(len(sets), n_features))
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_signatures():
+    """Tests the vectorized signatures against the minimum of each hash function over each set, including empty sets."""
+    sets = [{0, 5, 9}, set(), {3}, set(), {1, 2, 4, 5, 6, 7, 8}]
+    X = to_matrix(sets, 10)
+    hashes = feature_hashes(range(10))
+    a, b = hash_functions(16)
+
+    expected = [
+        [min((int(a_i) * int(hashes[f]) + int(b_i)) % MERSENNE for f in s) if s else EMPTY for a_i, b_i in zip(a, b)]
+        for s in sets
+    ]
+    for chunk_size in (2, 1024):
+        assert signatures(X, hashes, a, b, chunk_size).tolist() == expected
+
+    index = MinHashIndex(16, 4).fit(list('abcde'), X, list(range(10)))
+    assert index.signature([0, 5, 9]).tolist() == expected[0]
+    assert index.signature([]).tolist() == expected[1]
+    assert index.query([]) == []
+    with pytest.raises(KeyError):
+        index.query('f')
+    with pytest.raises(ValueError):
+        MinHashIndex(16, 5)
+
+
+def test_recall():
+    """Tests the query API and the recall of the buckets for near-duplicate sets against the exact Jaccard similarities."""
+    sets = planted_sets()
+    X = to_matrix(sets)
+    labels = [f"set_{i}" for i in range(len(sets))]
+    index = MinHashIndex().fit(labels, X, list(range(X.shape[1])))
+
+    report = index.recall(X, 0.7)
+    assert report["pairs"] == len(sets)
+    assert report["recall"] >= 0.95
+    # Far fewer sets than the whole index are compared with each set
+    assert report["candidates"] < 0.05 * len(sets)
+
+    # Each set finds its planted near-duplicate first, and its own features as a perfect match
+    hits = sum([result[0] for result in index.query(label, 1)] == [labels[i ^ 1]] for i, label in enumerate(labels))
+    assert hits >= 0.95 * len(sets)
+    assert index.query(sets[0], 1) == [(labels[0], 1.0)]
+
+
+def test_from_graph(sample_tables):
+    """Tests an index of the diseases of a knowledge graph by their genes and inheritance."""
+    index = MinHashIndex.from_graph(build_kg("cmt", sample_tables), ['gene', 'inheritance'])
+    assert len(index) == 4
+    assert index.query('Charcot_Marie_Tooth_disease_axonal_type_2A2A', 1)[0][0] == 'Charcot_Marie_Tooth_disease_axonal_type_2A2B'
+    assert index.query(['MFN2', 'AD', 'AR'])[0] == ('Charcot_Marie_Tooth_disease_axonal_type_2A2B', 1.0)
+
+    # Each phenotype is only linked to the first disease annotated with it, so no diseases share a phenotype
+    with pytest.warns(UserWarning, match="share a feature"):
+        MinHashIndex.from_graph(build_kg("cmt", sample_tables))
+
+
+def test_annotations(sample_tables):
+    """Tests an index of the phenotypes of every annotation of the diseases, which the edges of the graph only link to the first disease."""
+    sample_tables["phenotype_by_disease"] += [
+        [617087, 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'HP:0001251'],
+        [617087, 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'HP:0002936'],
+        # The annotations of other diseases are skipped
+        [100000, 'Other_disease', 'HP:0001251'],
+    ]
+    G = build_kg("cmt", sample_tables)
+
+    diseases, phenotypes, X = annotation_incidence(sample_tables)
+    assert diseases == [
+        'Charcot_Marie_Tooth_disease_axonal_type_2A2A',
+        'Charcot_Marie_Tooth_disease_axonal_type_2A2B',
+        'Charcot_Marie_Tooth_disease_axonal_type_2CC',
+        'Charcot_Marie_Tooth_disease_type_2E',
+    ]
+    assert phenotypes == ['Ataxia', 'Distal_sensory_impairment', 'Hypotonia', 'Decreased_number_of_peripheral_myelinated_nerve_fibers', 'Seizure']
+    assert X.toarray().tolist()[1] == [1, 1, 1, 0, 0]
+
+    diseases, features, X = disease_incidence(G, ['phenotype', 'gene'], sample_tables)
+    row = X[diseases.index('Charcot_Marie_Tooth_disease_axonal_type_2A2B')]
+    assert set(features[j] for j in row.indices) == {'Ataxia', 'Distal_sensory_impairment', 'Hypotonia', 'MFN2'}
+
+    index = MinHashIndex.from_graph(G, tables=sample_tables)
+    assert index.query('Charcot_Marie_Tooth_disease_axonal_type_2A2A', 1)[0][0] == 'Charcot_Marie_Tooth_disease_axonal_type_2A2B'
+    assert index.recall(annotation_incidence(sample_tables)[2], 0.5)["pairs"] == 2
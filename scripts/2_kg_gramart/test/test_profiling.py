@@ -0,0 +1,73 @@
+"""
+    test_profiling.py
+
+# Description
+Tests for the per-stage build instrumentation in `profiling.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import json
+import pstats
+
+from kg import build_kg
+from profiling import (
+    StageProfiler,
+    stage,
+)
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_stage_report(tmp_path, sample_tables):
+    """Tests that the build stages are recorded with their graph sizes and written to a JSON report."""
+    profiler = StageProfiler()
+    with stage(profiler, 'load'):
+        pass
+    G = build_kg("cmt", sample_tables, profiler)
+
+    assert [record["stage"] for record in profiler.stages] == ['load', 'variants', 'phenotypes', 'proteins']
+    assert "nodes" not in profiler.stages[0]
+    assert profiler.stages[-1]["nodes"] == G.number_of_nodes()
+    assert profiler.stages[-1]["edges"] == G.number_of_edges()
+    assert profiler.stages[1]["nodes"] < profiler.stages[2]["nodes"] < profiler.stages[3]["nodes"]
+    assert all(record["process_max_rss"] > 0 for record in profiler.stages)
+
+    # The memberships that a compact graph collapses while it is built are still counted
+    compact = StageProfiler()
+    build_kg("cmt", sample_tables, compact, compact=True)
+    assert [record["stage"] for record in compact.stages] == ['variants', 'phenotypes', 'proteins']
+    assert [record["edges"] for record in compact.stages] == [record["edges"] for record in profiler.stages[1:]]
+
+    file = tmp_path.joinpath("build_report.json")
+    profiler.write(file, disease="cmt")
+    with open(file) as f:
+        report = json.load(f)
+    assert report["disease"] == "cmt"
+    assert report["stages"] == profiler.stages
+    assert report["total_time"] == sum(record["time"] for record in profiler.stages)
+
+
+def test_stage_profiles(tmp_path, sample_tables):
+    """Tests that profiling dumps readable statistics and traced memory for every stage."""
+    profiler = StageProfiler(tmp_path.joinpath("profile"), trace_memory=True)
+    build_kg("cmt", sample_tables, profiler)
+
+    for record in profiler.stages:
+        assert record["python_peak"] > 0
+        stats = pstats.Stats(str(tmp_path.joinpath("profile", f"{record['stage']}.prof")))
+        assert stats.total_calls > 0
+        assert tmp_path.joinpath("profile", f"{record['stage']}.prof.txt").exists()
+
+
+def test_no_profiler():
+    """Tests that the stages are skipped without a profiler."""
+    with stage(None, 'load'):
+        pass
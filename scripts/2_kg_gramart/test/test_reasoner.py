@@ -0,0 +1,111 @@
+"""
+    test_reasoner.py
+
+# Description
+Tests for the forward-chaining RDFS materializer in `reasoner.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import json
+
+from rdflib import (
+    RDF,
+    RDFS,
+    Graph,
+    Literal,
+)
+
+from export import EX
+from kg import build_kg
+from reasoner import (
+    INFERENCE_REPORT,
+    INFERRED_FILE,
+    RULES,
+    materialize,
+    materialize_file,
+)
+from store import TripleStore
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def naive_closure(triples: set) -> set:
+    """Computes the RDFS closure of a set of triples by applying every rule to every triple until nothing changes."""
+    closure = set(triples)
+    while True:
+        derived = set()
+        for s, p, o in closure:
+            for s2, p2, o2 in closure:
+                if p2 == RDFS.domain and s2 == p:
+                    derived.add((s, RDF.type, o2))
+                if p2 == RDFS.range and s2 == p and not isinstance(o, Literal):
+                    derived.add((o, RDF.type, o2))
+                if p2 == RDFS.subPropertyOf and s2 == p:
+                    derived.add((s, o2, o))
+                if p == RDFS.subPropertyOf and p2 == RDFS.subPropertyOf and s2 == o:
+                    derived.add((s, p, o2))
+                if p == RDF.type and p2 == RDFS.subClassOf and s2 == o:
+                    derived.add((s, RDF.type, o2))
+                if p == RDFS.subClassOf and p2 == RDFS.subClassOf and s2 == o:
+                    derived.add((s, p, o2))
+        if derived <= closure:
+            return closure
+        closure |= derived
+
+
+def inferred_triples(store: TripleStore) -> tuple:
+    """Materializes a store, returning its inferred triples as terms and its report."""
+    terms, inferred, report = materialize(store)
+
+    return [tuple(terms[i] for i in row) for row in inferred.tolist()], report
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_rules():
+    """Tests the closure of chains of subclasses and subproperties, domains, and ranges with literal values."""
+    triples = {
+        (EX.Mitofusin_2, EX.has_weight, Literal(86.4)),
+        (EX.has_weight, RDFS.range, EX.number),
+        (EX.has_weight, RDFS.domain, EX.protein),
+        (EX.protein, RDFS.subClassOf, EX.molecule),
+        (EX.molecule, RDFS.subClassOf, EX.entity),
+        (EX.MFN2, EX.codes_for, EX.Mitofusin_2),
+        (EX.codes_for, RDFS.subPropertyOf, EX.produces),
+        (EX.produces, RDFS.subPropertyOf, EX.related_to),
+        (EX.related_to, RDFS.range, EX.molecule),
+        (EX.related_to, RDFS.domain, EX.gene),
+    }
+    inferred, report = inferred_triples(TripleStore.from_triples(triples))
+
+    assert len(inferred) == len(set(inferred))
+    assert set(inferred) == naive_closure(triples) - triples
+    assert (EX.MFN2, EX.related_to, EX.Mitofusin_2) in inferred
+    assert (EX.Mitofusin_2, RDF.type, EX.entity) in inferred
+    assert not any(isinstance(s, Literal) for s, _, _ in inferred)
+    assert list(report["rules"]) == list(RULES)
+    assert sum(rule["new"] for rule in report["rules"].values()) == len(inferred)
+    assert all(rule["derivations"] >= rule["new"] for rule in report["rules"].values())
+
+
+def test_knowledge_graph(sample_tables, tmp_path):
+    """Tests the materialized ontology of a knowledge graph against the naive closure and its written files."""
+    store = TripleStore.from_graph(build_kg("cmt", sample_tables))
+    triples = set(store.triples())
+    inferred, _ = inferred_triples(store)
+    assert set(inferred) == naive_closure(triples) - triples
+
+    report = materialize_file(store, tmp_path)
+    assert set(Graph().parse(tmp_path.joinpath(INFERRED_FILE), format='nt')) == set(inferred)
+    with open(tmp_path.joinpath(INFERENCE_REPORT)) as f:
+        assert json.load(f)["inferred"] == report["inferred"] == len(inferred)
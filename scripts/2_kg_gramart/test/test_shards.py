@@ -0,0 +1,74 @@
+"""
+    test_shards.py
+
+# Description
+Tests for the balanced shards of the Lerche statements in `shards.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import numpy as np
+import pytest
+
+from export import (
+    LERCHE_EDGE_ATTRIBUTES,
+    export_kg,
+)
+from kg import build_kg
+from shards import (
+    BALANCE,
+    line_ends,
+    read_shard_manifest,
+    shard_bounds,
+    shards_stale,
+    verify_shards,
+    write_shards,
+)
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_shard_bounds():
+    """Tests that the shards are contiguous and balanced by statements or bytes."""
+    ends = line_ends(b"a\nbb\nccc\ndddd\neeeee\nf")
+    assert ends.tolist() == [2, 5, 9, 14, 20, 21]
+    assert shard_bounds(ends, 3, 'count').tolist() == [0, 2, 4, 6]
+    assert shard_bounds(ends, 2, 'bytes').tolist() == [0, 4, 6]
+    # More shards than statements leaves some of them empty
+    assert shard_bounds(ends[:2], 4, 'count').tolist() == [0, 0, 1, 1, 2]
+    assert shard_bounds(np.zeros(0, dtype=np.int64), 2, 'bytes').tolist() == [0, 0, 0]
+    with pytest.raises(ValueError):
+        shard_bounds(ends, 0)
+
+
+@pytest.mark.parametrize("balance", BALANCE)
+def test_write_shards(sample_tables, tmp_path, balance):
+    """Tests that the shards concatenate to the statement file and that their manifest tracks changes."""
+    source = export_kg(build_kg("cmt", sample_tables), tmp_path, [LERCHE_EDGE_ATTRIBUTES])[LERCHE_EDGE_ATTRIBUTES]
+    out_dir = tmp_path.joinpath("shards")
+
+    manifest = write_shards(source, out_dir, 5, balance)
+    assert manifest == read_shard_manifest(out_dir)
+    assert b"".join(out_dir.joinpath(shard["file"]).read_bytes() for shard in manifest["shards"]) == source.read_bytes()
+    assert sum(shard["statements"] for shard in manifest["shards"]) == len(source.read_text().splitlines())
+    assert verify_shards(out_dir) == []
+    assert not shards_stale(source, out_dir, 5, balance)
+    assert shards_stale(source, out_dir, 4, balance)
+
+    # Fewer shards remove the shards left over from the earlier split
+    manifest = write_shards(source, out_dir, 2, balance)
+    assert sorted(path.name for path in out_dir.iterdir()) == sorted(
+        [shard["file"] for shard in manifest["shards"]] + ["shards.json"]
+    )
+
+    modified = out_dir.joinpath(manifest["shards"][1]["file"])
+    modified.write_text("")
+    assert verify_shards(out_dir) == [modified.name]
+    assert shards_stale(source, out_dir, 2, balance)
@@ -0,0 +1,110 @@
+"""
+    test_similarity.py
+
+# Description
+Tests for the sparse disease similarity of `similarity.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import math
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from kg import build_kg
+from similarity import (
+    FEATURES,
+    METRICS,
+    NEIGHBOR_COLUMNS,
+    disease_similarity,
+    incidence,
+    top_neighbors,
+)
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def exact_neighbors(sets: list, k: int, metric: str) -> list:
+    """Ranks the k most similar other sets of each set by comparing every pair of Python sets."""
+    def score(a, b):
+        shared = len(a & b)
+        if metric == 'jaccard':
+            return shared / len(a | b)
+        if metric == 'cosine':
+            return shared / math.sqrt(len(a) * len(b))
+        return shared / min(len(a), len(b))
+
+    neighbors = []
+    for i, a in enumerate(sets):
+        ranked = sorted(
+            ((-score(a, b), j) for j, b in enumerate(sets) if j != i and a & b),
+        )
+        neighbors.extend((i, j, rank + 1, -s) for rank, (s, j) in enumerate(ranked[:k]))
+
+    return neighbors
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("metric", METRICS)
+def test_top_neighbors(metric):
+    """Tests the chunked top-k neighbors of a random incidence matrix against the exact ranking of every pair."""
+    rng = np.random.default_rng(7)
+    X = sparse.random(60, 40, density=0.1, format='csr', random_state=rng)
+    X.data[:] = 1
+    sets = [set(X.indices[X.indptr[i]:X.indptr[i + 1]].tolist()) for i in range(X.shape[0])]
+
+    expected = exact_neighbors(sets, 5, metric)
+    for chunk_size in (7, 1000):
+        rows, neighbors, ranks, scores, shared = top_neighbors(X, 5, metric, chunk_size)
+        assert list(zip(rows.tolist(), neighbors.tolist(), ranks.tolist())) == [(i, j, r) for i, j, r, _ in expected]
+        assert np.allclose(scores, [s for _, _, _, s in expected])
+        assert shared.tolist() == [len(sets[i] & sets[j]) for i, j in zip(rows.tolist(), neighbors.tolist())]
+
+    with pytest.raises(ValueError):
+        top_neighbors(X, 5, 'euclidean')
+
+
+def test_disease_similarity(sample_tables):
+    """Tests the feature paths of the incidence matrix and the neighbor table of a knowledge graph."""
+    sample_tables["phenotype_by_disease"].append([617087, 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'HP:0001251'])
+    G = build_kg("cmt", sample_tables)
+    diseases, features, X = incidence(G, list(FEATURES))
+    assert diseases == G.nodes_of('disease')[1:]
+
+    # The protein features are reached through the causative gene and its protein
+    row = X[diseases.index('Charcot_Marie_Tooth_disease_axonal_type_2A2A')]
+    assert set(features[j] for j in row.indices) == {
+        'Ataxia', 'Distal_sensory_impairment', 'MFN2', 'AD',
+        'Enzymes', 'Transporters', 'Apoptosis', 'Hydrolase', 'Neuropathy', 'TM', 'mitochondrion',
+    }
+
+    # Each phenotype is only linked to the first disease annotated with it
+    assert disease_similarity(G, ['phenotype']).empty
+
+    table = disease_similarity(G, ['gene', 'inheritance'], k=1)
+    assert list(table.columns) == NEIGHBOR_COLUMNS
+    assert table.values.tolist() == [
+        ['Charcot_Marie_Tooth_disease_axonal_type_2A2A', 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 1, 2 / 3, 2],
+        ['Charcot_Marie_Tooth_disease_axonal_type_2A2B', 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 1, 2 / 3, 2],
+        ['Charcot_Marie_Tooth_disease_axonal_type_2CC', 'Charcot_Marie_Tooth_disease_axonal_type_2A2A', 1, 1 / 3, 1],
+        ['Charcot_Marie_Tooth_disease_type_2E', 'Charcot_Marie_Tooth_disease_axonal_type_2A2B', 1, 0.5, 2],
+    ]
+    table = disease_similarity(G, ['protein'], k=1, metric='overlap')
+    assert table['neighbor'].tolist() == [
+        'Charcot_Marie_Tooth_disease_axonal_type_2A2B',
+        'Charcot_Marie_Tooth_disease_axonal_type_2A2A',
+        'Charcot_Marie_Tooth_disease_type_2E',
+        'Charcot_Marie_Tooth_disease_axonal_type_2CC',
+    ]
@@ -0,0 +1,99 @@
+"""
+    test_store.py
+
+# Description
+Tests for the indexed triple store in `store.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from itertools import product
+
+import pytest
+from rdflib import (
+    Literal,
+    RDF,
+)
+
+from export import (
+    EX,
+    RDF_OWL,
+    build_rdf,
+    export_kg,
+)
+from kg import build_kg
+from store import (
+    QUERIES,
+    TripleStore,
+)
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_match_patterns(sample_tables):
+    """Tests that every combination of bound positions matches the same triples as rdflib."""
+    G = build_kg("cmt", sample_tables)
+    g = build_rdf(G)
+    store = TripleStore.from_graph(G)
+    assert len(store) == len(g)
+
+    s, p, o = next(iter(g.triples((None, EX.is_caused_by, None))))
+    for pattern in product(*((None, term) for term in (s, p, o))):
+        assert set(store.triples(*pattern)) == set(g.triples(pattern))
+    assert len(store.match(EX.missing_term, None, None)) == 0
+
+
+def test_queries_match_sparql(sample_tables, tmp_path):
+    """Tests that the pattern queries of the benchmark answer the same solutions as their SPARQL, including from an RDF export."""
+    G = build_kg("cmt", sample_tables)
+    g = build_rdf(G)
+    stores = [
+        TripleStore.from_graph(G),
+        TripleStore.from_rdf(export_kg(G, tmp_path, [RDF_OWL])[RDF_OWL]),
+    ]
+
+    for sparql, patterns, filters, select in QUERIES.values():
+        expected = sorted(tuple(row) for row in g.query(sparql))
+        assert expected
+        for store in stores:
+            assert sorted(store.query(patterns, filters, select)) == expected
+
+
+def test_query_variables():
+    """Tests the default selection, repeated variables, cross joins, and invalid terms of a query."""
+    store = TripleStore.from_triples([
+        (EX.a, EX.knows, EX.a),
+        (EX.a, EX.knows, EX.b),
+        (EX.b, EX.weight, Literal("7")),
+        (EX.c, RDF.type, EX.thing),
+    ])
+
+    assert store.query([('?x', EX.knows, '?x')]) == [(EX.a,)]
+    assert store.query([('?x', EX.knows, '?y'), ('?y', EX.weight, '?w')], {'?w': lambda w: int(w) > 5}) == [
+        (EX.a, EX.b, Literal("7")),
+    ]
+    assert store.query([('?y', EX.weight, '?w')], {'?w': lambda w: int(w) > 10}) == []
+    assert sorted(store.query([('?t', RDF.type, EX.thing), ('?x', EX.knows, EX.b)])) == [(EX.c, EX.a)]
+    with pytest.raises(ValueError):
+        store.query([('x', EX.knows, '?y')])
+
+
+def test_ground_patterns():
+    """Tests that a pattern without variables keeps every solution if its triple exists and none otherwise."""
+    store = TripleStore.from_triples([
+        (EX.tau, RDF.type, EX.protein),
+        (EX.MFN2, RDF.type, EX.protein),
+        (EX.MAPT, EX.codes_for, EX.tau),
+    ])
+
+    assert sorted(store.query([('?p', RDF.type, EX.protein), (EX.tau, RDF.type, EX.protein)])) == [(EX.MFN2,), (EX.tau,)]
+    assert store.query([('?p', RDF.type, EX.protein), (EX.MFN2, RDF.type, EX.gene)]) == []
+    assert store.query([(EX.MAPT, EX.codes_for, EX.tau)]) == [()]
+    assert store.query([(EX.MAPT, EX.codes_for, EX.MFN2)]) == []
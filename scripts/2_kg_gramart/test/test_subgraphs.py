@@ -0,0 +1,58 @@
+"""
+    test_subgraphs.py
+
+# Description
+Tests for the per-entity k-hop subgraphs in `subgraphs.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import networkx as nx
+import pytest
+
+from kg import build_kg
+from subgraphs import extract_subgraphs
+from triples import read_lerche
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def khop_statements(G: nx.DiGraph, root, k: int, direction: str, exclude_hubs: bool) -> list:
+    """Finds the statements within k hops of a root with a search per root, in the order of the edges of the graph."""
+    blocked = {node for node, class_type in G.nodes(data='class_type') if exclude_hubs and class_type == 'class'}
+    H = G.subgraph(node for node in G if node not in blocked or node == root)
+    search = H if direction == 'out' else H.to_undirected(as_view=True)
+    near = set(nx.single_source_shortest_path_length(search, root, cutoff=k - 1))
+
+    return [
+        (str(u), attributes['relation'], str(v))
+        for u, v, attributes in G.edges.data()
+        if attributes and (u in near or (direction == 'both' and v in near)) and u in H and v in H
+    ]
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("k, direction, exclude_hubs, processes", [
+    (1, 'out', False, 1),
+    (2, 'out', True, 1),
+    (2, 'both', True, 2),
+    (3, 'both', False, 1),
+])
+def test_khop_statements(sample_tables, tmp_path, k, direction, exclude_hubs, processes):
+    """Tests the batched searches against a search from each disease in turn."""
+    G = build_kg("cmt", sample_tables)
+    files = extract_subgraphs(G, tmp_path, 'disease', k, direction, exclude_hubs, processes, batch_size=3)
+
+    assert list(files) == [node for node in G.nodes_of('disease') if node != 'disease']
+    for root, file in files.items():
+        assert list(read_lerche(file)) == khop_statements(G, root, k, direction, exclude_hubs)
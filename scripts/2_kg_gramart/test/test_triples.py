@@ -0,0 +1,81 @@
+"""
+    test_triples.py
+
+# Description
+Tests for the binary triple format in `triples.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import numpy as np
+
+from export import (
+    LERCHE_EDGE_ATTRIBUTES,
+    LERCHE_TRIPLES,
+    export_kg,
+)
+from kg import build_kg
+from triples import (
+    check_round_trip,
+    intern_triples,
+    iter_statements,
+    read_lerche,
+    read_triples,
+    write_triples,
+)
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_write_read_triples(tmp_path):
+    """Tests that symbols and triples survive a round trip through a file, with and without memory-mapping."""
+    statements = [
+        ("MFN2", "codes_for", "Mitofusin_2"),
+        ("Mitofusin_2", "is_a", "protein"),
+        ("Sjögren_syndrome", "is_a", "disease"),
+        (17, "is_a", "chromosome"),
+    ]
+    symbols, codes = intern_triples(statements)
+    assert symbols[:3] == ["MFN2", "codes_for", "Mitofusin_2"]
+    assert codes.dtype == np.int32 and codes.shape == (4, 3)
+
+    file = tmp_path.joinpath("statements.bin")
+    write_triples(file, symbols, codes)
+    for mmap in (True, False):
+        read_symbols, read_codes = read_triples(file, mmap=mmap)
+        assert read_symbols == symbols
+        assert np.array_equal(read_codes, codes)
+
+    assert list(iter_statements(file)) == [tuple(str(term) for term in s) for s in statements]
+
+
+def test_check_round_trip(sample_tables, tmp_path):
+    """Tests that the exported binary triples match the exported Lerche statements, and that a mismatch is detected."""
+    G = build_kg("cmt", sample_tables)
+    files = export_kg(G, tmp_path, [LERCHE_EDGE_ATTRIBUTES, LERCHE_TRIPLES])
+    assert check_round_trip(files[LERCHE_EDGE_ATTRIBUTES], files[LERCHE_TRIPLES])
+
+    # A missing statement is a mismatch
+    with open(files[LERCHE_EDGE_ATTRIBUTES], 'a') as f:
+        f.write('"NEFL" "is_a" "gene"\n')
+    assert not check_round_trip(files[LERCHE_EDGE_ATTRIBUTES], files[LERCHE_TRIPLES])
+
+
+def test_escaped_terms(sample_tables, tmp_path):
+    """Tests that labels with quotes and backslashes are escaped by the Lerche export and read back unchanged."""
+    sample_tables["hpo_tags"].append(['HP:0001253', 'Say_"ah"_\\_then_\\"stop'])
+    sample_tables["phenotype_by_disease"].append([607684, 'Charcot_Marie_Tooth_disease_type_2E', 'HP:0001253'])
+    G = build_kg("cmt", sample_tables)
+    files = export_kg(G, tmp_path, [LERCHE_EDGE_ATTRIBUTES, LERCHE_TRIPLES])
+
+    text = files[LERCHE_EDGE_ATTRIBUTES].read_text()
+    assert '"Say_\\"ah\\"_\\\\_then_\\\\\\"stop" "is_a" "phenotype"' in text
+    assert ('Charcot_Marie_Tooth_disease_type_2E', 'has_a_phenotype', 'Say_"ah"_\\_then_\\"stop') in list(read_lerche(files[LERCHE_EDGE_ATTRIBUTES]))
+    assert check_round_trip(files[LERCHE_EDGE_ATTRIBUTES], files[LERCHE_TRIPLES])
@@ -0,0 +1,73 @@
+"""
+    test_utils.py
+
+# Description
+Tests for the common utilities in `utils.py`.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import pickle
+
+import pytest
+
+from utils import (
+    CACHE_VERSION,
+    cache_dir,
+    cached_parse,
+    file_digest,
+)
+
+# -----------------------------------------------------------------------------
+# TESTS
+# -----------------------------------------------------------------------------
+
+
+def test_cached_parse(tmp_path, monkeypatch):
+    """Tests that parsed files are shared by content and invalidated when their contents change."""
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    def parse_lines(file):
+        calls.append(file)
+        return file.read_text().splitlines()
+
+    cmt = tmp_path.joinpath("cmt.csv")
+    dystonia = tmp_path.joinpath("dystonia.csv")
+    cmt.write_text("a\nb\n")
+    dystonia.write_text("a\nb\n")
+
+    # Identical contents in different files are parsed once
+    assert cached_parse(cmt, parse_lines) == ["a", "b"]
+    assert cached_parse(dystonia, parse_lines) == ["a", "b"]
+    assert calls == [cmt]
+    assert len(list(cache_dir("tables").iterdir())) == 1
+
+    # Changed contents are parsed again
+    cmt.write_text("a\nc\n")
+    assert cached_parse(cmt, parse_lines) == ["a", "c"]
+    assert calls == [cmt, cmt]
+    assert cached_parse(dystonia, parse_lines) == ["a", "b"]
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("stale", [b"cnot_a_module\nTable\n.", b"cos\nnot_a_function\n.", b"\x80\x05"])
+def test_cached_parse_unreadable(tmp_path, monkeypatch, stale):
+    """Tests that entries whose classes cannot be imported, as if pickled by another version of pandas, or that are truncated are parsed again."""
+    monkeypatch.chdir(tmp_path)
+
+    def parse_lines(file):
+        return file.read_text().splitlines()
+
+    cmt = tmp_path.joinpath("cmt.csv")
+    cmt.write_text("a\nb\n")
+    entry = cache_dir("tables").joinpath(f"{file_digest(cmt)}-parse_lines-v{CACHE_VERSION}.pickle")
+    entry.write_bytes(stale)
+
+    assert cached_parse(cmt, parse_lines) == ["a", "b"]
+    assert pickle.loads(entry.read_bytes()) == ["a", "b"]
@@ -0,0 +1,238 @@
+"""
+    triples.py
+
+# Description
+A compact binary format for the subject-predicate-object statements of the `2_kg_gramart` knowledge graphs, written alongside `edge_attributes_lerche.txt`.
+
+A triple file holds an interned symbol table and an `int32` array of `(subject, predicate, object)` symbol ids, so that consumers can memory-map the statements instead of tokenizing quoted strings.
+All integers are little-endian, and the layout is:
+
+1. The 8-byte magic `b"KGTRIPLE"`, followed by the `uint32` format version, the `uint32` number of symbols `n`, and the `uint64` number of triples `m`.
+2. `n + 1` `uint64` byte offsets of the symbols into the symbol blob, followed by the blob of the UTF-8 encoded symbols.
+3. Zero padding to a multiple of 8 bytes, followed by the `m x 3` row-major `int32` array of the triples.
+
+# Authors
+- Sasha Petrenko <petrenkos@mst.edu>
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+import argparse
+import re
+import struct
+from array import array
+from itertools import zip_longest
+from pathlib import Path
+from typing import (
+    Iterable,
+    Iterator,
+)
+
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+MAGIC = b"KGTRIPLE"
+VERSION = 1
+
+# The magic, version, number of symbols, and number of triples
+HEADER = struct.Struct("<8sIIQ")
+
+# The alignment of the triple array from the start of the file
+ALIGNMENT = 8
+
+# A quoted statement term of `edge_attributes_lerche.txt`, which may contain escaped quotes and backslashes like the `ESCAPED_STRING` of Lerche
+QUOTED = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+# An escaped character of a quoted term
+ESCAPED = re.compile(r'\\(.)')
+
+# -----------------------------------------------------------------------------
+# FUNCTIONS
+# -----------------------------------------------------------------------------
+
+
+def quote(term: str) -> str:
+    """Quotes a term in the form of `edge_attributes_lerche.txt`, escaping its backslashes and quotes."""
+    return '"' + str(term).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def unquote(term: str) -> str:
+    """Unescapes the text of a quoted term matched by `QUOTED`."""
+    return ESCAPED.sub(r'\1', term) if '\\' in term else term
+
+
+def intern_triples(statements: Iterable[tuple]) -> tuple:
+    """Interns the terms of a series of statements into a symbol table.
+
+    Parameters
+    ----------
+    statements : Iterable[tuple]
+        The `(subject, predicate, object)` statements, whose terms are converted to strings.
+
+    Returns
+    -------
+    tuple
+        The list of symbols in order of first appearance and the `m x 3` `int32` array of their ids in each statement.
+    """
+
+    ids = {}
+    symbols = []
+    codes = array('i')
+    for statement in statements:
+        for term in statement:
+            term = str(term)
+            code = ids.get(term)
+            if code is None:
+                code = ids[term] = len(symbols)
+                symbols.append(term)
+            codes.append(code)
+
+    return symbols, np.frombuffer(codes, dtype=np.int32).reshape(-1, 3)
+
+
+def write_triples(file: Path, symbols: list, triples: np.ndarray) -> None:
+    """Writes a symbol table and its triples to a binary triple file.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the output file.
+    symbols : list
+        The interned symbols.
+    triples : np.ndarray
+        The `m x 3` array of the symbol ids of each triple.
+    """
+
+    encoded = [symbol.encode('utf-8') for symbol in symbols]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    np.cumsum([len(symbol) for symbol in encoded], out=offsets[1:])
+
+    with open(file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(encoded), len(triples)))
+        f.write(offsets.tobytes())
+        f.write(b"".join(encoded))
+        f.write(b"\0" * (-f.tell() % ALIGNMENT))
+        f.write(np.ascontiguousarray(triples, dtype='<i4').tobytes())
+
+
+def read_triples(file: Path, mmap: bool = True) -> tuple:
+    """Reads the symbol table and triples of a binary triple file.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the binary triple file.
+    mmap : bool, optional
+        If true, memory-maps the triple array instead of reading it into memory, by default True.
+
+    Returns
+    -------
+    tuple
+        The list of symbols and the `m x 3` `int32` array of the symbol ids of each triple.
+    """
+
+    with open(file, 'rb') as f:
+        magic, version, n_symbols, n_triples = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file} is not a version {VERSION} binary triple file")
+        offsets = np.frombuffer(f.read(8 * (n_symbols + 1)), dtype='<u8').tolist()
+        blob = f.read(offsets[-1])
+        start = f.tell() + (-f.tell() % ALIGNMENT)
+        if mmap and n_triples > 0:
+            triples = np.memmap(file, dtype='<i4', mode='r', offset=start, shape=(n_triples, 3))
+        else:
+            f.seek(start)
+            triples = np.frombuffer(f.read(12 * n_triples), dtype='<i4').reshape(n_triples, 3)
+
+    symbols = [
+        blob[offsets[i]:offsets[i + 1]].decode('utf-8')
+        for i in range(n_symbols)
+    ]
+
+    return symbols, triples
+
+
+def iter_statements(file: Path) -> Iterator[tuple]:
+    """Iterates over the statements of a binary triple file as strings.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the binary triple file.
+
+    Yields
+    ------
+    tuple
+        The `(subject, predicate, object)` strings of each statement in file order.
+    """
+
+    symbols, triples = read_triples(file)
+    for s, p, o in triples.tolist():
+        yield symbols[s], symbols[p], symbols[o]
+
+
+def read_lerche(file: Path) -> Iterator[tuple]:
+    """Iterates over the statements of an `edge_attributes_lerche.txt` file, following the grammar of `OAR.get_kg_parser`.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the Lerche statements file.
+
+    Yields
+    ------
+    tuple
+        The `(subject, predicate, object)` strings of each statement in file order.
+    """
+
+    with open(file) as f:
+        for line in f:
+            terms = QUOTED.findall(line)
+            if len(terms) != 3:
+                raise ValueError(f"Malformed statement in {file}: {line!r}")
+            yield tuple(unquote(term) for term in terms)
+
+
+def check_round_trip(lerche_file: Path, triple_file: Path) -> bool:
+    """Checks that a binary triple file holds exactly the statements of a Lerche statements file.
+
+    Parameters
+    ----------
+    lerche_file : Path
+        The location of the `edge_attributes_lerche.txt` file.
+    triple_file : Path
+        The location of the binary triple file.
+
+    Returns
+    -------
+    bool
+        True if both files hold the same statements in the same order.
+    """
+
+    pairs = zip_longest(read_lerche(lerche_file), iter_statements(triple_file))
+
+    return all(text == binary for text, binary in pairs)
+
+
+# -----------------------------------------------------------------------------
+# COMMAND LINE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog='triples.py',
+        description='Checks that a binary triple file holds exactly the statements of a Lerche statements file.',
+    )
+    parser.add_argument('lerche_file', type=Path, help='the edge_attributes_lerche.txt file')
+    parser.add_argument('triple_file', type=Path, help='the edge_attributes_lerche.bin file')
+    args = parser.parse_args()
+
+    if not check_round_trip(args.lerche_file, args.triple_file):
+        parser.exit(1, f"{args.triple_file} does not match {args.lerche_file}\n")
+    symbols, triples = read_triples(args.triple_file)
+    print(f"{args.triple_file} matches {args.lerche_file}: {len(triples)} statements, {len(symbols)} symbols")
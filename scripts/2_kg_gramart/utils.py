@@ -12,7 +12,24 @@ A collection of common Python utilities for the `2_kg_gramart` experiment.
 # IMPORTS
 # -----------------------------------------------------------------------------
 
+import hashlib
+import os
+import pickle
 from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+)
+
+# -----------------------------------------------------------------------------
+# CONSTANTS
+# -----------------------------------------------------------------------------
+
+# The size of the blocks read when hashing files
+HASH_BLOCKSIZE = 1 << 20
+
+# The version of the cached table format, which is part of every cache key
+CACHE_VERSION = 1
 
 # -----------------------------------------------------------------------------
 # FUNCTIONS
@@ -58,3 +75,94 @@ def data_dir(*args) -> Path:
 
     # Return the data path joined by the arguments
     return data_path.joinpath(*args)
+
+
+def cache_dir(*args) -> Path:
+    """Points to the cache directory of parsed data files, next to the data directory.
+
+    Pass a series of directories as paths (in the form of `pathlib.Path.joinpath(...)`) to point to the desired cache folder.
+
+    Returns
+    -------
+    Path
+        A `pathlib.Path` pointing to the location of `*args` in the cache directory.
+    """
+
+    # Point to the cache path
+    cache_path = Path("work", "cache", *args)
+
+    # Verify that the directory exists
+    cache_path.mkdir(parents=True, exist_ok=True)
+
+    return cache_path
+
+
+def file_digest(file: Path) -> str:
+    """Computes the SHA-256 content hash of a file.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the file to hash.
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA-256 digest of the contents of the file.
+    """
+
+    digest = hashlib.sha256()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCKSIZE), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def cached_parse(file: Path, parse: Callable[[Path], Any], digest: str = None) -> Any:
+    """Parses a data file, reusing the result of an earlier parse of a file with the same contents.
+
+    Parsed files are stored as pickles in the `tables` cache folder, keyed by the SHA-256 hash of the file contents, the name of the parser, and `CACHE_VERSION`.
+    Identical files in different data folders therefore share one entry, and an entry is never read again once its source file changes.
+    An entry that cannot be unpickled, e.g., one written by another version of pandas, is parsed again and replaced.
+
+    Parameters
+    ----------
+    file : Path
+        The location of the data file.
+    parse : Callable[[Path], Any]
+        The function parsing the data file, whose result must be picklable.
+    digest : str, optional
+        The content hash of the data file from `file_digest`, which is computed if not provided.
+
+    Returns
+    -------
+    Any
+        The result of `parse(file)`.
+    """
+
+    if digest is None:
+        digest = file_digest(file)
+
+    entry = cache_dir("tables").joinpath(
+        f"{digest}-{parse.__name__}-v{CACHE_VERSION}.pickle"
+    )
+
+    # Load the parsed file if it is cached, falling back to parsing if the entry is unreadable,
+    # such as an entry pickled by another version of pandas whose classes have moved or changed
+    if entry.exists():
+        try:
+            with open(entry, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError, ValueError):
+            pass
+
+    result = parse(file)
+
+    # Write to a temporary file first so that concurrent builds never read a partial entry
+    temp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+    with open(temp, 'wb') as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    temp.replace(entry)
+
+    return result
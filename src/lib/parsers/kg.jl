@@ -23,8 +23,8 @@ const KGStatement = Vector{KGSymbol}
 # The rules turn the terminals into `OAR` grammar symbols and statements into vectors
 # Turn statements into Julia Vectors
 @rule statement(t::KGSTARTTree, p) = Vector{KGSymbol}(p)
-# Remove backslashes in escaped strings
-@inline_rule gstring(t::KGSTARTTree, s) = replace(s[2:end-1],"\\\""=>"\"")
+# Remove the backslashes escaping the quotes and backslashes in the strings
+@inline_rule gstring(t::KGSTARTTree, s) = replace(s[2:end-1], r"\\(.)" => s"\1")
 # Define the datatype for the strings themselves
 @rule kg_symb(t::KGSTARTTree, p) = KGSymbol(p[1], true)
 
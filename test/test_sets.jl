@@ -90,6 +90,17 @@ end
 
     # Parse the statement
     k = OAR.run_parser(kg_parser, text)
+
+    # Escape a term with quotes and backslashes as the Lerche exports of 1_kg_gen.py do
+    term = "Say_\"ah\"_\\_then_\\\"stop\\"
+    escaped = replace(replace(term, "\\" => "\\\\"), "\"" => "\\\"")
+
+    # The escaped term is read back unchanged from a file of statements
+    file = tempname()
+    write(file, "\"$(escaped)\" \"is_a\" \"phenotype\"\n")
+    statements = OAR.get_kg_statements(file)
+    rm(file)
+    @assert [symbol.data for symbol in statements[1]] == [term, "is_a", "phenotype"]
 end
 
 # -----------------------------------------------------------------------------